@@ -4,12 +4,16 @@ from openai import OpenAI
 
 from backend.agent import Agent
 from backend.debate_engine import DebateEngine
-from backend.consensus import ConsensusEngine
+from backend.consensus import RANKED_METHODS, ConsensusEngine
 from backend.judge import JudgeAgent
-from backend.analysis import AnalysisTools
+from backend.analysis import AnalysisTools, DebateAnalysis
 from backend.utils import Utils
+from backend.stats import get_stats
+from backend.llm_client import LLMClient
+from backend.llm_cache import ResponseCache
 
 MISTRAL_BASE_URL = "https://api.mistral.ai/v1"
+LLM_CACHE_PATH = "cache/llm_responses.sqlite"
 
 ROLE_STYLES = {
     "Architect": ("👑", "#ffb347"),
@@ -37,6 +41,21 @@ def render_agent_message(agent_name, role, text):
     </div>
     """
 
+@st.cache_resource
+def get_client(api_key, base_url, rpm, tpm, use_cache=False):
+    """One rate-limited client per key/limits, shared across reruns and sessions."""
+    # LLMClient does the retrying; SDK retries would multiply its attempts
+    return LLMClient(OpenAI(api_key=api_key, base_url=base_url, max_retries=0),
+                     requests_per_minute=rpm or None, tokens_per_minute=tpm or None,
+                     cache=ResponseCache(LLM_CACHE_PATH) if use_cache else None)
+
+@st.cache_resource
+def get_session_stats():
+    """Cross-session leaderboard; exports saved before it existed are folded in once per process."""
+    stats = get_stats()
+    stats.sync()
+    return stats
+
 def main():
     st.set_page_config(page_title="EchoMind — Debate Arena", layout="wide")
     st.title("⚖️ EchoMind — Emergent Intelligence through Autonomous LLM Societies")
@@ -48,12 +67,35 @@ def main():
         num_agents = st.slider("Number of Agents", 2, 8, 3)
         rounds = st.number_input("Debate Rounds", min_value=1, max_value=10, value=3)
         memory_enabled = st.checkbox("Enable Memory", value=True)
+        simultaneous = st.checkbox("Simultaneous Rounds", value=False,
+                                   help="All agents in a round answer the previous round concurrently.")
+        max_concurrency = st.slider("Max Concurrent LLM Calls", 1, 8, 4, disabled=not simultaneous)
+        early_stop = st.checkbox("Stop Early on Convergence", value=False,
+                                 help="Skip agents that repeat themselves and end the debate once positions settle.")
+        stream_tokens = st.checkbox("Stream Tokens", value=True,
+                                    help="Render each argument as the model generates it.")
+        pacing = st.slider("Pause Between Turns (s)", 0.0, 2.0, 0.0, 0.1)
+        method = st.selectbox("Consensus Method", ["majority", *RANKED_METHODS],
+                              help="Ranked methods ask each agent for one full JSON ranking.")
+        with st.expander("Rate Limits"):
+            rpm = st.number_input("Requests / minute (0 = unlimited)", min_value=0, value=0)
+            tpm = st.number_input("Tokens / minute (0 = unlimited)", min_value=0, value=0)
+            use_cache = st.checkbox("Cache vote/judge responses", value=False,
+                                    help="Replays of identical vote and judge prompts are served from disk.")
+        with st.expander("🏅 Leaderboard"):
+            stats = get_session_stats()
+            dimension = st.radio("By", ["role", "persona"], horizontal=True)
+            st.dataframe(stats.leaderboard(dimension), hide_index=True)
+            st.dataframe(stats.methods(), hide_index=True)
+            summary = stats.summary()
+            st.caption(f"{summary['sessions']} sessions • judge invoked {summary['judge_rate']:.0%} • "
+                       f"judge overrode the vote leader in {summary['override_rate']:.0%} of those")
 
     if not mistral_key:
         st.warning("Enter your Mistral API key in the sidebar.")
         return
 
-    client = OpenAI(api_key=mistral_key, base_url=base_url)
+    client = get_client(mistral_key, base_url, rpm, tpm, use_cache)
     st.success("✅ Mistral Client Initialized")
 
     # Setup agents
@@ -73,28 +115,61 @@ def main():
             return
 
         st.subheader("🗣️ Live Debate Transcript")
-        debate = DebateEngine(agents, client, rounds=rounds, memory_enabled=memory_enabled)
+        debate = DebateEngine(agents, client, rounds=rounds, memory_enabled=memory_enabled,
+                              simultaneous=simultaneous, max_concurrency=max_concurrency,
+                              convergence=early_stop)
 
-        # Dynamic debate streaming
+        # Dynamic debate streaming; analysis state is updated per turn
         transcript = []
+        analysis = DebateAnalysis()
         transcript_container = st.container()
-        for turn in debate.run_streaming(topic):  # <-- use streaming generator
+        placeholder, partial = None, ""
+        for event in debate.run_streaming(topic, token_stream=stream_tokens):  # <-- use streaming generator
+            if placeholder is None:
+                with transcript_container:
+                    placeholder = st.empty()
+            if event.get("type") == "delta":
+                # Render the turn as its tokens arrive
+                partial += event["delta"]
+                placeholder.markdown(render_agent_message(event["agent"], event.get("role", "Civilian"), partial + " ▌"),
+                                     unsafe_allow_html=True)
+                continue
+
+            turn = event
             transcript.append(turn)
-            with transcript_container:
-                st.markdown(render_agent_message(turn["agent"], turn.get("role", "Civilian"), turn["text"]),
-                            unsafe_allow_html=True)
-            time.sleep(0.5)  # simulate pacing
+            analysis.add_turn(turn)
+            placeholder.markdown(render_agent_message(turn["agent"], turn.get("role", "Civilian"), turn["text"]),
+                                 unsafe_allow_html=True)
+            placeholder, partial = None, ""
+            if pacing:
+                time.sleep(pacing)
+
+        if debate.convergence is not None and debate.convergence.report.calls_saved:
+            report = debate.convergence.report
+            st.info(f"Convergence: {report.calls_saved} of {report.planned_turns} debate calls saved "
+                    f"({report.rounds_run} round(s) run" + (", stopped early)" if report.stopped_early else ")"))
 
         # ----------------------------
         # Voting
         # ----------------------------
         st.subheader("🗳️ Voting Results")
         consensus_engine = ConsensusEngine(agents)
-        votes = consensus_engine.collect_votes(client, topic, transcript)
-
-        result = consensus_engine.resolve(votes, method="majority")
-
-        if result == "No Clear Winner":
+        if method in RANKED_METHODS:
+            votes = consensus_engine.collect_ballots(client, topic, transcript, context=debate.context)
+            invalid = [v["agent"] for v in votes if not v["valid"]]
+            if invalid:
+                st.warning(f"Invalid ballots (not counted): {', '.join(invalid)}")
+        else:
+            votes = consensus_engine.collect_votes(client, topic, transcript, context=debate.context)
+
+        # Charts render in the background while the decision is resolved
+        analysis.set_votes(votes)
+        figures = analysis.render()
+
+        result = consensus_engine.resolve(votes, method=method)
+
+        judge_invoked = result == "No Clear Winner"
+        if judge_invoked:
             judge = JudgeAgent(client)
             result = judge.adversarial_decision(topic, transcript, votes)
             st.warning("⚖️ Judge Decision Invoked")
@@ -106,6 +181,10 @@ def main():
                 winner_role = a.role
                 break
         st.success(f"🏆 Final Decision: {result} ({winner_role})")
+        metrics = client.metrics()
+        st.caption(f"LLM calls: {metrics['requests']} • retries: {metrics['retries']} • "
+                   f"throttled: {metrics['throttle_wait_seconds']:.1f}s"
+                   + (f" • cache hit rate: {metrics['cache_hit_rate']:.0%}" if use_cache else ""))
 
         # ----------------------------
         # Save & Download
@@ -113,22 +192,29 @@ def main():
         output = {
             "topic": topic,
             "timestamp": datetime.datetime.utcnow().isoformat(),
-            "agents": [{ "name": a.name, "role": a.role } for a in agents],
+            "agents": [{"name": a.name, "role": a.role, "persona": a.persona, "stance": a.stance} for a in agents],
             "transcript": transcript,
             "votes": votes,
+            "method": method,
+            "judge_invoked": judge_invoked,
             "final_decision": f"{result} ({winner_role})"
         }
-        Utils.save_json(output, f"echomind_session_{int(time.time())}.json")
+        session_id = f"echomind_session_{int(time.time())}"
+        Utils.save_json(output, f"{session_id}.json")
+        get_session_stats().record(output, session_id)
         st.download_button("⬇ Download Transcript", data=json.dumps(output, indent=2), file_name="debate.json")
 
         # ----------------------------
         # Analysis
         # ----------------------------
         st.subheader("📊 Debate Analysis")
-        AnalysisTools.plot_vote_distribution(votes)
-        AnalysisTools.plot_influence_graph(transcript)
-        AnalysisTools.analyze_coalitions(votes)
-        AnalysisTools.agent_influence(transcript)
+        AnalysisTools.show(analysis, figures)
+        st.session_state["analysis"] = analysis
+
+    elif "analysis" in st.session_state:
+        # Reruns (any widget change) redraw the last debate's analysis from the memoised charts
+        st.subheader("📊 Debate Analysis (last debate)")
+        AnalysisTools.show(st.session_state["analysis"])
 
 
 if __name__ == "__main__":
@@ -1,20 +1,8 @@
-import json
-from backend.memory import MemoryManager
-# import time
-# import openai
-
-# def safe_completion(client, **kwargs):
-#     """Call OpenAI with retries on rate-limit errors."""
-#     for attempt in range(5):
-#         try:
-#             return client.chat.completions.create(**kwargs)
-#         except openai.RateLimitError as e:
-#             wait = 2 ** attempt
-#             print(f"Rate limit hit. Retrying in {wait}s...")
-#             time.sleep(wait)
-#         except Exception as e:
-#             raise e
-#     raise RuntimeError("Failed after retries due to repeated rate-limit errors.")
+import os
+
+from backend.memory import get_memory_manager
+from backend.llm_client import chat_completion, chat_completion_stream
+from backend.context import DEFAULT_CONTEXT_TOKENS, TranscriptContext, truncate_tokens
 
 ROLE_CONFIG = {
     "Leader": {"self": 0.6, "others": 0.4},
@@ -31,45 +19,107 @@ ROLE_CONFIG = {
 
 
 class Agent:
-    def __init__(self, name, role, stance="neutral", persona="factual", model="mistral-small"):
+    def __init__(self, name, role, stance="neutral", persona="factual", model="mistral-small",
+                 context_tokens=DEFAULT_CONTEXT_TOKENS, memory_tokens=300, memory_key=None,
+                 persist_memory=True):
         self.name = name
         self.role = role
         self.stance = stance
         self.persona = persona
         self.model = model
+        # Hard prompt budgets: debate-so-far window and recalled/past arguments
+        self.context_tokens = context_tokens
+        self.memory_tokens = memory_tokens
         self.history = []   # short-term (within debate)
         self.memory = []    # long-term (across debates)
-        self.memory_manager = MemoryManager(use_vector_db=False)  # optional vector DB later
+        # Long-term store entry the memories live under (default: the agent's name),
+        # and whether spoken arguments are written there at all
+        self.memory_key = memory_key or name
+        self.persist_memory = persist_memory
+        # Shared, process-wide manager resolved on first memory access
+        self._memory_manager = None
+
+    @property
+    def memory_manager(self):
+        if self._memory_manager is None:
+            # ECHOMIND_MEMORY_BACKEND=faiss switches recall to the local FAISS index;
+            # ECHOMIND_MEMORY_MAX_ENTRIES opts in to pruning each agent's memories to a cap
+            backend = os.environ.get("ECHOMIND_MEMORY_BACKEND", "tfidf").lower()
+            max_entries = int(os.environ.get("ECHOMIND_MEMORY_MAX_ENTRIES", 0)) or None
+            self._memory_manager = get_memory_manager(use_vector_db=backend == "faiss", db_type="faiss",
+                                                      max_entries=max_entries)
+        return self._memory_manager
+
+    @memory_manager.setter
+    def memory_manager(self, manager):
+        self._memory_manager = manager
 
     def add_memory(self, text: str):
         """Store experience in both short-term and long-term memory."""
         self.history.append(text)
         self.memory.append(text)
-        self.memory_manager.save(self.name, text)
+        if self.persist_memory:
+            self.memory_manager.save(self.memory_key, text)
 
     def recall(self, query: str, top_k=3):
         """Retrieve relevant long-term memories."""
-        return self.memory_manager.retrieve(self.name, query, top_k=top_k)
+        return self.memory_manager.retrieve(self.memory_key, query, top_k=top_k)
 
-    def speak(self, client, topic, transcript, memory_enabled=True):
+    def speak(self, client, topic, transcript, memory_enabled=True, context=None):
         """
         Generate an argument using stance, persona, and role influence.
+        context is the engine's shared TranscriptContext (or its rendered text);
+        without one, a window over the last 5 turns is built here.
+        """
+        resp = chat_completion(client,
+            model=self.model,
+            messages=self._messages(topic, transcript, memory_enabled, context),
+            max_tokens=300,
+            cache=False  # debate turns should stay fresh; only replays of votes/judging are cached
+        )
+        text = resp.choices[0].message.content.strip()
+
+        # Save to memory
+        self.add_memory(text)
+
+        return text
+
+    def speak_stream(self, client, topic, transcript, memory_enabled=True, context=None):
         """
+        Same as speak, but yields the argument's text deltas as the provider
+        streams them; the full text is saved to memory once the stream ends.
+        """
+        chunks = []
+        for delta in chat_completion_stream(client,
+                                            model=self.model,
+                                            messages=self._messages(topic, transcript, memory_enabled, context),
+                                            max_tokens=300):
+            chunks.append(delta)
+            yield delta
+        self.add_memory("".join(chunks).strip())
+
+    def _messages(self, topic, transcript, memory_enabled, context):
         # Role weighting
         weights = ROLE_CONFIG.get(self.role, {"self": 0.5, "others": 0.5})
 
-        # Transcript context (last 5 turns)
-        others_context = "\n".join(
-            [f"{t['agent']} ({t['role']}): {t['text']}" for t in transcript[-5:]]
-        )
-        self_context = f"My past arguments: {self.history[-2:]}" if self.history else ""
+        # Transcript context (token-budgeted rolling window)
+        if context is None:
+            context = TranscriptContext.from_transcript(transcript[-5:], max_tokens=self.context_tokens)
+        others_context = str(context)
+
+        self_context = ""
+        if self.history:
+            past = "\n".join(f"- {truncate_tokens(h, self.memory_tokens // 2)}" for h in self.history[-2:])
+            self_context = f"My past arguments:\n{past}"
 
         # Add memory context if enabled
         mem_context = ""
         if memory_enabled:
             recalled = self.recall(topic, top_k=2)
             if recalled:
-                mem_context = f"Relevant memories: {json.dumps(recalled, indent=2)}"
+                per_memory = self.memory_tokens // len(recalled)
+                mem_context = "Relevant memories:\n" + "\n".join(
+                    f"- {truncate_tokens(m, per_memory)}" for m in recalled)
 
         # Build debate prompt
         prompt = f"""
@@ -88,18 +138,7 @@ class Agent:
         Respond concisely with your next argument, keeping role and persona in mind.
         """
 
-        # Call LLM API
-        resp = client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": "You are an AI debate agent."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=300
-        )
-        text = resp.choices[0].message.content.strip()
-
-        # Save to memory
-        self.add_memory(text)
-
-        return text
+        return [
+            {"role": "system", "content": "You are an AI debate agent."},
+            {"role": "user", "content": prompt}
+        ]
@@ -1,84 +1,340 @@
-import matplotlib.pyplot as plt
-import networkx as nx
-import streamlit as st
-from collections import defaultdict, Counter
+import io
+import hashlib
+import threading
+from collections import OrderedDict, defaultdict, Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backend.influence import InfluenceBuilder, InfluenceGraph
+
+# Influence graphs, layouts and rendered charts, keyed by transcript / vote hash,
+# shared across Streamlit reruns and sessions in this process
+_MEMO_SIZE = 256
+
+
+def _plotting():
+    """matplotlib, networkx and streamlit are only needed once a chart is drawn."""
+    import matplotlib.pyplot as plt
+    import networkx as nx
+    import streamlit as st
+    return plt, nx, st
+
+
+class _Memo:
+    """Small thread-safe LRU of computed values."""
+
+    def __init__(self, maxsize: int = _MEMO_SIZE):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def peek(self, key: Tuple) -> Any:
+        with self._lock:
+            return self._data.get(key)
+
+    def get(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return value
+
+
+_memo = _Memo()
+_renderer: Optional[ThreadPoolExecutor] = None
+_renderer_lock = threading.Lock()
+
+
+def _render_pool() -> ThreadPoolExecutor:
+    """One background thread draws charts (matplotlib is not thread-safe across figures being drawn)."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="echomind-analysis")
+        return _renderer
+
+
+class DebateAnalysis:
+    """
+    Analysis state maintained as the debate streams in.
+
+    add_turn() records the turn, speaker counts and a running transcript
+    hash in O(1); set_votes() records vote counts and coalitions. The
+    semantic influence graph (backend.influence: which earlier arguments
+    each turn takes up, PageRank/HITS over agents) is kept by an
+    InfluenceBuilder, created on first use so importing this module does
+    not pull in numpy/scipy/sklearn; from then on add_turn() links each
+    new turn to the earlier ones as it arrives, and influence() only
+    rescores the edges. Graphs, layouts and the rendered PNG charts are
+    memoised per transcript (or vote) hash, so a rerun over the same
+    debate costs nothing, and render() computes and draws them on a
+    background thread, returning futures.
+    """
+
+    def __init__(self):
+        self.turns = 0
+        self.transcript: List[Dict[str, Any]] = []
+        self.speakers: Counter = Counter()
+        self.vote_counts: Counter = Counter()
+        self.coalitions: Dict[str, List[str]] = {}
+        self._hash = hashlib.blake2b(digest_size=16)
+        self._votes_key = ""
+        self._builder: Optional["InfluenceBuilder"] = None
+        self._builder_lock = threading.Lock()
+
+    @classmethod
+    def from_transcript(cls, transcript, votes=None) -> "DebateAnalysis":
+        analysis = cls()
+        analysis.extend(transcript)
+        if votes is not None:
+            analysis.set_votes(votes)
+        return analysis
+
+    # -------------------------
+    # Incremental updates
+    # -------------------------
+    def add_turn(self, turn: Dict[str, Any]) -> None:
+        agent = turn["agent"]
+        self.transcript.append({"agent": agent, "text": turn.get("text", ""), "round": turn.get("round", 0)})
+        self.speakers[agent] += 1
+        self.turns += 1
+        self._hash.update(f"{agent}\x00{turn.get('text', '')}\x1e".encode("utf-8"))
+        if self._builder is not None:
+            self._builder.sync(self.transcript)
+
+    def extend(self, turns) -> None:
+        for turn in turns:
+            self.add_turn(turn)
+
+    def set_votes(self, votes) -> None:
+        """Vote counts and coalitions (choice -> voters); ballots without a vote are left out."""
+        self.vote_counts = Counter(v["vote"] for v in votes if v.get("vote"))
+        coalitions = defaultdict(list)
+        for v in votes:
+            if v.get("vote"):
+                coalitions[v["vote"]].append(v["agent"])
+        self.coalitions = dict(coalitions)
+        self._votes_key = hashlib.blake2b(repr(sorted((c, tuple(m)) for c, m in self.coalitions.items()))
+                                          .encode("utf-8"), digest_size=16).hexdigest()
+
+    @property
+    def transcript_key(self) -> str:
+        return self._hash.hexdigest()
+
+    @property
+    def votes_key(self) -> str:
+        return self._votes_key
+
+    # -------------------------
+    # Memoised metrics
+    # -------------------------
+    def influence(self) -> "InfluenceGraph":
+        """Semantic influence graph of the transcript so far."""
+        n = self.turns
+        return _influence(self.transcript_key, lambda: self._influence_builder().graph(n))
+
+    def _influence_builder(self) -> "InfluenceBuilder":
+        # Embedding turns needs numpy/scipy/sklearn: imported on first use,
+        # then add_turn() keeps the builder in step with the transcript
+        with self._builder_lock:
+            if self._builder is None:
+                from backend.influence import InfluenceBuilder
+
+                builder = InfluenceBuilder()
+                builder.sync(self.transcript)
+                self._builder = builder
+            return self._builder
+
+    def influence_layout(self) -> Dict[str, Tuple[float, float]]:
+        graph = self.influence()
+        return _layout(self.transcript_key, graph.agent_edges, True, graph.agents)
+
+    def coalition_layout(self) -> Dict[str, Tuple[float, float]]:
+        return _layout(self.votes_key, self._coalition_edges(), directed=False)
+
+    def _coalition_edges(self) -> Dict[Tuple[str, str], int]:
+        return {(m, choice): 1 for choice, members in self.coalitions.items() for m in members}
+
+    # -------------------------
+    # Rendering (background thread)
+    # -------------------------
+    def render(self, names=None) -> Dict[str, Future]:
+        """
+        Start drawing the charts (default: votes, influence, coalitions and
+        centrality, i.e. PageRank) as PNG bytes; returns {name: Future}.
+        Charts already drawn for the same transcript / votes come back
+        completed. The current state is snapshotted, so later add_turn()
+        calls are safe.
+        """
+        t_key, v_key, n = self.transcript_key, self.votes_key, self.turns
+        coalition_edges, votes = self._coalition_edges(), dict(self.vote_counts)
+
+        def influence_graph():
+            return _influence(t_key, lambda: self._influence_builder().graph(n))
+
+        def influence_png():
+            graph = influence_graph()
+            pos = _layout(t_key, graph.agent_edges, True, graph.agents)
+            return _graph_png(graph.agent_edges, pos, True, "lightblue",
+                              [600 + 3000 * graph.pagerank.get(a, 0.0) for a in graph.agents], nodes=graph.agents)
+
+        def pagerank_png():
+            return _bar_png(dict(influence_graph().ranking()), "Agent Influence (PageRank)", "Score",
+                            "orange")
+
+        jobs = {
+            "votes": (("votes_png", v_key),
+                      lambda: _bar_png(votes, "Vote Distribution", "Count", "skyblue")),
+            "influence": (("influence_png", t_key), influence_png),
+            "coalitions": (("coalitions_png", v_key),
+                           lambda: _graph_png(coalition_edges, _layout(v_key, coalition_edges, False), False,
+                                              "lightgreen", 1200)),
+            "centrality": (("pagerank_png", t_key), pagerank_png),
+        }
+        futures = {}
+        for name in names or jobs:
+            key, draw = jobs[name]
+            png = _memo.peek(key)
+            if png is None:
+                futures[name] = _render_pool().submit(_memo.get, key, draw)
+            else:
+                futures[name] = Future()
+                futures[name].set_result(png)
+        return futures
+
+
+def _influence(key, compute: Callable[[], "InfluenceGraph"]) -> "InfluenceGraph":
+    return _memo.get(("influence", key), compute)
+
+
+def _graph(edges, directed, nodes=()):
+    import networkx as nx
+
+    G = nx.DiGraph() if directed else nx.Graph()
+    G.add_nodes_from(nodes)
+    G.add_edges_from(edges)
+    return G
+
+
+def _layout(key, edges, directed, nodes=()):
+    return _memo.get(("layout", directed, key), lambda: _spring_layout(edges, directed, nodes))
+
+
+def _spring_layout(edges, directed, nodes=()):
+    import networkx as nx
+
+    pos = nx.spring_layout(_graph(edges, directed, nodes), seed=42)
+    return {node: (float(x), float(y)) for node, (x, y) in pos.items()}
+
+
+def _figure(figsize=None):
+    # Figure objects, not pyplot, so drawing is safe off the main thread
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots()
+
+
+def _png(fig) -> bytes:
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png")
+    return buf.getvalue()
+
+
+def _bar_png(values: Dict[str, float], title, ylabel, color) -> bytes:
+    fig, ax = _figure()
+    ax.bar(list(values.keys()), list(values.values()), color=color)
+    ax.set_title(title)
+    ax.set_ylabel(ylabel)
+    return _png(fig)
+
+
+def _graph_png(edges, pos, directed, color, node_size, nodes=()) -> bytes:
+    """edges may map to weights (edge width follows weight); node_size may be per node, in nodes order."""
+    import networkx as nx
+
+    fig, ax = _figure(figsize=(6, 4))
+    G = _graph(edges, directed, nodes)
+    weights = [edges.get(e, edges.get(e[::-1], 1)) for e in G.edges] if isinstance(edges, dict) and edges else None
+    width = [1 + 3 * w / max(weights) for w in weights] if weights else 1.0
+    nx.draw(G, pos, with_labels=True, node_color=color, node_size=node_size,
+            font_size=10, ax=ax, edge_color="gray", width=width)
+    return _png(fig)
 
 
 class AnalysisTools:
+    # -------------------------
+    # Streamlit rendering of a DebateAnalysis
+    # -------------------------
+    @staticmethod
+    def show(analysis, figures=None):
+        """Write every chart and metric; figures is render()'s result if already started."""
+        _, _, st = _plotting()
+        figures = figures or analysis.render()
+        st.image(figures["votes"].result())
+        st.image(figures["influence"].result())
+
+        st.subheader("🤝 Coalition Dynamics")
+        for choice, members in analysis.coalitions.items():
+            st.write(f"**{choice}**: {', '.join(members)}")
+        st.image(figures["coalitions"].result())
+
+        st.image(figures["centrality"].result())
+        AnalysisTools._influence_metrics(st, analysis.influence())
+
+    @staticmethod
+    def _influence_metrics(st, graph):
+        st.subheader("📊 Agent Influence Metrics")
+        st.caption("PageRank / authority: how much others take up an agent's arguments; "
+                   "hub: how much an agent builds on influential ones.")
+        for agent, score in graph.ranking():
+            st.write(f"**{agent}**: PageRank {score:.2f} • authority {graph.authorities[agent]:.2f} • "
+                     f"hub {graph.hubs[agent]:.2f}")
+
     # -------------------------
     # Vote Distribution
     # -------------------------
     @staticmethod
     def plot_vote_distribution(votes):
-        counts = Counter([v["vote"] for v in votes])
-        fig, ax = plt.subplots()
-        ax.bar(list(counts.keys()), list(counts.values()), color="skyblue")
-        ax.set_title("Vote Distribution")
-        ax.set_ylabel("Count")
-        st.pyplot(fig)
+        _, _, st = _plotting()
+        st.image(DebateAnalysis.from_transcript([], votes).render(["votes"])["votes"].result())
 
     # -------------------------
     # Debate Flow Graph
     # -------------------------
     @staticmethod
     def plot_influence_graph(transcript):
-        G = nx.DiGraph()
-
-        for i in range(1, len(transcript)):
-            prev_agent = transcript[i - 1]["agent"]
-            curr_agent = transcript[i]["agent"]
-            G.add_edge(prev_agent, curr_agent)
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        pos = nx.spring_layout(G, seed=42)
-        nx.draw(G, pos, with_labels=True, node_color="lightblue", node_size=1500, font_size=10, ax=ax, edge_color="gray")
-        st.pyplot(fig)
+        _, _, st = _plotting()
+        st.image(DebateAnalysis.from_transcript(transcript).render(["influence"])["influence"].result())
 
     # -------------------------
     # Coalition Dynamics
     # -------------------------
     @staticmethod
     def analyze_coalitions(votes):
-        coalitions = defaultdict(list)
-        for v in votes:
-            coalitions[v["vote"]].append(v["agent"])
-
+        _, _, st = _plotting()
+        analysis = DebateAnalysis.from_transcript([], votes)
         st.subheader("🤝 Coalition Dynamics")
-        for choice, members in coalitions.items():
+        for choice, members in analysis.coalitions.items():
             st.write(f"**{choice}**: {', '.join(members)}")
-
-        # Visualize as bipartite graph
-        G = nx.Graph()
-        for choice, members in coalitions.items():
-            for m in members:
-                G.add_edge(m, choice)
-
-        fig, ax = plt.subplots(figsize=(6, 4))
-        pos = nx.spring_layout(G, seed=42)
-        nx.draw(G, pos, with_labels=True, node_color="lightgreen", node_size=1200, font_size=10, ax=ax)
-        st.pyplot(fig)
+        st.image(analysis.render(["coalitions"])["coalitions"].result())
 
     # -------------------------
     # Agent Influence Metrics
     # -------------------------
     @staticmethod
     def agent_influence(transcript):
-        G = nx.DiGraph()
-        for i in range(1, len(transcript)):
-            prev_agent = transcript[i - 1]["agent"]
-            curr_agent = transcript[i]["agent"]
-            G.add_edge(prev_agent, curr_agent)
-
-        centrality = nx.degree_centrality(G)
-        sorted_centrality = sorted(centrality.items(), key=lambda x: x[1], reverse=True)
-
-        st.subheader("📊 Agent Influence Metrics")
-        for agent, score in sorted_centrality:
-            st.write(f"**{agent}**: {score:.2f}")
-
-        # Plot centrality scores
-        fig, ax = plt.subplots()
-        ax.bar([a for a, _ in sorted_centrality], [s for _, s in sorted_centrality], color="orange")
-        ax.set_title("Agent Influence (Centrality)")
-        ax.set_ylabel("Score")
-        st.pyplot(fig)
+        _, _, st = _plotting()
+        analysis = DebateAnalysis.from_transcript(transcript)
+        AnalysisTools._influence_metrics(st, analysis.influence())
+        st.image(analysis.render(["centrality"])["centrality"].result())
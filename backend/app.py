@@ -1,43 +1,109 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 from backend.agent import Agent
-from backend.debate_engine import DebateEngine
-from backend.consensus import ConsensusEngine
-from backend.judge import JudgeAgent
+from backend.jobs import JobScheduler
+from backend.pipeline import run_pipeline
+from backend.llm_client import get_llm_client
 
-from openai import OpenAI
-import datetime
+from functools import lru_cache
+import json
+import os
+
+MISTRAL_BASE_URL = "https://api.mistral.ai/v1"
 
 app = FastAPI(title="EchoMind Backend API")
 
+# Debates running at once per server; further jobs queue
+scheduler = JobScheduler(max_concurrent=int(os.environ.get("ECHOMIND_MAX_DEBATES", "8")))
+
+
+class DebateRequest(BaseModel):
+    api_key: str
+    topic: str
+    num_agents: int = 3
+    rounds: int = 3
+    simultaneous: bool = False
+    max_concurrency: int = 4
+    method: str = "majority"
+    early_stop: bool = False
+
+
+@lru_cache(maxsize=64)
+def _client(api_key: str):
+    """One rate-limited client per API key, reused across requests."""
+    from openai import OpenAI
+
+    # LLMClient does the retrying; SDK retries would multiply its attempts
+    return get_llm_client(OpenAI(api_key=api_key, base_url=MISTRAL_BASE_URL, max_retries=0))
+
+
+def _pipeline(req: DebateRequest):
+    # Create default agents
+    agents = [Agent(name=f"Agent_{i+1}", role="Civilian") for i in range(req.num_agents)]
+    return run_pipeline(_client(req.api_key), req.topic, agents, rounds=req.rounds,
+                        simultaneous=req.simultaneous, max_concurrency=req.max_concurrency,
+                        method=req.method, early_stop=req.early_stop)
+
 
 @app.get("/")
 def root():
-    return {"status": "EchoMind Backend is running"}
+    return {"status": "EchoMind Backend is running", "jobs": scheduler.stats()}
 
 
 @app.post("/debate")
-def run_debate(api_key: str, topic: str, num_agents: int = 3, rounds: int = 3):
-    client = OpenAI(api_key=api_key, base_url="https://api.mistral.ai/v1")
+def run_debate(api_key: str, topic: str, num_agents: int = 3, rounds: int = 3,
+               simultaneous: bool = False, max_concurrency: int = 4, method: str = "majority",
+               early_stop: bool = False):
+    """Blocking run of the whole pipeline (kept for ui.py and simple scripts)."""
+    req = DebateRequest(api_key=api_key, topic=topic, num_agents=num_agents, rounds=rounds,
+                        simultaneous=simultaneous, max_concurrency=max_concurrency, method=method,
+                        early_stop=early_stop)
+    for event, data in _pipeline(req):
+        if event == "result":
+            # Return JSON response (no Streamlit here)
+            return data
 
-    # Create default agents
-    agents = [Agent(name=f"Agent_{i+1}", role="Civilian") for i in range(num_agents)]
-    debate = DebateEngine(agents, client, rounds=rounds)
-    transcript = debate.run(topic)
-
-    # Voting
-    consensus = ConsensusEngine(agents)
-    votes = consensus.collect_votes(client, topic, transcript)
-    result = consensus.resolve(votes)
-
-    if result == "No Clear Winner":
-        judge = JudgeAgent(client)
-        result = judge.adversarial_decision(topic, transcript, votes)
-
-    # Return JSON response (no Streamlit here)
-    return {
-        "topic": topic,
-        "timestamp": datetime.datetime.utcnow().isoformat(),
-        "transcript": transcript,
-        "votes": votes,
-        "final_decision": result
-    }
+
+# -------------------------
+# Async job API
+# -------------------------
+@app.post("/debates", status_code=202)
+async def create_debate(req: DebateRequest):
+    params = req.model_dump(exclude={"api_key"})
+    job = scheduler.submit(params, lambda: _pipeline(req), turns_total=req.num_agents * req.rounds)
+    return {"job_id": job.id, "status": job.state,
+            "status_url": f"/debates/{job.id}", "events_url": f"/debates/{job.id}/events"}
+
+
+@app.get("/debates/{job_id}")
+async def debate_status(job_id: str):
+    return _job(job_id).status_dict()
+
+
+@app.get("/debates/{job_id}/events")
+async def debate_events(job_id: str, request: Request):
+    """Server-Sent Events: turn / votes / decision as they happen, then done (or error)."""
+    job = _job(job_id)
+    last_id = request.headers.get("last-event-id")
+    cursor = int(last_id) + 1 if last_id and last_id.isdigit() else 0
+
+    async def stream():
+        async for item in job.follow(cursor):
+            if await request.is_disconnected():
+                return
+            if item is None:
+                yield ": keep-alive\n\n"
+                continue
+            index, event, data = item
+            yield f"id: {index}\nevent: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _job(job_id: str):
+    job = scheduler.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown debate job")
+    return job
@@ -0,0 +1,387 @@
+"""
+Columnar archive of debate sessions, built from the JSON files in exports/.
+
+    python -m backend.archive ingest                 # convert new exports
+    python -m backend.archive query win-rate --since 2025-09-01
+    python -m backend.archive compact
+
+Three Parquet datasets under exports/archive/, one row each per
+session, turn and vote, hive-partitioned by month and sorted by timestamp:
+
+- sessions: session_id, source, timestamp, topic, method, n_agents,
+  n_turns, n_votes, winner, winner_role, judge_invoked, final_decision
+- turns: session_id, timestamp, topic, turn_index, round, agent, role,
+  n_words, text
+- votes: session_id, timestamp, topic, agent, role, vote, vote_role,
+  valid, for_winner, text
+
+topic and timestamp are repeated on every row so filters never need a join.
+Queries read only the columns they use and push time / topic filters
+down to the partition directories and row-group statistics, so the text
+columns and out-of-range months are never read.
+
+Ingestion is incremental: a manifest records every export already
+converted (by name, size and mtime), each run writes its new rows as one
+part file per month, and compact() merges the parts. An export that
+changed since it was converted replaces its session: the part files
+holding its old rows are rewritten without them first. rebuild()
+re-converts everything from scratch.
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from backend.sessions import decision_name, judge_invoked, participants, resolve_agent, session_timestamp
+from backend.utils import UTILS_DIR
+
+ARCHIVE_DIR = os.path.join(UTILS_DIR, "archive")
+EXPORT_PATTERNS = ("echomind_session_*.json", "log_*.json")
+TABLES = ("sessions", "turns", "votes")
+
+_TS = pa.timestamp("us")
+SCHEMAS = {
+    "sessions": pa.schema([
+        ("session_id", pa.string()), ("source", pa.string()), ("timestamp", _TS), ("topic", pa.string()),
+        ("method", pa.string()), ("n_agents", pa.int32()), ("n_turns", pa.int32()), ("n_votes", pa.int32()),
+        ("winner", pa.string()), ("winner_role", pa.string()), ("judge_invoked", pa.bool_()),
+        ("final_decision", pa.string()),
+    ]),
+    "turns": pa.schema([
+        ("session_id", pa.string()), ("timestamp", _TS), ("topic", pa.string()), ("turn_index", pa.int32()),
+        ("round", pa.int32()), ("agent", pa.string()), ("role", pa.string()), ("n_words", pa.int32()),
+        ("text", pa.string()),
+    ]),
+    "votes": pa.schema([
+        ("session_id", pa.string()), ("timestamp", _TS), ("topic", pa.string()), ("agent", pa.string()),
+        ("role", pa.string()), ("vote", pa.string()), ("vote_role", pa.string()), ("valid", pa.bool_()),
+        ("for_winner", pa.bool_()), ("text", pa.string()),
+    ]),
+}
+
+# Rows per Parquet row group: small enough for statistics to skip most of a
+# part on a narrow time filter, large enough to keep per-group overhead low
+ROW_GROUP_SIZE = 16384
+
+
+def session_rows(data: Dict[str, Any], path: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Flatten one export (App session file, /debate payload or Utils.log_session log) into rows per table."""
+    session_id = os.path.splitext(os.path.basename(path))[0]
+    ts = session_timestamp(data, path)
+    topic = str(data.get("topic", ""))
+    transcript = data.get("transcript") if isinstance(data.get("transcript"), list) else []
+    votes = data.get("votes") or []
+    roles = {name: p["role"] for name, p in participants(data).items()}
+
+    decision = str(data.get("final_decision", ""))
+    winner = resolve_agent(decision_name(decision), roles)
+    judge = judge_invoked(data)
+
+    turns = [{
+        "session_id": session_id, "timestamp": ts, "topic": topic, "turn_index": i,
+        "round": int(t.get("round") or 0), "agent": t["agent"], "role": t.get("role") or roles.get(t["agent"]),
+        "n_words": len(str(t.get("text", "")).split()), "text": str(t.get("text", "")),
+    } for i, t in enumerate(transcript)]
+    vote_rows = []
+    for v in votes:
+        choice = resolve_agent(v.get("vote"), roles)
+        vote_rows.append({
+            "session_id": session_id, "timestamp": ts, "topic": topic, "agent": v["agent"],
+            "role": roles.get(v["agent"]), "vote": choice, "vote_role": roles.get(choice) if choice else None,
+            "valid": choice is not None and v.get("valid", True) is not False,
+            "for_winner": choice is not None and choice == winner, "text": str(v.get("text", "")),
+        })
+    session = {
+        "session_id": session_id, "source": os.path.basename(path), "timestamp": ts, "topic": topic,
+        "method": data.get("method"), "n_agents": len(roles),
+        "n_turns": len(transcript) if transcript else int(data.get("transcript_len") or 0),
+        "n_votes": len(votes), "winner": winner, "winner_role": roles.get(winner) if winner else None,
+        "judge_invoked": bool(judge), "final_decision": decision,
+    }
+    return {"sessions": [session], "turns": turns, "votes": vote_rows}
+
+
+class SessionArchive:
+    """
+    Parquet archive of debate sessions plus aggregate queries over it.
+
+    One writer at a time (ingest / compact / rebuild hold a lock); any number
+    of readers, since part files are only ever added or atomically replaced.
+    """
+
+    def __init__(self, root: str = ARCHIVE_DIR, exports_dir: str = UTILS_DIR):
+        self.root = root
+        self.exports_dir = exports_dir
+        self._manifest_path = os.path.join(root, "_manifest.json")
+        self._lock = threading.Lock()
+
+    # -------------------------
+    # Ingestion
+    # -------------------------
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self._manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"files": {}, "next_part": 0}
+
+    def _save_manifest(self, manifest: Dict[str, Any]) -> None:
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._manifest_path)
+
+    def pending(self, paths: Optional[Iterable[str]] = None) -> List[str]:
+        """Exports not yet in the archive (or changed since they were converted)."""
+        files = self._load_manifest()["files"]
+        if paths is None:
+            paths = [p for pattern in EXPORT_PATTERNS for p in glob.glob(os.path.join(self.exports_dir, pattern))]
+        out = []
+        for path in sorted(paths):
+            st = os.stat(path)
+            seen = files.get(os.path.basename(path))
+            if seen is None or seen != [st.st_size, st.st_mtime_ns]:
+                out.append(path)
+        return out
+
+    def ingest(self, paths: Optional[Iterable[str]] = None) -> int:
+        """Convert new or changed exports (default: every export in exports_dir); returns sessions written."""
+        with self._lock:
+            manifest = self._load_manifest()
+            todo = self.pending(paths)
+            changed = {os.path.splitext(os.path.basename(p))[0] for p in todo
+                       if os.path.basename(p) in manifest["files"]}
+            if changed:
+                self._drop_sessions(changed)
+            rows: Dict[str, List[Dict[str, Any]]] = {t: [] for t in TABLES}
+            for path in todo:
+                with open(path, encoding="utf-8") as f:
+                    try:
+                        data = json.load(f)
+                    except json.JSONDecodeError:
+                        continue
+                if not isinstance(data, dict):
+                    continue
+                for table, table_rows in session_rows(data, path).items():
+                    rows[table].extend(table_rows)
+            if rows["sessions"]:
+                part = manifest["next_part"]
+                for table in TABLES:
+                    self._write(table, rows[table], f"part-{part:05d}.parquet")
+                manifest["next_part"] = part + 1
+            for path in todo:
+                st = os.stat(path)
+                manifest["files"][os.path.basename(path)] = [st.st_size, st.st_mtime_ns]
+            if todo:
+                os.makedirs(self.root, exist_ok=True)
+                self._save_manifest(manifest)
+            return len(rows["sessions"])
+
+    def _drop_sessions(self, session_ids) -> None:
+        """Rewrite every part file holding rows of session_ids without them (removing it if emptied)."""
+        wanted = pa.array(sorted(session_ids), pa.string())
+        for table in TABLES:
+            for path in glob.glob(os.path.join(self.root, table, "month=*", "*.parquet")):
+                ids = pq.read_table(path, columns=["session_id"])["session_id"]
+                if not pc.any(pc.is_in(ids, value_set=wanted)).as_py():
+                    continue
+                data = pq.read_table(path, schema=SCHEMAS[table])
+                kept = data.filter(pc.invert(pc.is_in(data["session_id"], value_set=wanted)))
+                if not kept.num_rows:
+                    os.remove(path)
+                    continue
+                pq.write_table(kept, path + ".tmp", row_group_size=ROW_GROUP_SIZE, compression="zstd")
+                os.replace(path + ".tmp", path)
+
+    def _write(self, table: str, rows: List[Dict[str, Any]], name: str) -> None:
+        if not rows:
+            return
+        data = pa.Table.from_pylist(rows, schema=SCHEMAS[table]).sort_by("timestamp")
+        self._write_table(table, data, name)
+
+    def _write_table(self, table: str, data: pa.Table, name: str) -> None:
+        """One file per month partition, written to a temp name and renamed into place."""
+        months = pc.strftime(data["timestamp"], format="%Y-%m")
+        for month in pc.unique(months).to_pylist():
+            directory = os.path.join(self.root, table, f"month={month}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, name)
+            pq.write_table(data.filter(pc.equal(months, month)), path + ".tmp",
+                           row_group_size=ROW_GROUP_SIZE, compression="zstd")
+            os.replace(path + ".tmp", path)
+
+    def compact(self) -> None:
+        """Merge every month's part files into one, so scans open few files."""
+        with self._lock:
+            for table in TABLES:
+                for directory in glob.glob(os.path.join(self.root, table, "month=*")):
+                    parts = sorted(glob.glob(os.path.join(directory, "part-*.parquet")))
+                    if len(parts) < 2:
+                        continue
+                    merged = pa.concat_tables(pq.read_table(p, schema=SCHEMAS[table]) for p in parts)
+                    target = os.path.join(directory, "compacted.parquet.tmp")
+                    pq.write_table(merged.sort_by("timestamp"), target, row_group_size=ROW_GROUP_SIZE,
+                                   compression="zstd")
+                    # The merged file takes the first part's name, then the rest go; a
+                    # scan listing the directory in between may count those rows twice
+                    os.replace(target, parts[0])
+                    for p in parts[1:]:
+                        os.remove(p)
+
+    def rebuild(self) -> int:
+        """Drop the archive and re-convert every export."""
+        import shutil
+
+        with self._lock:
+            if os.path.isdir(self.root):
+                shutil.rmtree(self.root)
+        return self.ingest()
+
+    # -------------------------
+    # Scans
+    # -------------------------
+    def dataset(self, table: str) -> Optional[ds.Dataset]:
+        path = os.path.join(self.root, table)
+        if not glob.glob(os.path.join(path, "month=*", "*.parquet")):
+            return None
+        return ds.dataset(path, format="parquet", partitioning="hive", schema=_with_month(SCHEMAS[table]))
+
+    def scan(self, table: str, columns: Optional[Sequence[str]] = None, since=None, until=None,
+             topic: Optional[str] = None, filter: Optional[ds.Expression] = None) -> pd.DataFrame:
+        """
+        Rows of table as a DataFrame, reading only columns; since / until
+        (datetime or ISO string, until exclusive), topic (case-insensitive
+        substring) and any extra pyarrow filter are pushed into the scan.
+        """
+        dataset = self.dataset(table)
+        if dataset is None:
+            return pd.DataFrame(columns=list(columns or SCHEMAS[table].names))
+        expr = _where(since, until, topic, filter)
+        return dataset.to_table(columns=list(columns) if columns else SCHEMAS[table].names, filter=expr).to_pandas()
+
+    # -------------------------
+    # Aggregate queries
+    # -------------------------
+    def win_rate_by_role(self, **where) -> pd.DataFrame:
+        """Per role: sessions played (one per agent holding it), wins, win_rate, judge_wins."""
+        played = self.scan("votes", ["session_id", "agent", "role"], **where).drop_duplicates(["session_id", "agent"])
+        played = played.groupby("role").size().rename("played")
+        sessions = self.scan("sessions", ["winner_role", "judge_invoked"], **where)
+        wins = sessions.groupby("winner_role").agg(wins=("judge_invoked", "size"), judge_wins=("judge_invoked", "sum"))
+        out = pd.concat([played, wins], axis=1).fillna(0)
+        out.index.name = "role"
+        out = out.astype({"played": int, "wins": int, "judge_wins": int})
+        out["win_rate"] = out["wins"] / out["played"].where(out["played"] > 0)
+        return out.sort_values("win_rate", ascending=False)
+
+    def turns_per_topic(self, **where) -> pd.DataFrame:
+        """Per topic: sessions, turns, turns_per_session, words_per_turn."""
+        turns = self.scan("turns", ["session_id", "topic", "n_words"], **where)
+        out = turns.groupby("topic").agg(sessions=("session_id", "nunique"), turns=("n_words", "size"),
+                                         words_per_turn=("n_words", "mean"))
+        out["turns_per_session"] = out["turns"] / out["sessions"]
+        return out.sort_values("turns", ascending=False)
+
+    def vote_agreement(self, by: str = "session", **where) -> pd.DataFrame:
+        """
+        How often valid votes went to the eventual winner, grouped by
+        "session", "agent", "role" or "topic": votes, valid, for_winner and
+        agreement (for_winner / valid).
+        """
+        if by not in ("session", "agent", "role", "topic"):
+            raise ValueError('by must be "session", "agent", "role" or "topic"')
+        column = "session_id" if by == "session" else by
+        votes = self.scan("votes", [column, "valid", "for_winner"], **where)
+        out = votes.groupby(column).agg(votes=("valid", "size"), valid=("valid", "sum"),
+                                        for_winner=("for_winner", "sum"))
+        out["agreement"] = out["for_winner"] / out["valid"].where(out["valid"] > 0)
+        return out
+
+    def summary(self, **where) -> Dict[str, Any]:
+        sessions = self.scan("sessions", ["n_turns", "judge_invoked"], **where)
+        return {
+            "sessions": len(sessions),
+            "turns": int(sessions["n_turns"].sum()) if len(sessions) else 0,
+            "judge_rate": float(sessions["judge_invoked"].mean()) if len(sessions) else 0.0,
+        }
+
+
+def _with_month(schema: pa.Schema) -> pa.Schema:
+    return schema.append(pa.field("month", pa.string()))
+
+
+def _as_datetime(value) -> datetime.datetime:
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.replace(tzinfo=None)
+
+
+def _where(since=None, until=None, topic=None, extra=None) -> Optional[ds.Expression]:
+    """Filter expression; time bounds also compare the month partition so whole directories are skipped."""
+    parts = []
+    if since is not None:
+        since = _as_datetime(since)
+        parts += [ds.field("month") >= since.strftime("%Y-%m"), ds.field("timestamp") >= pa.scalar(since, _TS)]
+    if until is not None:
+        until = _as_datetime(until)
+        parts += [ds.field("month") <= until.strftime("%Y-%m"), ds.field("timestamp") < pa.scalar(until, _TS)]
+    if topic:
+        parts.append(pc.match_substring(ds.field("topic"), topic, ignore_case=True))
+    if extra is not None:
+        parts.append(extra)
+    if not parts:
+        return None
+    expr = parts[0]
+    for p in parts[1:]:
+        expr = expr & p
+    return expr
+
+
+QUERIES = {
+    "win-rate": lambda a, w: a.win_rate_by_role(**w),
+    "turns": lambda a, w: a.turns_per_topic(**w),
+    "agreement": lambda a, w: a.vote_agreement(**w),
+    "agreement-by-agent": lambda a, w: a.vote_agreement(by="agent", **w),
+    "agreement-by-role": lambda a, w: a.vote_agreement(by="role", **w),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    parser.add_argument("--exports", default=UTILS_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("ingest", help="convert exports not yet archived")
+    sub.add_parser("rebuild", help="re-convert every export")
+    sub.add_parser("compact", help="merge part files")
+    query = sub.add_parser("query")
+    query.add_argument("name", choices=sorted(QUERIES))
+    query.add_argument("--since")
+    query.add_argument("--until")
+    query.add_argument("--topic")
+    args = parser.parse_args()
+
+    archive = SessionArchive(args.root, args.exports)
+    if args.command == "ingest":
+        print(f"{archive.ingest()} session(s) converted")
+    elif args.command == "rebuild":
+        print(f"{archive.rebuild()} session(s) archived")
+    elif args.command == "compact":
+        archive.compact()
+    else:
+        where = {"since": args.since, "until": args.until, "topic": args.topic}
+        with pd.option_context("display.max_rows", 200, "display.width", 160):
+            print(QUERIES[args.name](archive, where))
+
+
+if __name__ == "__main__":
+    main()
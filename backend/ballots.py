@@ -0,0 +1,224 @@
+import re
+import json
+from collections import Counter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+# Pairwise matrix construction compares every candidate against every other
+# on every ballot; work through candidates in blocks so the boolean
+# temporaries stay around this many elements however large the election.
+_BLOCK_ELEMENTS = 4_000_000
+
+_JSON_OBJECT = re.compile(r"\{.*\}", re.DOTALL)
+_NAME_KEY = re.compile(r"[\W_]+", re.UNICODE)
+
+
+class BallotError(ValueError):
+    """A reply that cannot be read as a ranked ballot over the candidates."""
+
+
+def _name_key(name: str) -> str:
+    return _NAME_KEY.sub("", str(name)).lower()
+
+
+def parse_ranked_ballot(text: str, candidates: Sequence[str]) -> Dict[str, object]:
+    """
+    Read a {"ranking": [names, best first], "justification": ...} reply.
+
+    The JSON object may be wrapped in prose or a code fence. Names are matched
+    to candidates ignoring case, spacing and punctuation ("agent 2" ->
+    "Agent_2"); a ranking may leave candidates out (they tie for last), but
+    an unknown or repeated name, or no ranking at all, raises BallotError.
+    Returns {"ranking": [...], "justification": str}.
+    """
+    match = _JSON_OBJECT.search(text or "")
+    if match is None:
+        raise BallotError("no JSON object in reply")
+    try:
+        data = json.loads(match.group(0))
+    except json.JSONDecodeError as e:
+        raise BallotError(f"invalid JSON ({e.msg})") from None
+    ranking = data.get("ranking") if isinstance(data, dict) else None
+    if not isinstance(ranking, list) or not ranking:
+        raise BallotError('missing "ranking" list')
+
+    by_key = {_name_key(c): c for c in candidates}
+    names: List[str] = []
+    for raw in ranking:
+        name = by_key.get(_name_key(raw)) if isinstance(raw, str) else None
+        if name is None:
+            raise BallotError(f"unknown candidate {raw!r}")
+        if name in names:
+            raise BallotError(f"{name} ranked twice")
+        names.append(name)
+    return {"ranking": names, "justification": str(data.get("justification", "")).strip()}
+
+
+class BallotMatrix:
+    """
+    Ranked ballots as a dense (ballots x candidates) rank matrix.
+
+    ranks[b, c] is candidate c's position on ballot b (0 = first choice);
+    candidates a ballot leaves out share the last place, len(candidates).
+    Identical ballots can be folded into one row with a weight. Every tally
+    (plurality, Borda, the pairwise preference matrix, Condorcet, Schulze) is
+    computed with NumPy array operations over this matrix.
+
+    Candidates keep the order in which they first appear, and ties are
+    broken in that order, as Counter.most_common did for the loop versions.
+    """
+
+    def __init__(self, candidates: Sequence[str], ranks: np.ndarray, weights: Optional[np.ndarray] = None):
+        self.candidates = list(candidates)
+        self.ranks = np.asarray(ranks, dtype=np.int32).reshape(-1, len(self.candidates))
+        n = self.ranks.shape[0]
+        self.weights = np.ones(n, dtype=np.int64) if weights is None else np.asarray(weights, dtype=np.int64)
+        self._pairwise: Optional[np.ndarray] = None
+
+    @property
+    def n_ballots(self) -> int:
+        return int(self.weights.sum())
+
+    def __len__(self) -> int:
+        return self.ranks.shape[0]
+
+    # -------------------------
+    # Construction
+    # -------------------------
+    @classmethod
+    def from_rankings(cls, rankings: Iterable[Sequence[str]],
+                      candidates: Optional[Sequence[str]] = None) -> "BallotMatrix":
+        """Build from ranked lists of names, best first. Identical rankings are folded together."""
+        counts: Dict[tuple, int] = {}
+        for ranking, n in Counter(map(tuple, rankings)).items():
+            if len(set(ranking)) != len(ranking):
+                ranking = tuple(dict.fromkeys(ranking))  # drop repeated names, keep first position
+            counts[ranking] = counts.get(ranking, 0) + n
+        if candidates is None:
+            candidates = list(dict.fromkeys(name for ranking in counts for name in ranking))
+        index = {name: i for i, name in enumerate(candidates)}
+        n_cand = len(candidates)
+
+        # One flat pass over all names, then scatter positions with array ops
+        keys = list(counts)
+        lengths = np.fromiter(map(len, keys), dtype=np.int64, count=len(keys))
+        cols = np.fromiter((index.get(name, -1) for ranking in keys for name in ranking),
+                           dtype=np.int64, count=int(lengths.sum()))
+        rows = np.repeat(np.arange(len(keys)), lengths)
+        pos = np.arange(cols.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        known = cols >= 0
+        ranks = np.full((len(keys), n_cand), n_cand, dtype=np.int32)
+        ranks[rows[known], cols[known]] = pos[known]
+        return cls(candidates, ranks, np.fromiter(counts.values(), dtype=np.int64, count=len(counts)))
+
+    @classmethod
+    def from_votes(cls, votes: Iterable[Mapping[str, str]], key: str = "vote",
+                   ignore: Sequence[str] = ()) -> "BallotMatrix":
+        """Single-choice votes ({"vote": name}) as one-name ballots, one row per candidate."""
+        tally = Counter(v[key] for v in votes if v.get(key) and v[key] not in ignore)
+        n_cand = len(tally)
+        ranks = np.full((n_cand, n_cand), n_cand, dtype=np.int32)
+        np.fill_diagonal(ranks, 0)
+        return cls(list(tally), ranks, np.fromiter(tally.values(), dtype=np.int64, count=n_cand))
+
+    # -------------------------
+    # Tallies
+    # -------------------------
+    def plurality(self) -> np.ndarray:
+        """First-choice counts per candidate."""
+        first = self.ranks == 0
+        return (first * self.weights[:, None]).sum(axis=0)
+
+    def borda(self) -> np.ndarray:
+        """
+        Borda points per candidate: on a ballot ranking n names, position p
+        scores n - p - 1; unranked candidates score nothing.
+        """
+        n_cand = len(self.candidates)
+        ranked = self.ranks < n_cand
+        lengths = ranked.sum(axis=1, keepdims=True)
+        points = np.where(ranked, lengths - self.ranks - 1, 0)
+        return self.weights @ points
+
+    def pairwise(self) -> np.ndarray:
+        """
+        d[i, j] = number of ballots ranking i strictly above j (candidates a
+        ballot leaves out are tied below everything it ranks).
+        """
+        if self._pairwise is None:
+            n_cand = len(self.candidates)
+            d = np.zeros((n_cand, n_cand), dtype=np.int64)
+            block = max(1, _BLOCK_ELEMENTS // max(1, len(self) * n_cand))
+            for start in range(0, n_cand, block):
+                stop = min(n_cand, start + block)
+                # (ballots, block, 1) < (ballots, 1, candidates)
+                above = self.ranks[:, start:stop, None] < self.ranks[:, None, :]
+                d[start:stop] = np.tensordot(self.weights, above, axes=(0, 0))
+            self._pairwise = d
+        return self._pairwise
+
+    @classmethod
+    def pairwise_from_dict(cls, preferences: Mapping[str, Mapping[str, float]]) -> "BallotMatrix":
+        """Wrap an existing {a: {b: count}} preference table (no ballots) for Condorcet/Schulze."""
+        candidates = list(preferences)
+        index = {name: i for i, name in enumerate(candidates)}
+        d = np.zeros((len(candidates), len(candidates)), dtype=np.float64)
+        for a, row in preferences.items():
+            for b, value in row.items():
+                if b in index and a != b:
+                    d[index[a], index[b]] = value
+        matrix = cls(candidates, np.zeros((0, len(candidates)), dtype=np.int32))
+        matrix._pairwise = d
+        return matrix
+
+    # -------------------------
+    # Winners
+    # -------------------------
+    def _first_best(self, scores: np.ndarray) -> Optional[str]:
+        if not self.candidates:
+            return None
+        return self.candidates[int(np.argmax(scores))]
+
+    def plurality_winner(self) -> Optional[str]:
+        """Unique plurality winner, or None on an empty or tied count."""
+        counts = self.plurality()
+        if not counts.size or counts.max() == 0 or np.count_nonzero(counts == counts.max()) > 1:
+            return None
+        return self._first_best(counts)
+
+    def borda_winner(self) -> Optional[str]:
+        return self._first_best(self.borda())
+
+    def condorcet_winner(self) -> Optional[str]:
+        """The candidate beating every other head to head, if one exists."""
+        d = self.pairwise()
+        beats = d > d.T
+        winners = np.flatnonzero(beats.sum(axis=1) == len(self.candidates) - 1)
+        return self.candidates[int(winners[0])] if winners.size else None
+
+    def schulze_strengths(self) -> np.ndarray:
+        """Strongest-path strengths p[i, j] (widest paths over winning margins)."""
+        d = self.pairwise().astype(np.float64)
+        p = np.where(d > d.T, d, 0.0)
+        for k in range(len(self.candidates)):
+            np.maximum(p, np.minimum(p[:, k:k + 1], p[k:k + 1, :]), out=p)
+        np.fill_diagonal(p, 0.0)
+        return p
+
+    def schulze_ranking(self) -> List[str]:
+        """Candidates ordered by Schulze wins (ties: Borda, then first appearance)."""
+        p = self.schulze_strengths()
+        wins = (p > p.T).sum(axis=1)
+        borda = self.borda() if len(self) else np.zeros(len(self.candidates))
+        order = np.lexsort((np.arange(len(self.candidates)), -borda, -wins))
+        return [self.candidates[i] for i in order]
+
+    def schulze_winner(self) -> Optional[str]:
+        """
+        Schulze winner: beats or ties every rival on strongest paths. Always
+        exists; several tied winners are split by Borda, then first appearance.
+        """
+        if not self.candidates:
+            return None
+        return self.schulze_ranking()[0]
@@ -0,0 +1,398 @@
+"""
+Batch debate runner: every topic x agent configuration (x repeats) run
+across a pool of worker processes.
+
+    python -m backend.batch spec.json --workers 4 --llm-limit 8
+    python -m backend.batch --topic "Ban cars from city centres?" --topic "Four-day week?" \\
+        --roles Leader,Rebel,Civilian --roles Harmonizer,Contrarian --rounds 2 --fake
+
+A spec file is JSON:
+
+    {"name": "roles-v1",
+     "topics": ["...", "..."],
+     "configs": [{"name": "mixed", "rounds": 3, "method": "borda", "early_stop": true,
+                  "agents": [{"role": "Leader", "persona": "factual", "stance": "for"}, ...]}],
+     "repeats": 1}
+
+Every finished debate is saved as exports/echomind_session_batch-<name>-<task>.json,
+recorded in the stats service and appended to <name>.checkpoint.jsonl, so
+rerunning the same batch skips what already finished (failed tasks are
+retried). Sessions are added to the Parquet archive every --archive-every
+debates and at the end. All workers share one cross-process semaphore of
+--llm-limit provider calls in flight; --rpm / --tpm are split evenly
+between workers. A throughput report (debates/s, LLM calls/s, latency
+percentiles, per-config results) is printed and written to <name>.report.json.
+
+Agents keep long-term memories only when a config sets "memory": true,
+and then under keys of their own task (batch-<task>-Agent_N), never the
+Agent_N memories interactive sessions use.
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from backend.sessions import decision_name, resolve_agent
+from backend.utils import UTILS_DIR, Utils
+
+BATCH_DIR = os.path.join(UTILS_DIR, "batches")
+MISTRAL_BASE_URL = "https://api.mistral.ai/v1"
+
+
+@dataclass
+class BatchTask:
+    topic: str
+    config: Dict[str, Any]
+    repeat: int = 0
+    task_id: str = field(init=False)
+
+    def __post_init__(self):
+        # Stable across runs, so a restarted batch recognises finished work
+        key = json.dumps([self.topic, self.config, self.repeat], sort_keys=True)
+        self.task_id = hashlib.blake2b(key.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def expand(spec: Dict[str, Any]) -> List[BatchTask]:
+    """The topic x config x repeat matrix of a spec, configs filled with defaults."""
+    configs = spec.get("configs") or [{}]
+    tasks = []
+    for i, config in enumerate(configs):
+        config = {
+            "name": config.get("name", f"config_{i + 1}"),
+            "agents": config.get("agents") or [{"role": "Civilian"}] * 3,
+            "rounds": int(config.get("rounds", 3)),
+            "method": config.get("method", "majority"),
+            "early_stop": bool(config.get("early_stop", False)),
+            "simultaneous": bool(config.get("simultaneous", False)),
+            "memory": bool(config.get("memory", False)),
+        }
+        for topic in spec["topics"]:
+            for repeat in range(int(spec.get("repeats", 1))):
+                tasks.append(BatchTask(topic, config, repeat))
+    return tasks
+
+
+# -------------------------
+# Worker processes
+# -------------------------
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(limiter, client_options: Dict[str, Any]) -> None:
+    """Build this process's LLMClient once; every call takes a slot from the shared limiter."""
+    from backend.llm_client import LLMClient
+    # Imported up front so the first debate's latency excludes them (the
+    # memory index pulls in scikit-learn, over a second on its own)
+    import backend.agent  # noqa: F401
+    import backend.memory_index  # noqa: F401
+    import backend.pipeline  # noqa: F401
+
+    if client_options.get("fake"):
+        from backend.fake_llm import FakeLLMClient
+
+        raw = FakeLLMClient(**client_options.get("fake_options", {}), seed=os.getpid())
+    else:
+        from openai import OpenAI
+
+        raw = OpenAI(api_key=client_options["api_key"], base_url=client_options["base_url"], max_retries=0)
+    _worker["client"] = LLMClient(raw, requests_per_minute=client_options.get("rpm"),
+                                  tokens_per_minute=client_options.get("tpm"),
+                                  max_retries=client_options.get("max_retries", 5), limiter=limiter)
+
+
+def _run_task(task: BatchTask) -> Dict[str, Any]:
+    """One debate pipeline; returns the session export and its cost."""
+    from backend.agent import Agent
+    from backend.pipeline import run_pipeline
+
+    client = _worker["client"]
+    config = task.config
+    # Every task remembers under its own keys (the shared Agent_N memories of
+    # interactive sessions stay untouched), and nothing is stored with memory off
+    agents = [Agent(name=f"Agent_{i + 1}", role=a.get("role", "Civilian"), stance=a.get("stance", "neutral"),
+                    persona=a.get("persona", "factual"), memory_key=f"batch-{task.task_id}-Agent_{i + 1}",
+                    persist_memory=config["memory"])
+              for i, a in enumerate(config["agents"])]
+    before = client.metrics()
+    start = time.perf_counter()
+    for event, data in run_pipeline(client, task.topic, agents, rounds=config["rounds"],
+                                    memory_enabled=config["memory"], simultaneous=config["simultaneous"],
+                                    method=config["method"], early_stop=config["early_stop"]):
+        if event == "result":
+            payload = data
+    seconds = time.perf_counter() - start
+    after = client.metrics()
+
+    # The judge answers in free text ("FINAL DECISION: Agent_2 ..."), so resolve it as the archive does
+    roles = {a.name: a.role for a in agents}
+    winner = resolve_agent(decision_name(payload["final_decision"]), roles)
+    decision = payload["final_decision"]
+    payload = {
+        **payload,
+        "agents": [{"name": a.name, "role": a.role, "persona": a.persona, "stance": a.stance} for a in agents],
+        # Tag the role as App.py exports do, but only once the decision names an agent
+        "final_decision": f"{decision} ({roles[winner]})" if winner is not None else decision,
+        "batch": {"task_id": task.task_id, "config": config["name"], "repeat": task.repeat,
+                  "winner": winner, "winner_role": roles.get(winner)},
+    }
+    return {
+        "payload": payload,
+        "seconds": seconds,
+        "calls": after["requests"] - before["requests"],
+        "retries": after["retries"] - before["retries"],
+        "limiter_wait_seconds": after["limiter_wait_seconds"] - before["limiter_wait_seconds"],
+    }
+
+
+# -------------------------
+# Coordinator
+# -------------------------
+class BatchRunner:
+    """
+    Runs a batch in a process pool from this (coordinating) process, which
+    alone writes exports, the checkpoint, the archive and the stats, so
+    workers share nothing but the LLM limiter.
+    """
+
+    def __init__(self, name: str, tasks: Iterable[BatchTask], workers: int = 4, llm_limit: int = 8,
+                 client_options: Optional[Dict[str, Any]] = None, archive_every: int = 50,
+                 out_dir: str = BATCH_DIR, archive: bool = True, verbose: bool = True):
+        self.name = name
+        self.tasks = list(tasks)
+        self.workers = max(1, int(workers))
+        self.llm_limit = max(1, int(llm_limit))
+        self.client_options = dict(client_options or {"fake": True})
+        self.archive_every = max(1, int(archive_every))
+        self.archive = archive
+        self.verbose = verbose
+        os.makedirs(out_dir, exist_ok=True)
+        self.checkpoint_path = os.path.join(out_dir, f"{name}.checkpoint.jsonl")
+        self.report_path = os.path.join(out_dir, f"{name}.report.json")
+
+    def completed(self) -> Set[str]:
+        """task_ids finished in earlier runs (a torn last line is ignored)."""
+        done = set()
+        try:
+            with open(self.checkpoint_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if entry.get("status") == "ok":
+                        done.add(entry["task_id"])
+        except FileNotFoundError:
+            pass
+        return done
+
+    def _checkpoint(self, f, entry: Dict[str, Any]) -> None:
+        f.write(json.dumps(entry) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+    def run(self) -> Dict[str, Any]:
+        from backend.archive import SessionArchive
+        from backend.stats import get_stats
+
+        done = self.completed()
+        todo = [t for t in self.tasks if t.task_id not in done]
+        self._log(f"batch {self.name}: {len(self.tasks)} tasks, {len(done & {t.task_id for t in self.tasks})} "
+                  f"already done, {len(todo)} to run on {self.workers} workers (LLM limit {self.llm_limit})")
+
+        options = dict(self.client_options)
+        for key in ("rpm", "tpm"):
+            if options.get(key):
+                options[key] = options[key] / self.workers
+        ctx = multiprocessing.get_context("spawn")
+        limiter = ctx.BoundedSemaphore(self.llm_limit)
+        stats = get_stats()
+        archive = SessionArchive() if self.archive else None
+        # An interrupted run may have saved sessions it had not recorded or archived
+        # yet; both steps skip what they already hold
+        saved = [p for p in (self._session_path(t.task_id) for t in self.tasks if t.task_id in done)
+                 if os.path.exists(p)]
+        for path in saved:
+            with open(path, encoding="utf-8") as f:
+                stats.record(json.load(f), os.path.splitext(os.path.basename(path))[0])
+        if archive is not None:
+            archive.ingest(saved)
+
+        results, failures, unarchived = [], [], []
+        start = time.perf_counter()
+        try:
+            self._run_pool(todo, ctx, limiter, options, stats, archive, results, failures, unarchived, start)
+        finally:
+            if archive is not None and unarchived:
+                archive.ingest(unarchived)
+        wall = time.perf_counter() - start
+
+        report = self._report(results, failures, wall, len(self.tasks) - len(todo))
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        self._log(format_report(report))
+        return report
+
+    def _session_path(self, task_id: str) -> str:
+        return os.path.join(UTILS_DIR, f"echomind_session_batch-{self.name}-{task_id}.json")
+
+    def _run_pool(self, todo, ctx, limiter, options, stats, archive, results, failures, unarchived, start) -> None:
+        """Run todo, saving / recording / checkpointing each debate as it finishes."""
+        with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint, \
+                ProcessPoolExecutor(self.workers, mp_context=ctx, initializer=_init_worker,
+                                    initargs=(limiter, options)) as pool:
+            pending = iter(todo)
+            in_flight = {}
+
+            def refill():
+                # A bounded window keeps Ctrl+C responsive and memory flat for huge batches
+                while len(in_flight) < self.workers * 2:
+                    task = next(pending, None)
+                    if task is None:
+                        return
+                    in_flight[pool.submit(_run_task, task)] = task
+
+            refill()
+            while in_flight:
+                finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    task = in_flight.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception as e:
+                        failures.append({"task_id": task.task_id, "topic": task.topic,
+                                         "config": task.config["name"], "error": repr(e)})
+                        self._checkpoint(checkpoint, {"task_id": task.task_id, "status": "error", "error": repr(e)})
+                        self._log(f"  ✗ {task.config['name']} | {task.topic[:50]}: {e!r}")
+                        continue
+                    path = Utils.save_json(result["payload"], os.path.basename(self._session_path(task.task_id)))
+                    session_id = os.path.splitext(os.path.basename(path))[0]
+                    stats.record(result["payload"], session_id)
+                    self._checkpoint(checkpoint, {"task_id": task.task_id, "status": "ok", "session_id": session_id,
+                                                  "seconds": round(result["seconds"], 4), "calls": result["calls"]})
+                    results.append({"task": task, "finished": time.perf_counter() - start, **result})
+                    unarchived.append(path)
+                    if archive is not None and len(unarchived) >= self.archive_every:
+                        archive.ingest(unarchived)
+                        unarchived.clear()
+                    self._log(f"  ✓ {len(results)}/{len(todo)} {task.config['name']} | {task.topic[:50]} "
+                              f"({result['seconds']:.1f}s, {result['calls']} calls)")
+                refill()
+
+    def _report(self, results: List[Dict[str, Any]], failures: List[Dict[str, Any]], wall: float,
+                skipped: int) -> Dict[str, Any]:
+        seconds = np.array([r["seconds"] for r in results]) if results else np.zeros(1)
+        calls = sum(r["calls"] for r in results)
+        # Spawning workers and importing the stack dominates short batches, so
+        # throughput is also given from the moment the first debate started
+        startup = min((r["finished"] - r["seconds"] for r in results), default=0.0)
+        by_config: Dict[str, Dict[str, Any]] = {}
+        for r in results:
+            payload = r["payload"]
+            entry = by_config.setdefault(r["task"].config["name"], {"debates": 0, "seconds": 0.0, "calls": 0,
+                                                                    "judge_invoked": 0, "winner_roles": {}})
+            entry["debates"] += 1
+            entry["seconds"] += r["seconds"]
+            entry["calls"] += r["calls"]
+            entry["judge_invoked"] += int(bool(payload.get("judge_invoked")))
+            role = payload["batch"]["winner_role"] or "undecided"
+            entry["winner_roles"][role] = entry["winner_roles"].get(role, 0) + 1
+        for entry in by_config.values():
+            entry["mean_seconds"] = entry.pop("seconds") / entry["debates"]
+        return {
+            "name": self.name,
+            "finished_at": datetime.datetime.utcnow().isoformat(),
+            "workers": self.workers, "llm_limit": self.llm_limit,
+            "tasks": len(self.tasks), "skipped": skipped, "completed": len(results), "failed": len(failures),
+            "wall_s": wall,
+            "startup_s": startup,
+            "debates_per_s": len(results) / wall if wall else 0.0,
+            "steady_debates_per_s": len(results) / (wall - startup) if wall > startup else 0.0,
+            "calls": calls,
+            "calls_per_s": calls / wall if wall else 0.0,
+            "retries": sum(r["retries"] for r in results),
+            "limiter_wait_s": sum(r["limiter_wait_seconds"] for r in results),
+            "p50_s": float(np.percentile(seconds, 50)),
+            "p95_s": float(np.percentile(seconds, 95)),
+            "max_s": float(seconds.max()),
+            "by_config": by_config,
+            "failures": failures,
+        }
+
+    def _log(self, message: str) -> None:
+        if self.verbose:
+            print(message, flush=True)
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{report['completed']} debates in {report['wall_s']:.1f}s ({report['skipped']} resumed, "
+        f"{report['failed']} failed): {report['debates_per_s']:.2f} debates/s "
+        f"({report['steady_debates_per_s']:.2f}/s after {report['startup_s']:.1f}s worker startup), "
+        f"{report['calls']} LLM calls "
+        f"({report['calls_per_s']:.1f}/s, {report['retries']} retries, {report['limiter_wait_s']:.1f}s waiting "
+        f"on the limit); per debate p50 {report['p50_s']:.2f}s, p95 {report['p95_s']:.2f}s",
+    ]
+    for name, entry in report["by_config"].items():
+        roles = ", ".join(f"{r} {n}" for r, n in sorted(entry["winner_roles"].items(), key=lambda x: -x[1]))
+        lines.append(f"  {name}: {entry['debates']} debates, {entry['mean_seconds']:.2f}s mean, "
+                     f"judge {entry['judge_invoked']}, winners: {roles}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("spec", nargs="?", help="JSON spec file (topics, configs, repeats)")
+    parser.add_argument("--name", help="batch name (default: spec file name); reuse it to resume")
+    parser.add_argument("--topic", action="append", default=[], help="topic (repeatable) when no spec is given")
+    parser.add_argument("--roles", action="append", default=[],
+                        help="comma-separated agent roles, one config per flag, when no spec is given")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--method", default="majority")
+    parser.add_argument("--repeats", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=4, help="worker processes")
+    parser.add_argument("--llm-limit", type=int, default=8, help="provider calls in flight across all workers")
+    parser.add_argument("--rpm", type=float, default=None, help="requests / minute for the whole batch")
+    parser.add_argument("--tpm", type=float, default=None, help="tokens / minute for the whole batch")
+    parser.add_argument("--archive-every", type=int, default=50, help="sessions per archive part file")
+    parser.add_argument("--no-archive", action="store_true")
+    parser.add_argument("--base-url", default=MISTRAL_BASE_URL)
+    parser.add_argument("--fake", action="store_true", help="use the fake LLM instead of a provider")
+    parser.add_argument("--latency", default="0", help='fake LLM latency, e.g. "lognormal:0.4,0.5"')
+    args = parser.parse_args()
+
+    if args.spec:
+        with open(args.spec, encoding="utf-8") as f:
+            spec = json.load(f)
+    else:
+        if not args.topic:
+            parser.error("give a spec file or at least one --topic")
+        spec = {"topics": args.topic, "repeats": args.repeats,
+                "configs": [{"name": roles.replace(",", "-"), "rounds": args.rounds, "method": args.method,
+                             "agents": [{"role": r.strip()} for r in roles.split(",")]}
+                            for roles in (args.roles or ["Civilian,Civilian,Civilian"])]}
+    name = args.name or spec.get("name") or (os.path.splitext(os.path.basename(args.spec))[0] if args.spec
+                                             else "batch")
+
+    if args.fake:
+        client_options = {"fake": True, "fake_options": {"latency": args.latency}}
+    else:
+        api_key = os.environ.get("ECHOMIND_API_KEY") or os.environ.get("MISTRAL_API_KEY")
+        if not api_key:
+            parser.error("set ECHOMIND_API_KEY (or MISTRAL_API_KEY), or pass --fake")
+        client_options = {"api_key": api_key, "base_url": args.base_url}
+    client_options.update({"rpm": args.rpm, "tpm": args.tpm})
+
+    BatchRunner(name, expand(spec), workers=args.workers, llm_limit=args.llm_limit, client_options=client_options,
+                archive_every=args.archive_every, archive=not args.no_archive).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import os
+import time
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Upper bound on LLM calls in flight across the whole process; each caller
+# additionally caps its own fan-out with max_in_flight.
+SHARED_POOL_SIZE = int(os.environ.get("ECHOMIND_LLM_WORKERS", "32"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def shared_executor() -> ThreadPoolExecutor:
+    """Process-wide thread pool for blocking LLM calls, created on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=SHARED_POOL_SIZE,
+                                           thread_name_prefix="echomind-llm")
+        return _executor
+
+
+def pool_timeout(call_timeout: Optional[float], calls: int = 1, grace: float = 5.0) -> Optional[float]:
+    """
+    Seconds a pooled task making up to calls sequential LLM calls may run
+    before the pool gives up on it: a small grace period over the client-side
+    timeouts, or None when calls are not timed out.
+    """
+    return call_timeout * calls + grace if call_timeout else None
+
+
+def iter_bounded(fn: Callable[[Any], Any], items: Iterable[Any], max_in_flight: int = 4,
+                 timeout: Optional[float] = None) -> Iterator[Tuple[int, Future]]:
+    """
+    Run fn over items on the shared pool with at most max_in_flight calls
+    running at once, yielding (index, future) in completion order. A call
+    still running timeout seconds after submission is yielded as a future
+    failed with TimeoutError and its slot is freed (the thread itself cannot
+    be interrupted; its late result is dropped). Closing the generator early
+    cancels everything not yet started.
+    """
+    executor = shared_executor()
+    pending = iter(enumerate(items))
+    in_flight: Dict[Future, Tuple[int, float]] = {}
+    limit = max(1, int(max_in_flight))
+
+    def refill():
+        while len(in_flight) < limit:
+            nxt = next(pending, None)
+            if nxt is None:
+                return
+            in_flight[executor.submit(fn, nxt[1])] = (nxt[0], time.monotonic())
+
+    try:
+        refill()
+        while in_flight:
+            wait_for = None
+            if timeout is not None:
+                oldest = min(started for _, started in in_flight.values())
+                wait_for = max(0.0, oldest + timeout - time.monotonic())
+            done, _ = wait(in_flight, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield in_flight.pop(fut)[0], fut
+            if timeout is not None:
+                now = time.monotonic()
+                for fut in [f for f, (_, started) in in_flight.items() if now - started >= timeout]:
+                    index, _ = in_flight.pop(fut)
+                    fut.cancel()
+                    expired: Future = Future()
+                    expired.set_exception(TimeoutError(f"call timed out after {timeout}s"))
+                    yield index, expired
+            refill()
+    finally:
+        for fut in in_flight:
+            fut.cancel()
+
+
+def bounded_imap(fn: Callable[[Any], Any], items: Iterable[Any], max_in_flight: int = 4,
+                 timeout: Optional[float] = None,
+                 fallback: Optional[Callable[[Any, BaseException], Any]] = None) -> Iterator[Any]:
+    """
+    Like map(fn, items) but concurrent; results are yielded in input order as
+    soon as they are ready. If fallback is given, a failed or timed-out call
+    yields fallback(item, exc) instead of raising.
+    """
+    items = list(items)
+    ready: Dict[int, Future] = {}
+    next_index = 0
+    for index, fut in iter_bounded(fn, items, max_in_flight, timeout):
+        ready[index] = fut
+        while next_index in ready:
+            fut = ready.pop(next_index)
+            exc = fut.exception()
+            if exc is None:
+                yield fut.result()
+            elif fallback is not None:
+                yield fallback(items[next_index], exc)
+            else:
+                raise exc
+            next_index += 1
+
+
+def bounded_map(fn: Callable[[Any], Any], items: Iterable[Any], max_in_flight: int = 4,
+                timeout: Optional[float] = None,
+                fallback: Optional[Callable[[Any, BaseException], Any]] = None) -> List[Any]:
+    return list(bounded_imap(fn, items, max_in_flight, timeout, fallback))
@@ -1,93 +1,246 @@
-from collections import Counter
 import numpy as np
 import re
 
+from backend.ballots import BallotError, BallotMatrix, parse_ranked_ballot
+from backend.concurrency import bounded_map, pool_timeout
+from backend.llm_client import chat_completion
+from backend.context import DEFAULT_CONTEXT_TOKENS, TranscriptContext
+
+# Methods tallied from full rankings (collect_ballots) rather than single votes
+RANKED_METHODS = ("borda", "condorcet", "schulze")
+
 
 class ConsensusEngine:
-    def __init__(self, agents):
+    def __init__(self, agents, max_concurrency=8, call_timeout=60.0,
+                 transcript_tokens=DEFAULT_CONTEXT_TOKENS):
         self.agents = agents
+        # Token budget for the transcript shown in each vote prompt
+        self.transcript_tokens = transcript_tokens
+        # Votes are independent, so they fan out with at most max_concurrency
+        # calls in flight; a call exceeding call_timeout seconds abstains.
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
 
     # -------------------------
     # Voting Collection
     # -------------------------
-    def collect_votes(self, client, topic, transcript):
+    def collect_votes(self, client, topic, transcript, context=None):
         """
         Collects initial votes from agents.
         Always sends both system + user messages to avoid empty conversation errors.
+        context (e.g. DebateEngine.context) is reused if given; otherwise the
+        transcript is windowed once to transcript_tokens for all voters.
         """
-        votes = []
-        for agent in self.agents:
+        if context is None:
+            context = TranscriptContext.from_transcript(transcript, max_tokens=self.transcript_tokens)
+        transcript_text = str(context)
+
+        def ask(agent):
             prompt = f"""
             Debate on '{topic}' has concluded.
 
             You are {agent.role} ({agent.name}).
             Review the transcript below and cast your vote:
 
-            Transcript: {transcript}
+            Transcript:
+            {transcript_text}
 
             Reply in format:
 
             VOTE: AgentName
             Justification: <short reason>
             """
+            return self._cast_vote(client, agent, "You are participating in a consensus voting process.", prompt)
+
+        return self._fan_out(ask)
+
+    def _cast_vote(self, client, agent, system_msg, prompt):
+        try:
+            resp = chat_completion(client,
+                model=agent.model,
+                messages=[
+                    {"role": "system", "content": system_msg},
+                    {"role": "user", "content": prompt}
+                ],
+                max_tokens=150,
+                timeout=self.call_timeout
+            )
+            text = resp.choices[0].message.content.strip()
+        except Exception as e:
+            # Only reached once the client's retries are exhausted
+            text = f"VOTE: abstain\nJustification: API error ({type(e).__name__})"
+        return self._parse_vote(agent, text)
+
+    def _parse_vote(self, agent, text):
+        match = re.search(r"VOTE:\s*([\w\d_]+)", text)
+        choice = match.group(1) if match else "abstain"
+        return {"agent": agent.name, "vote": choice, "text": text}
+
+    # -------------------------
+    # Ranked Ballots
+    # -------------------------
+    def collect_ballots(self, client, topic, transcript, context=None):
+        """
+        One call per agent returning a full ranking as JSON, so Borda,
+        Condorcet, Schulze and the pairwise matrix are all tallied locally
+        (see ballot_matrix / tallies). Each ballot is {"agent", "vote" (first
+        choice), "ranking", "valid", "text"}; a reply that fails validation is
+        re-asked once with the error, and if still unusable (or the call
+        fails) the ballot is kept with valid=False, vote=None and an "error".
+        """
+        if context is None:
+            context = TranscriptContext.from_transcript(transcript, max_tokens=self.transcript_tokens)
+        transcript_text = str(context)
+        candidates = [a.name for a in self.agents]
+        example = ", ".join(f'"{name}"' for name in candidates)
+
+        def ask(agent):
+            prompt = f"""
+            Debate on '{topic}' has concluded.
+
+            You are {agent.role} ({agent.name}).
+            Review the transcript below and rank every debater from most to
+            least convincing.
+
+            Candidates: {", ".join(candidates)}
+
+            Transcript:
+            {transcript_text}
+
+            Reply with JSON only, in this shape:
+
+            {{"ranking": [{example}], "justification": "<short reason>"}}
+            """
+            return self._cast_ballot(client, agent, prompt, candidates)
 
+        def timed_out(agent, exc):
+            return self._invalid_ballot(agent, "", "timed out")
+
+        # A ballot may take a second call to repair an invalid reply
+        return bounded_map(ask, self.agents, self.max_concurrency,
+                           timeout=pool_timeout(self.call_timeout, calls=2), fallback=timed_out)
+
+    def _cast_ballot(self, client, agent, prompt, candidates):
+        messages = [
+            {"role": "system", "content": "You are participating in a ranked consensus vote. Answer in JSON."},
+            {"role": "user", "content": prompt}
+        ]
+        text = ""
+        for attempt in range(2):
             try:
-                resp = client.chat.completions.create(
+                resp = chat_completion(client,
                     model=agent.model,
-                    messages=[
-                        {"role": "system", "content": "You are participating in a consensus voting process."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=150
+                    messages=messages,
+                    max_tokens=100 + 12 * len(candidates),
+                    response_format={"type": "json_object"},
+                    timeout=self.call_timeout
                 )
                 text = resp.choices[0].message.content.strip()
             except Exception as e:
-                text = "VOTE: abstain\nJustification: API error"
+                # Only reached once the client's retries are exhausted
+                return self._invalid_ballot(agent, text, f"API error ({type(e).__name__})")
+            try:
+                ballot = parse_ranked_ballot(text, candidates)
+            except BallotError as e:
+                error = str(e)
+                # Show the model its reply and what was wrong, once
+                messages = messages[:2] + [
+                    {"role": "assistant", "content": text},
+                    {"role": "user", "content": f"That ballot is invalid: {error}. Use only these names: "
+                                                f"{', '.join(candidates)}. Reply with the JSON object only."}
+                ]
+                continue
+            return {"agent": agent.name, "vote": ballot["ranking"][0], "ranking": ballot["ranking"],
+                    "justification": ballot["justification"], "valid": True, "text": text}
+        return self._invalid_ballot(agent, text, error)
+
+    @staticmethod
+    def _invalid_ballot(agent, text, error):
+        return {"agent": agent.name, "vote": None, "ranking": [], "valid": False, "error": error, "text": text}
+
+    def ballot_matrix(self, ballots):
+        """BallotMatrix over the valid ballots, with every agent as a candidate."""
+        rankings = [b["ranking"] for b in ballots if b.get("valid") and b.get("ranking")]
+        candidates = [a.name for a in self.agents] or None
+        return BallotMatrix.from_rankings(rankings, candidates=candidates)
 
-            match = re.search(r"VOTE:\s*([\w\d_]+)", text)
-            choice = match.group(1) if match else "abstain"
-            votes.append({"agent": agent.name, "vote": choice, "text": text})
-        return votes
+    def tallies(self, ballots):
+        """Every ranked tally from one set of ballots, for reporting alongside the decision."""
+        matrix = ballots if isinstance(ballots, BallotMatrix) else self.ballot_matrix(ballots)
+        names = matrix.candidates
+        pairwise = matrix.pairwise()
+        return {
+            "ballots": matrix.n_ballots,
+            "borda": dict(zip(names, matrix.borda().tolist())),
+            "pairwise": {a: {b: int(pairwise[i, j]) for j, b in enumerate(names) if i != j}
+                         for i, a in enumerate(names)},
+            "condorcet": matrix.condorcet_winner(),
+            "schulze": matrix.schulze_ranking(),
+        }
+
+    def _fan_out(self, ask):
+        """Run ask(agent) for every agent concurrently; results keep agent order."""
+        def timed_out(agent, exc):
+            return self._parse_vote(agent, "VOTE: abstain\nJustification: timed out")
+
+        return bounded_map(ask, self.agents, self.max_concurrency,
+                           timeout=pool_timeout(self.call_timeout), fallback=timed_out)
 
     # -------------------------
     # Majority Voting
     # -------------------------
     def majority_vote(self, votes):
-        tally = Counter([v["vote"] for v in votes if v.get("vote")])
-        if not tally:
+        ballots = BallotMatrix.from_votes(votes)
+        if not ballots.candidates:
             return "No Decision"
-        winner, count = tally.most_common(1)[0]
+        winner = ballots.plurality_winner()
         # Handle tie
-        if list(tally.values()).count(count) > 1:
-            return "No Clear Winner"
-        return winner
+        return winner if winner is not None else "No Clear Winner"
 
     # -------------------------
     # Borda Count
     # -------------------------
     def borda_count(self, rankings):
-        scores = Counter()
         if not rankings:
             return "No Rankings Provided"
-        for rank in rankings:
-            for i, agent in enumerate(rank):
-                scores[agent] += len(rank) - i - 1
-        return scores.most_common(1)[0][0] if scores else "No Decision"
+        ballots = rankings if isinstance(rankings, BallotMatrix) else BallotMatrix.from_rankings(rankings)
+        return ballots.borda_winner() or "No Decision"
 
     # -------------------------
     # Condorcet Method
     # -------------------------
-    def condorcet(self, pairwise_preferences):
-        if not pairwise_preferences:
+    def condorcet(self, pairwise_preferences, fallback="schulze"):
+        """
+        pairwise_preferences: {a: {b: count}} table, a list of rankings or a
+        BallotMatrix. Without a Condorcet winner, falls back to the Schulze
+        winner (fallback=None keeps the "No Condorcet Winner" result).
+        """
+        if pairwise_preferences is None or len(pairwise_preferences) == 0:
             return "No Pairwise Data"
-        candidates = list(pairwise_preferences.keys())
-        for c in candidates:
-            wins = sum(pairwise_preferences[c][opp] > pairwise_preferences[opp][c]
-                       for opp in candidates if opp != c)
-            if wins == len(candidates) - 1:
-                return c
+        ballots = self._ballots(pairwise_preferences)
+        winner = ballots.condorcet_winner()
+        if winner is not None:
+            return winner
+        if fallback == "schulze":
+            return ballots.schulze_winner()
         return "No Condorcet Winner"
 
+    # -------------------------
+    # Schulze Method
+    # -------------------------
+    def schulze(self, rankings):
+        if rankings is None or len(rankings) == 0:
+            return "No Rankings Provided"
+        return self._ballots(rankings).schulze_winner() or "No Decision"
+
+    @staticmethod
+    def _ballots(data):
+        if isinstance(data, BallotMatrix):
+            return data
+        if isinstance(data, dict):
+            return BallotMatrix.pairwise_from_dict(data)
+        return BallotMatrix.from_rankings(data)
+
     # -------------------------
     # Deliberation-based Consensus
     # -------------------------
@@ -105,9 +258,10 @@ class ConsensusEngine:
     # CONSENSAGENT Refinement
     # -------------------------
     def consensagent_refinement(self, client, topic, transcript, raw_votes):
-        refined_votes = []
-        for agent in self.agents:
-            prev_vote = next((v['vote'] for v in raw_votes if v['agent'] == agent.name), 'abstain')
+        prev_votes = {v['agent']: v['vote'] for v in raw_votes}
+
+        def ask(agent):
+            prev_vote = prev_votes.get(agent.name, 'abstain')
             prompt = f"""
             In the debate on '{topic}', you initially voted: {prev_vote}.
 
@@ -120,23 +274,9 @@ class ConsensusEngine:
             VOTE: AgentName
             Justification: <short reason>
             """
-            try:
-                resp = client.chat.completions.create(
-                    model=agent.model,
-                    messages=[
-                        {"role": "system", "content": "You are refining your vote to reduce sycophancy."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=150
-                )
-                text = resp.choices[0].message.content.strip()
-            except Exception:
-                text = "VOTE: abstain\nJustification: API error"
+            return self._cast_vote(client, agent, "You are refining your vote to reduce sycophancy.", prompt)
 
-            match = re.search(r"VOTE:\s*([\w\d_]+)", text)
-            choice = match.group(1) if match else "abstain"
-            refined_votes.append({"agent": agent.name, "vote": choice, "text": text})
-        return refined_votes
+        return self._fan_out(ask)
 
     # -------------------------
     # Resolution Pipeline
@@ -148,13 +288,18 @@ class ConsensusEngine:
         if method == "majority":
             return self.majority_vote(votes)
 
-        elif method == "borda":
-            rankings = kwargs.get("rankings", [])
-            return self.borda_count(rankings)
-
-        elif method == "condorcet":
-            pairwise = kwargs.get("pairwise", {})
-            return self.condorcet(pairwise)
+        elif method in RANKED_METHODS:
+            # Explicit rankings/pairwise win; otherwise use ballots from collect_ballots
+            keys = {"borda": ("rankings",), "condorcet": ("pairwise", "rankings"),
+                    "schulze": ("rankings", "pairwise")}[method]
+            data = next((kwargs[k] for k in keys if kwargs.get(k)), None)
+            if not data and any("ranking" in v for v in votes):
+                data = self.ballot_matrix(votes)
+            if method == "borda":
+                return self.borda_count(data or [])
+            if method == "condorcet":
+                return self.condorcet(data or {}, fallback=kwargs.get("fallback", "schulze"))
+            return self.schulze(data or [])
 
         elif method == "deliberation":
             stance_values = kwargs.get("stances", [0 for _ in votes])
@@ -0,0 +1,111 @@
+import re
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, Optional, Tuple
+
+from backend.llm_client import estimate_tokens
+
+DEFAULT_CONTEXT_TOKENS = 1500   # ~ the old "last 5 turns" at 300 tokens each
+DEFAULT_SUMMARY_TOKENS = 300
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to roughly max_tokens (same ~4 chars/token estimate as budgeting)."""
+    max_chars = max(0, max_tokens) * 4
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - 3)].rstrip() + "..."
+
+
+def format_turn(turn: Dict[str, Any]) -> str:
+    return f"{turn['agent']} ({turn.get('role', '')}): {turn['text']}"
+
+
+def extractive_summary(turn: Dict[str, Any], max_tokens: int = 40) -> str:
+    """One-line summary of an old turn: speaker plus its opening sentence."""
+    first = _SENTENCE_END.split(turn.get("text", "").strip(), maxsplit=1)[0]
+    return truncate_tokens(f"R{turn.get('round', '?')} {turn['agent']}: {first}", max_tokens)
+
+
+class TranscriptContext:
+    """
+    Rolling, token-counted view of a debate transcript for prompts.
+
+    Each turn is formatted and counted once on append. The newest turns that
+    fit in max_tokens are kept verbatim; older turns are folded into one-line
+    summaries (bounded by summary_tokens, oldest dropped first), so prompt
+    size stays flat however long the debate runs. Pass summarize=None to drop
+    old turns without summarising them.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_CONTEXT_TOKENS,
+                 summary_tokens: int = DEFAULT_SUMMARY_TOKENS,
+                 summarize: Optional[Callable[[Dict[str, Any]], str]] = extractive_summary):
+        self.max_tokens = int(max_tokens)
+        self.summary_tokens = int(summary_tokens)
+        self.summarize = summarize
+        self.turns = 0
+        self._window: Deque[Tuple[str, int, Dict[str, Any]]] = deque()
+        self._window_tokens = 0
+        self._summary: Deque[Tuple[str, int]] = deque()
+        self._summary_tokens = 0
+        self._rendered: Optional[str] = None
+
+    @classmethod
+    def from_transcript(cls, transcript: Iterable[Dict[str, Any]], **kwargs: Any) -> "TranscriptContext":
+        ctx = cls(**kwargs)
+        ctx.extend(transcript)
+        return ctx
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def append(self, turn: Dict[str, Any]) -> None:
+        line = truncate_tokens(format_turn(turn), self.max_tokens)
+        tokens = estimate_tokens(line)
+        self._window.append((line, tokens, turn))
+        self._window_tokens += tokens
+        while self._window_tokens > self.max_tokens and len(self._window) > 1:
+            _, old_tokens, old_turn = self._window.popleft()
+            self._window_tokens -= old_tokens
+            self._fold(old_turn)
+        self.turns += 1
+        self._rendered = None
+
+    def extend(self, turns: Iterable[Dict[str, Any]]) -> None:
+        for turn in turns:
+            self.append(turn)
+
+    def _fold(self, turn: Dict[str, Any]) -> None:
+        if self.summarize is None or self.summary_tokens <= 0:
+            return
+        line = self.summarize(turn)
+        tokens = estimate_tokens(line)
+        self._summary.append((line, tokens))
+        self._summary_tokens += tokens
+        while self._summary_tokens > self.summary_tokens and self._summary:
+            self._summary_tokens -= self._summary.popleft()[1]
+
+    # -------------------------
+    # Rendering
+    # -------------------------
+    @property
+    def tokens(self) -> int:
+        return self._window_tokens + self._summary_tokens
+
+    def render(self) -> str:
+        """Prompt text for the current window; cached until the next append."""
+        if self._rendered is None:
+            parts = []
+            if self._summary:
+                parts.append("Earlier in the debate (summary):")
+                parts.extend(line for line, _ in self._summary)
+                parts.append("")
+                parts.append("Most recent turns:")
+            parts.extend(line for line, _, _ in self._window)
+            self._rendered = "\n".join(parts)
+        return self._rendered
+
+    def __str__(self) -> str:
+        return self.render()
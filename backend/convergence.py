@@ -0,0 +1,143 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from backend.embeddings import embed_many, get_embedder
+
+
+@dataclass
+class TurnSignal:
+    """How one turn moved the debate: novelty vs. the speaker's earlier turns, and stance drift."""
+    agent: str
+    round: int
+    novelty: float
+    drift: float
+    redundant: bool
+
+
+@dataclass
+class ConvergenceReport:
+    planned_turns: int
+    turns: int = 0
+    rounds_run: int = 0
+    skipped: Dict[str, int] = field(default_factory=dict)
+    stopped_early: bool = False
+    reason: Optional[str] = None
+
+    @property
+    def calls_saved(self) -> int:
+        return self.planned_turns - self.turns
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**vars(self), "skipped": dict(self.skipped), "calls_saved": self.calls_saved}
+
+
+class ConvergenceMonitor:
+    """
+    Watches a debate turn by turn and decides when further LLM calls would
+    add nothing.
+
+    Every turn is embedded locally (HashingEmbedder by default; no API call)
+    and compared with the speaker's earlier turns in this debate:
+
+    - novelty = 1 - highest cosine similarity to any of them; a turn below
+      novelty_threshold just repeats the speaker.
+    - drift = how far the speaker's position (running mean of its turn
+      vectors) moved, as 1 - cosine of the mean before and after.
+
+    A speaker whose last turn was redundant is skipped in the next round
+    unless someone else has said something new since. The debate stops once
+    patience consecutive rounds (after min_rounds) had no novel turn and no
+    speaker drifting by drift_threshold or more, or when every agent would be
+    skipped. report counts the calls saved against rounds x agents.
+    """
+
+    def __init__(self, novelty_threshold: float = 0.15, drift_threshold: float = 0.05,
+                 patience: int = 1, min_rounds: int = 2, skip_redundant: bool = True,
+                 embedder: Any = None):
+        self.novelty_threshold = float(novelty_threshold)
+        self.drift_threshold = float(drift_threshold)
+        self.patience = max(1, int(patience))
+        self.min_rounds = max(1, int(min_rounds))
+        self.skip_redundant = skip_redundant
+        self.embedder = get_embedder(embedder)
+        self.reset()
+
+    def reset(self, agents=(), rounds: int = 0) -> None:
+        """Start a new debate for agents over rounds."""
+        self.report = ConvergenceReport(planned_turns=len(agents) * rounds)
+        self._rounds = rounds
+        self.signals: List[TurnSignal] = []
+        self._vectors: Dict[str, List[np.ndarray]] = {}
+        self._positions: Dict[str, np.ndarray] = {}
+        # Index into signals of each agent's latest turn
+        self._last_turn: Dict[str, int] = {}
+        self._quiet_rounds = 0
+        self._round_signals: List[TurnSignal] = []
+
+    # -------------------------
+    # Per-turn / per-round updates
+    # -------------------------
+    def observe(self, turn: Dict[str, Any]) -> TurnSignal:
+        """Record a completed turn and return its signal."""
+        agent = turn["agent"]
+        vec = embed_many(self.embedder, [turn.get("text", "")])[0]
+        previous = self._vectors.setdefault(agent, [])
+        novelty = 1.0 - float(np.max(np.asarray(previous) @ vec)) if previous else 1.0
+
+        position = self._positions.get(agent)
+        n = len(previous)
+        updated = vec if position is None else (position * n + vec) / (n + 1)
+        drift = 1.0 if position is None else 1.0 - _cosine(position, updated)
+        previous.append(vec)
+        self._positions[agent] = updated
+
+        signal = TurnSignal(agent=agent, round=int(turn.get("round", 0)), novelty=round(novelty, 4),
+                            drift=round(drift, 4), redundant=novelty < self.novelty_threshold)
+        self._last_turn[agent] = len(self.signals)
+        self.signals.append(signal)
+        self._round_signals.append(signal)
+        self.report.turns += 1
+        return signal
+
+    def end_round(self) -> bool:
+        """Close a round; True if the debate has converged and should stop."""
+        self.report.rounds_run += 1
+        settled = bool(self._round_signals) and all(
+            s.redundant and s.drift < self.drift_threshold for s in self._round_signals)
+        self._round_signals = []
+        self._quiet_rounds = self._quiet_rounds + 1 if settled else 0
+        if self.report.rounds_run >= self.min_rounds and self._quiet_rounds >= self.patience:
+            if self.report.rounds_run < self._rounds:
+                self._stop("converged")
+            return True
+        return False
+
+    def speakers(self, agents, round_index: int) -> list:
+        """The agents that should speak in round round_index (0-based); skips are counted."""
+        if not self.skip_redundant or round_index < self.min_rounds:
+            return list(agents)
+        speaking = [a for a in agents if not self._stale(a.name)]
+        for agent in agents:
+            if agent not in speaking:
+                self.report.skipped[agent.name] = self.report.skipped.get(agent.name, 0) + 1
+        if not speaking:
+            self._stop("all speakers redundant")
+        return speaking
+
+    def _stale(self, name: str) -> bool:
+        """Last turn repeated itself and nobody has said anything new since."""
+        last = self._last_turn.get(name)
+        if last is None or not self.signals[last].redundant:
+            return False
+        return all(s.redundant for s in self.signals[last + 1:])
+
+    def _stop(self, reason: str) -> None:
+        self.report.stopped_early = True
+        self.report.reason = reason
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / denom if denom else 1.0
@@ -1,27 +1,59 @@
+import queue
+import threading
+from contextlib import closing
+
+from backend.concurrency import bounded_imap, shared_executor
+from backend.context import DEFAULT_CONTEXT_TOKENS, TranscriptContext
+from backend.convergence import ConvergenceMonitor
+
+_END_OF_TURN = object()
+
+
 class DebateEngine:
-    def __init__(self, agents, client, rounds=3, memory_enabled=True):
+    def __init__(self, agents, client, rounds=3, memory_enabled=True,
+                 simultaneous=False, max_concurrency=4, context_tokens=DEFAULT_CONTEXT_TOKENS,
+                 convergence=None):
         self.agents = agents
         self.client = client
         self.rounds = rounds
         self.memory_enabled = memory_enabled
+        # Simultaneous rounds: every agent answers the previous round's transcript
+        # concurrently instead of seeing the turns earlier in its own round.
+        self.simultaneous = simultaneous
+        self.max_concurrency = max_concurrency
+        # Rolling prompt window shared by all agents; kept after the run so
+        # voting can reuse it instead of re-formatting the transcript.
+        self.context_tokens = context_tokens
+        self.context = None
+        # Early termination: a ConvergenceMonitor (or True for the defaults)
+        # skips redundant speakers and ends the debate once positions settle.
+        self.convergence = ConvergenceMonitor() if convergence is True else convergence or None
 
     def run(self, topic):
         """Standard debate run (returns full transcript at once)."""
-        transcript = []
-        for r in range(self.rounds):
-            for agent in self.agents:
-                text = agent.speak(self.client, topic, transcript, memory_enabled=self.memory_enabled)
-                turn = {"agent": agent.name, "role": agent.role, "text": text, "round": r+1}
-                transcript.append(turn)
-        return transcript
+        return list(self.run_streaming(topic))
 
-    def run_streaming(self, topic):
-        """Streaming debate run (yields each agent's turn dynamically)."""
+    def run_streaming(self, topic, token_stream=False):
+        """
+        Streaming debate run (yields each agent's turn dynamically).
+        With token_stream=True, each turn record is preceded by partial deltas
+        {"type": "delta", "agent", "role", "round", "delta"} as text arrives.
+        """
         transcript = []
+        self.context = TranscriptContext(max_tokens=self.context_tokens)
+        monitor = self.convergence
+        if monitor is not None:
+            monitor.reset(self.agents, self.rounds)
+        speak_round = self._stream_round if token_stream else self._speak_round
         for r in range(self.rounds):
-            for agent in self.agents:
-                # Each agent speaks
-                text = agent.speak(self.client, topic, transcript, memory_enabled=self.memory_enabled)
+            agents = self.agents if monitor is None else monitor.speakers(self.agents, r)
+            if not agents:
+                break
+            for agent, delta, text in speak_round(topic, transcript, agents):
+                if delta is not None:
+                    yield {"type": "delta", "agent": agent.name, "role": agent.role,
+                           "round": r + 1, "delta": delta}
+                    continue
 
                 # Build turn record
                 turn = {
@@ -31,6 +63,97 @@ class DebateEngine:
                     "round": r + 1
                 }
                 transcript.append(turn)
+                self.context.append(turn)
+                if monitor is not None:
+                    monitor.observe(turn)
 
                 # Yield this turn immediately
                 yield turn
+
+            if monitor is not None and monitor.end_round():
+                break
+
+    def _speak_round(self, topic, transcript, agents):
+        """Yield (agent, None, text) for one round, always in agent order."""
+        if not self.simultaneous:
+            for agent in agents:
+                yield agent, None, agent.speak(self.client, topic, transcript, memory_enabled=self.memory_enabled,
+                                               context=self.context)
+            return
+
+        snapshot = list(transcript)
+        snapshot_context = self.context.render()
+
+        def speak(agent):
+            return agent.speak(self.client, topic, snapshot, memory_enabled=self.memory_enabled,
+                               context=snapshot_context)
+
+        for agent, text in zip(agents, bounded_imap(speak, agents, self.max_concurrency)):
+            yield agent, None, text
+
+    def _stream_round(self, topic, transcript, agents):
+        """
+        Yield (agent, delta, None) while an agent's text streams in, then
+        (agent, None, text) when its turn is complete, in agent order.
+        """
+        if not self.simultaneous:
+            for agent in agents:
+                chunks = []
+                for delta in agent.speak_stream(self.client, topic, transcript,
+                                                memory_enabled=self.memory_enabled, context=self.context):
+                    chunks.append(delta)
+                    yield agent, delta, None
+                yield agent, None, "".join(chunks).strip()
+            return
+
+        # Every agent streams concurrently into its own queue; queues are
+        # drained in agent order, so the first speaker is shown live and the
+        # others' already-buffered text follows without waiting. At most
+        # max_concurrency pumps run at once: each finished pump submits the
+        # next, so waiting agents never hold a shared pool thread. Once the
+        # caller stops draining, stop makes running pumps close their streams.
+        snapshot = list(transcript)
+        snapshot_context = self.context.render()
+        queues = [queue.Queue() for _ in agents]
+        waiting = iter(zip(agents, queues))
+        waiting_lock = threading.Lock()
+        stop = threading.Event()
+
+        def start_next():
+            with waiting_lock:
+                nxt = next(waiting, None)
+            if nxt is not None and not stop.is_set():
+                shared_executor().submit(pump, *nxt)
+
+        def pump(agent, q):
+            try:
+                stream = agent.speak_stream(self.client, topic, snapshot,
+                                            memory_enabled=self.memory_enabled, context=snapshot_context)
+                with closing(stream):
+                    for delta in stream:
+                        if stop.is_set():
+                            return
+                        q.put(delta)
+                q.put(_END_OF_TURN)
+            except BaseException as e:
+                q.put(e)
+            finally:
+                start_next()
+
+        for _ in range(max(1, self.max_concurrency)):
+            start_next()
+
+        try:
+            for agent, q in zip(agents, queues):
+                chunks = []
+                while True:
+                    item = q.get()
+                    if item is _END_OF_TURN:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    chunks.append(item)
+                    yield agent, item, None
+                yield agent, None, "".join(chunks).strip()
+        finally:
+            stop.set()
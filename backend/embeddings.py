@@ -0,0 +1,206 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Embedder = Callable[[str], Any]
+
+DEFAULT_EMBED_DIM = 384
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """
+    CPU-only default embedder: hashed word and character n-grams folded into
+    a fixed-size, L2-normalised float32 vector. No model download and no
+    fitted state, so vectors are stable across processes and restarts.
+    Inner product of two embeddings is their cosine similarity.
+    """
+
+    def __init__(self, dim: int = DEFAULT_EMBED_DIM, char_ngrams: Sequence[int] = (3, 4),
+                 word_weight: float = 2.0):
+        self.dim = int(dim)
+        self.char_ngrams = tuple(char_ngrams)
+        self.word_weight = float(word_weight)
+
+    def __call__(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+                # Low bits pick the slot, the top bit the sign, so collisions tend to cancel
+                out[row, h % self.dim] += weight if h >> 63 else -weight
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+    def _features(self, text: str):
+        words = _TOKEN.findall(text.lower())
+        for w in words:
+            yield "w:" + w, self.word_weight
+        for w in words:
+            padded = f" {w} "
+            for n in self.char_ngrams:
+                for i in range(max(1, len(padded) - n + 1)):
+                    yield "c:" + padded[i:i + n], 1.0
+
+
+class SentenceTransformerEmbedder:
+    """Optional local model embedder (requires the sentence-transformers package)."""
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", device: str = "cpu"):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name, device=device)
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+
+    def __call__(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        return np.asarray(self.model.encode(list(texts), normalize_embeddings=True), dtype=np.float32)
+
+
+def embed_many(embedder: Embedder, texts: Sequence[str]) -> np.ndarray:
+    """
+    Embed a batch as an (n, dim) float32 matrix of unit vectors. Uses the
+    embedder's own embed_many when it has one, else calls it per text.
+    """
+    if hasattr(embedder, "embed_many"):
+        vecs = np.asarray(embedder.embed_many(list(texts)), dtype=np.float32)
+    else:
+        vecs = np.vstack([np.asarray(embedder(t), dtype=np.float32).reshape(1, -1) for t in texts])
+    vecs = np.ascontiguousarray(vecs.reshape(len(texts), -1))
+    norms = np.linalg.norm(vecs, axis=1, keepdims=True)
+    np.divide(vecs, norms, out=vecs, where=norms > 0)
+    return vecs
+
+
+def embed_query(embedder: Embedder, text: str) -> np.ndarray:
+    """(1, dim) unit vector for a search query, memoised if the embedder supports it."""
+    if hasattr(embedder, "embed_query"):
+        return np.asarray(embedder.embed_query(text), dtype=np.float32).reshape(1, -1)
+    return embed_many(embedder, [text])
+
+
+class BatchingEmbedder:
+    """
+    Micro-batching front for an embedder. Texts submitted from any thread are
+    queued and a single worker thread embeds them in batches of up to
+    max_batch, waiting at most max_wait seconds after the first queued text
+    for others to arrive. Concurrent saves and recalls from several agents
+    therefore share one embedder call instead of making one each.
+
+    Query embeddings are also memoised (LRU of memo_size texts), so the same
+    debate topic is embedded once rather than on every turn by every agent.
+    """
+
+    def __init__(self, embedder: Embedder, max_batch: int = 64, max_wait: float = 0.005,
+                 memo_size: int = 1024):
+        self.embedder = embedder
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, float(max_wait))
+        self.memo_size = int(memo_size)
+        self.dim = getattr(embedder, "dim", None)
+        self._queue: List[Tuple[str, Future]] = []
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._memo: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memo_lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+        self.batches = 0
+        self.texts = 0
+        self.memo_hits = 0
+
+    def __call__(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        futures = self.submit(texts)
+        return np.vstack([f.result() for f in futures]) if futures else np.zeros((0, self.dim or 0), np.float32)
+
+    def embed_query(self, text: str) -> np.ndarray:
+        with self._memo_lock:
+            vec = self._memo.get(text)
+            if vec is not None:
+                self._memo.move_to_end(text)
+                self.memo_hits += 1
+                return vec
+            # Agents recalling the same topic at once share one in-flight embedding
+            future = self._inflight.get(text)
+            owner = future is None
+            if owner:
+                future = self._inflight[text] = self.submit([text])[0]
+        if not owner:
+            return future.result()
+        try:
+            vec = future.result()
+            vec.setflags(write=False)
+            with self._memo_lock:
+                self._memo[text] = vec
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+            return vec
+        finally:
+            with self._memo_lock:
+                self._inflight.pop(text, None)
+
+    def submit(self, texts: Sequence[str]) -> List[Future]:
+        """Queue texts for embedding; each future resolves to its (dim,) vector."""
+        futures = [Future() for _ in texts]
+        with self._cond:
+            self._queue.extend(zip(texts, futures))
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="echomind-embed", daemon=True)
+                self._worker.start()
+            self._cond.notify()
+        return futures
+
+    def stats(self) -> dict:
+        return {"batches": self.batches, "texts": self.texts, "memo_hits": self.memo_hits,
+                "avg_batch": self.texts / self.batches if self.batches else 0.0}
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                # Give other threads max_wait to join this batch unless it is already full
+                deadline = time.monotonic() + self.max_wait
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._queue = self._queue[:self.max_batch], self._queue[self.max_batch:]
+            try:
+                vecs = embed_many(self.embedder, [text for text, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(batch)
+            for (_, future), vec in zip(batch, vecs):
+                future.set_result(vec)
+
+
+def get_embedder(spec: Union[str, Embedder, None] = None) -> Embedder:
+    """Resolve "hashing" (default), "st:<model name>" or any callable to an embedder."""
+    if spec is None or spec == "hashing":
+        return HashingEmbedder()
+    if callable(spec):
+        return spec
+    if isinstance(spec, str) and spec.startswith("st:"):
+        return SentenceTransformerEmbedder(spec[3:])
+    raise ValueError(f"Unknown embedder: {spec!r}")
+
@@ -0,0 +1,190 @@
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Union
+
+AGENT_NAME_RE = re.compile(r"\bAgent_\d+\b")
+
+LatencySpec = Union[float, str, Callable[[random.Random], float], None]
+
+
+def latency_sampler(spec: LatencySpec) -> Callable[[random.Random], float]:
+    """
+    Per-call latency in seconds from a spec:
+
+    - a number (or "0.2"): constant
+    - "uniform:low,high"
+    - "normal:mean,sd" (clipped at 0)
+    - "lognormal:median,sigma": the usual long-tailed provider profile
+    - "exp:mean"
+    - any callable taking a random.Random
+    """
+    if spec is None:
+        return lambda rng: 0.0
+    if callable(spec):
+        return spec
+    if isinstance(spec, (int, float)):
+        value = float(spec)
+        return lambda rng: value
+    kind, _, params = str(spec).partition(":")
+    if not params:
+        value = float(kind)
+        return lambda rng: value
+    args = [float(x) for x in params.split(",")]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(args[0], args[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1]))
+    if kind == "lognormal":
+        mu = math.log(args[0]) if args[0] > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, args[1]) if args[0] > 0 else 0.0
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1.0 / args[0]) if args[0] > 0 else 0.0
+    raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+
+class FakeAPIError(Exception):
+    """Injected provider error carrying an HTTP status like openai.APIStatusError."""
+
+    def __init__(self, status_code: int, retry_after: Optional[float] = None):
+        super().__init__(f"fake provider error {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = SimpleNamespace(status_code=status_code, headers=headers)
+
+
+class FakeLLMClient:
+    """
+    Offline stand-in for openai.OpenAI exposing chat.completions.create.
+
+    Replies are deterministic for a given prompt and seed and are shaped like
+    what the engines parse (VOTE: / FINAL DECISION: lines, JSON ranked
+    ballots), so the debate, consensus and judge pipelines run end to end
+    without network access.
+
+    latency is a latency_sampler spec (constant seconds, or e.g.
+    "lognormal:0.4,0.5") slept per call to mimic the provider round-trip;
+    with tokens_per_second the reply also takes its generation time, and
+    stream=True yields it word by word at that rate. Errors are injected per
+    call: error_rate of FakeAPIError(error_status), plus error_mix
+    {status: rate} for several statuses and timeout_rate of TimeoutError.
+    retry_after is sent with injected errors. stats() reports calls, errors
+    and the simulated seconds slept, so callers can separate framework
+    overhead from modelled provider time. See backend/fake_llm_server.py for
+    the same client behind a local OpenAI-compatible HTTP endpoint.
+    """
+
+    def __init__(self, latency: LatencySpec = 0.0, seed: int = 0, error_rate: float = 0.0,
+                 error_status: int = 429, tokens_per_second: Optional[float] = None,
+                 error_mix: Optional[Dict[int, float]] = None, timeout_rate: float = 0.0,
+                 retry_after: Optional[float] = None):
+        self.latency = latency
+        self._sample_latency = latency_sampler(latency)
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self.error_rate = float(error_rate)
+        self.error_status = error_status
+        self.error_mix = dict(error_mix or {})
+        if self.error_rate:
+            self.error_mix[error_status] = self.error_mix.get(error_status, 0.0) + self.error_rate
+        self.timeout_rate = float(timeout_rate)
+        self.retry_after = retry_after
+        self.calls = 0
+        self.errors = 0
+        self.errors_by_status: Dict[str, int] = {}
+        self.simulated_seconds = 0.0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model: str, messages: List[Dict[str, str]],
+               max_tokens: Optional[int] = None, **kwargs: Any) -> Any:
+        with self._lock:
+            self.calls += 1
+            latency = self._sample_latency(self._rng)
+            failure = self._draw_failure()
+            if failure is not None:
+                self.errors += 1
+                self.errors_by_status[str(failure)] = self.errors_by_status.get(str(failure), 0) + 1
+        self._sleep(latency)
+        if failure == "timeout":
+            raise TimeoutError("fake provider timed out")
+        if failure is not None:
+            raise FakeAPIError(failure, retry_after=self.retry_after)
+        content = self.reply(messages, max_tokens or 300)
+        if kwargs.get("stream"):
+            return self._stream(model, content)
+        if self.tokens_per_second:
+            self._sleep(len(content.split(" ")) / self.tokens_per_second)
+        prompt_tokens = sum(len(m.get("content", "")) // 4 for m in messages)
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(index=0, finish_reason="stop",
+                                     message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                                  total_tokens=prompt_tokens + completion_tokens),
+        )
+
+    def _draw_failure(self) -> Union[int, str, None]:
+        """Under self._lock: the injected failure for this call, if any."""
+        if not self.error_mix and not self.timeout_rate:
+            return None
+        draw = self._rng.random()
+        if draw < self.timeout_rate:
+            return "timeout"
+        draw -= self.timeout_rate
+        for status, rate in self.error_mix.items():
+            if draw < rate:
+                return int(status)
+            draw -= rate
+        return None
+
+    def _sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            with self._lock:
+                self.simulated_seconds += seconds
+            time.sleep(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"calls": self.calls, "errors": self.errors, "errors_by_status": dict(self.errors_by_status),
+                    "simulated_seconds": self.simulated_seconds}
+
+    def _stream(self, model: str, content: str) -> Any:
+        delay = 1.0 / self.tokens_per_second if self.tokens_per_second else 0.0
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            self._sleep(delay)
+            delta = word if i == 0 else " " + word
+            yield SimpleNamespace(model=model, choices=[SimpleNamespace(
+                index=0, delta=SimpleNamespace(content=delta),
+                finish_reason="stop" if i == len(words) - 1 else None)])
+
+    # -------------------------
+    # Canned replies
+    # -------------------------
+    def reply(self, messages: List[Dict[str, str]], max_tokens: int) -> str:
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        digest = int(hashlib.md5(f"{self.seed}:{prompt}".encode("utf-8")).hexdigest(), 16)
+        names = sorted(set(AGENT_NAME_RE.findall(prompt))) or ["Agent_1"]
+        pick = names[digest % len(names)]
+
+        if '"ranking"' in prompt:
+            ranking = list(names)
+            random.Random(digest).shuffle(ranking)
+            return json.dumps({"ranking": ranking,
+                               "justification": f"{ranking[0]} gave the most consistent argument."})
+        if "VOTE:" in prompt:
+            return f"VOTE: {pick}\nJustification: {pick} gave the most consistent argument."
+        if "FINAL DECISION" in prompt:
+            return f"FINAL DECISION: {pick}\nJustification: {pick} was the most factually grounded."
+        words = ["evidence", "suggests", "that", "the", "trade-off", "depends", "on", "context",
+                 "and", "we", "should", "weigh", "costs", "against", "benefits"]
+        n = max(8, min(max_tokens // 2, 60))
+        return " ".join(words[(digest >> i) % len(words)] for i in range(n)).capitalize() + "."
@@ -0,0 +1,157 @@
+"""
+FakeLLMClient behind a local OpenAI-compatible HTTP endpoint, so the real
+openai client (HTTP, JSON, SSE streaming, retries) can be exercised offline:
+
+    python -m backend.fake_llm_server --port 8011 --latency lognormal:0.4,0.5 --error-rate 0.02
+
+then point OpenAI(base_url="http://127.0.0.1:8011/v1", api_key="fake") at it.
+Serves POST /v1/chat/completions (stream=true as server-sent events) and
+GET /v1/models. Injected errors come back with their HTTP status and an
+OpenAI-style error body; injected timeouts as 504.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from backend.fake_llm import FakeAPIError, FakeLLMClient
+
+
+class FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY each
+    # response waits out a delayed ACK (~40 ms) and dwarfs the framework.
+    disable_nagle_algorithm = True
+    server_version = "EchoMindFakeLLM/1.0"
+
+    @property
+    def client(self) -> FakeLLMClient:
+        return self.server.fake_client
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if getattr(self.server, "verbose", False):
+            super().log_message(format, *args)
+
+    def do_GET(self) -> None:
+        if self.path.rstrip("/").endswith("/models"):
+            self._json(200, {"object": "list", "data": [{"id": "fake", "object": "model", "owned_by": "echomind"}]})
+        else:
+            self._error(404, "not found", "invalid_request_error")
+
+    def do_POST(self) -> None:
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._error(404, "not found", "invalid_request_error")
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._error(400, "invalid JSON body", "invalid_request_error")
+            return
+
+        model = body.get("model", "fake")
+        stream = bool(body.get("stream"))
+        try:
+            resp = self.client.create(model=model, messages=body.get("messages", []),
+                                      max_tokens=body.get("max_tokens"), stream=stream)
+        except FakeAPIError as e:
+            self._error(e.status_code, str(e), "rate_limit_error" if e.status_code == 429 else "api_error",
+                        retry_after=e.response.headers.get("retry-after"))
+            return
+        except TimeoutError as e:
+            self._error(504, str(e), "timeout")
+            return
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        if stream:
+            self._stream(resp, completion_id, created, model)
+            return
+        choice = resp.choices[0]
+        self._json(200, {
+            "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+            "choices": [{"index": 0, "finish_reason": choice.finish_reason,
+                         "message": {"role": "assistant", "content": choice.message.content}}],
+            "usage": vars(resp.usage),
+        })
+
+    def _stream(self, chunks, completion_id: str, created: int, model: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            for chunk in chunks:
+                choice = chunk.choices[0]
+                data = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                        "choices": [{"index": 0, "delta": {"content": choice.delta.content},
+                                     "finish_reason": choice.finish_reason}]}
+                self.wfile.write(f"data: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away mid-stream
+
+    def _json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _error(self, status: int, message: str, kind: str, retry_after: Optional[str] = None) -> None:
+        headers = {"Retry-After": retry_after} if retry_after is not None else None
+        self._json(status, {"error": {"message": message, "type": kind, "code": status}}, headers)
+
+
+def start_server(client: Optional[FakeLLMClient] = None, host: str = "127.0.0.1", port: int = 0,
+                 verbose: bool = False, **client_kwargs: Any) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Serve client (or FakeLLMClient(**client_kwargs)) on a daemon thread.
+    port=0 picks a free port. Returns (server, base_url); server.shutdown() stops it.
+    """
+    server = ThreadingHTTPServer((host, port), FakeLLMHandler)
+    server.daemon_threads = True
+    server.fake_client = client or FakeLLMClient(**client_kwargs)
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, name="fake-llm-server", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8011)
+    parser.add_argument("--latency", default="0", help='seconds, or e.g. "lognormal:0.4,0.5", "uniform:0.1,0.3"')
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_server(host=args.host, port=args.port, verbose=args.verbose,
+                                    latency=args.latency, tokens_per_second=args.tokens_per_second,
+                                    error_rate=args.error_rate, error_status=args.error_status,
+                                    timeout_rate=args.timeout_rate, retry_after=args.retry_after, seed=args.seed)
+    print(f"fake OpenAI-compatible endpoint at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(server.fake_client.stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+from sklearn.preprocessing import normalize
+
+N_FEATURES = 2 ** 18
+
+# Rows of the similarity product computed at once; bounds memory to about
+# block_rows x turns similarities however long the transcript is.
+DEFAULT_BLOCK_ROWS = 2048
+
+
+@dataclass
+class InfluenceGraph:
+    """
+    Which earlier turns each turn responds to, and who that makes influential.
+
+    turn_edges holds (source turn, responding turn, similarity) triples. The
+    agent graph sums them into agent_edges[(source agent, responder)].
+    pagerank / authorities score agents whose arguments others take up;
+    hubs score agents who respond to many influential arguments.
+    turn_pagerank is the same PageRank over individual turns.
+    """
+    agents: List[str]
+    turn_agents: List[str]
+    turn_edges: List[Tuple[int, int, float]]
+    agent_edges: Dict[Tuple[str, str], float]
+    pagerank: Dict[str, float]
+    hubs: Dict[str, float]
+    authorities: Dict[str, float]
+    turn_pagerank: np.ndarray = field(repr=False)
+
+    def ranking(self) -> List[Tuple[str, float]]:
+        return sorted(self.pagerank.items(), key=lambda x: x[1], reverse=True)
+
+    def to_networkx(self, transcript: Optional[Sequence[Dict[str, Any]]] = None):
+        """
+        Agent-level DiGraph (source -> responder, weight = summed similarity,
+        node pagerank / hub / authority). With transcript, a turn-level graph
+        instead, nodes carrying agent, round and text.
+        """
+        import networkx as nx
+
+        G = nx.DiGraph()
+        if transcript is None:
+            for agent in self.agents:
+                G.add_node(agent, pagerank=self.pagerank.get(agent, 0.0), hub=self.hubs.get(agent, 0.0),
+                           authority=self.authorities.get(agent, 0.0))
+            for (src, dst), weight in self.agent_edges.items():
+                G.add_edge(src, dst, weight=float(weight))
+            return G
+        for i, turn in enumerate(transcript):
+            G.add_node(i, agent=turn["agent"], round=int(turn.get("round", 0)), text=turn.get("text", ""),
+                       pagerank=float(self.turn_pagerank[i]))
+        for src, dst, weight in self.turn_edges:
+            G.add_edge(src, dst, weight=float(weight))
+        return G
+
+
+def _vectorizer(n_features: int) -> HashingVectorizer:
+    return HashingVectorizer(n_features=n_features, alternate_sign=False, norm=None,
+                             stop_words="english", dtype=np.float32)
+
+
+def turn_vectors(texts: Sequence[str], n_features: int = N_FEATURES) -> sparse.csr_matrix:
+    """Hashed TF-IDF rows (sublinear tf, IDF over these texts, L2-normalised)."""
+    X = _vectorizer(n_features).transform(list(texts)).tocsr()
+    np.log1p(X.data, out=X.data)
+    df = np.bincount(X.indices, minlength=n_features)
+    idf = (np.log((1 + X.shape[0]) / (1 + df)) + 1).astype(np.float32)
+    X.data *= idf[X.indices]
+    return normalize(X, copy=False)
+
+
+def response_matrix(X: sparse.csr_matrix, speakers: np.ndarray, sessions: Optional[np.ndarray] = None,
+                    top_k: int = 3, min_similarity: float = 0.1, exclude_self: bool = True,
+                    window: Optional[int] = None, block_rows: int = DEFAULT_BLOCK_ROWS) -> sparse.csr_matrix:
+    """
+    R[j, i] = similarity of turn j to earlier turn i, keeping each turn's
+    top_k earlier turns at or above min_similarity. One sparse product per
+    block of rows, against only the columns the block can link to: earlier
+    turns of the same session (when sessions are contiguous) and, with
+    window, at most that many turns back. The speaker's own turns are
+    dropped unless exclude_self is False.
+    """
+    n = X.shape[0]
+    idx = np.arange(n)
+    lower = np.zeros(n, dtype=np.int64)
+    if sessions is not None and n:
+        changed = np.r_[True, sessions[1:] != sessions[:-1]]
+        if changed.sum() == np.unique(sessions).size:  # contiguous: skip other sessions' columns
+            lower = np.maximum.accumulate(np.where(changed, idx, 0))
+    if window is not None:
+        lower = np.maximum(lower, idx - int(window))
+    rows, cols, vals = [], [], []
+    for start in range(0, n, max(1, block_rows)):
+        stop = min(n, start + block_rows)
+        lo = int(lower[start:stop].min())
+        S = (X[start:stop] @ X[lo:stop].T).tocoo()
+        r, c, v = S.row + start, S.col + lo, S.data
+        keep = (c < r) & (c >= lower[r]) & (v >= min_similarity)
+        if exclude_self:
+            keep &= speakers[r] != speakers[c]
+        if sessions is not None:
+            keep &= sessions[r] == sessions[c]
+        r, c, v = r[keep], c[keep], v[keep]
+        # Top-k per row without a Python loop: sort by (row, -similarity), rank within row
+        order = np.lexsort((-v, r))
+        r, c, v = r[order], c[order], v[order]
+        first = np.searchsorted(r, r, side="left")
+        rank = np.arange(r.size) - first
+        top = rank < top_k
+        rows.append(r[top])
+        cols.append(c[top])
+        vals.append(v[top])
+    if not rows:
+        return sparse.csr_matrix((n, n), dtype=np.float32)
+    return sparse.csr_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))),
+                             shape=(n, n), dtype=np.float32)
+
+
+def pagerank(A: sparse.spmatrix, damping: float = 0.85, tol: float = 1e-10, max_iter: int = 200) -> np.ndarray:
+    """
+    PageRank of a weighted adjacency matrix A[i, j] = weight of i -> j (rank
+    flows along edges, so targets gain); dangling nodes spread uniformly.
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0)
+    A = sparse.csr_matrix(A, dtype=np.float64)
+    out = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out == 0
+    P = sparse.diags(np.divide(1.0, out, out=np.zeros(n), where=~dangling)) @ A
+    x = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        nxt = damping * (P.T @ x + x[dangling].sum() / n) + (1 - damping) / n
+        if np.abs(nxt - x).sum() < tol:
+            return nxt
+        x = nxt
+    return x
+
+
+def hits(A: sparse.spmatrix, tol: float = 1e-10, max_iter: int = 200) -> Tuple[np.ndarray, np.ndarray]:
+    """(hubs, authorities) of a weighted adjacency matrix, each summing to 1."""
+    n = A.shape[0]
+    if n == 0 or A.nnz == 0:
+        return np.full(n, 1.0 / max(n, 1)), np.full(n, 1.0 / max(n, 1))
+    A = sparse.csr_matrix(A, dtype=np.float64)
+    h = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        a = A.T @ h
+        a /= a.sum() or 1.0
+        nxt = A @ a
+        nxt /= nxt.sum() or 1.0
+        if np.abs(nxt - h).sum() < tol:
+            h = nxt
+            break
+        h = nxt
+    a = A.T @ h
+    return h, a / (a.sum() or 1.0)
+
+
+def influence_graph(transcript: Sequence[Dict[str, Any]], top_k: int = 3, min_similarity: float = 0.1,
+                    exclude_self: bool = True, damping: float = 0.85, session_key: str = "session",
+                    window: Optional[int] = None, block_rows: int = DEFAULT_BLOCK_ROWS) -> InfluenceGraph:
+    """
+    Semantic influence analysis of a transcript (turn dicts with agent and
+    text). Turns tagged with session_key only link within their session, so
+    many debates can be analysed in one call; window caps how far back a
+    turn may respond, bounding the cost of very long single sessions.
+    """
+    turn_agents = [t["agent"] for t in transcript]
+    agents = list(dict.fromkeys(turn_agents))
+    index = {a: i for i, a in enumerate(agents)}
+    speakers = np.fromiter((index[a] for a in turn_agents), dtype=np.int64, count=len(turn_agents))
+    sessions = None
+    if any(session_key in t for t in transcript):
+        labels = {}
+        sessions = np.fromiter((labels.setdefault(t.get(session_key), len(labels)) for t in transcript),
+                               dtype=np.int64, count=len(transcript))
+
+    if transcript:
+        X = turn_vectors([t.get("text", "") for t in transcript])
+        R = response_matrix(X, speakers, sessions, top_k=top_k, min_similarity=min_similarity,
+                            exclude_self=exclude_self, window=window, block_rows=block_rows).tocoo()
+    else:
+        R = sparse.coo_matrix((0, 0), dtype=np.float32)
+
+    return _scored_graph(agents, turn_agents, speakers, R, damping)
+
+
+def _scored_graph(agents: List[str], turn_agents: List[str], speakers: np.ndarray, R: sparse.coo_matrix,
+                  damping: float) -> InfluenceGraph:
+    # R[j, i]: j responds to i. Endorsement runs responder -> source, so
+    # PageRank / authority accumulate on the turns and agents taken up.
+    turn_rank = pagerank(R, damping=damping)
+    A = sparse.csr_matrix((R.data.astype(np.float64), (speakers[R.row], speakers[R.col])),
+                          shape=(len(agents), len(agents))) if R.nnz else sparse.csr_matrix((len(agents),) * 2)
+    agent_rank = pagerank(A, damping=damping)
+    hub, authority = hits(A)
+
+    A = A.tocoo()
+    return InfluenceGraph(
+        agents=agents,
+        turn_agents=turn_agents,
+        turn_edges=[(int(i), int(j), float(v)) for j, i, v in zip(R.row, R.col, R.data)],
+        agent_edges={(agents[i], agents[j]): float(v) for j, i, v in zip(A.row, A.col, A.data)},
+        pagerank=dict(zip(agents, agent_rank.tolist())),
+        hubs=dict(zip(agents, hub.tolist())),
+        authorities=dict(zip(agents, authority.tolist())),
+        turn_pagerank=turn_rank,
+    )
+
+
+class InfluenceBuilder:
+    """
+    Influence graph maintained turn by turn, for transcripts that stream in.
+
+    add() links a new turn to its top_k most similar earlier turns (other
+    speakers only unless exclude_self is False, at most window turns back)
+    with one sparse product against the earlier rows; nothing already linked
+    is recomputed. Similarities use the IDF of the turns seen so far, so a
+    turn's links are fixed when it arrives and may differ slightly from the
+    batch influence_graph(), which weighs every turn by the whole transcript.
+    New rows are searched as a pending block and merged into the main
+    matrix only once they reach 1/8 of it. graph(n) scores the first n turns
+    (PageRank / HITS over their edges); the builder is thread-safe.
+    """
+
+    def __init__(self, top_k: int = 3, min_similarity: float = 0.1, exclude_self: bool = True,
+                 damping: float = 0.85, window: Optional[int] = None, n_features: int = N_FEATURES):
+        self.top_k = top_k
+        self.min_similarity = min_similarity
+        self.exclude_self = exclude_self
+        self.damping = damping
+        self.window = window
+        self.n_features = n_features
+        self.turn_agents: List[str] = []
+        self._vectorizer = _vectorizer(n_features)
+        self._speakers: List[int] = []
+        self._agent_index: Dict[str, int] = {}
+        self._edges: List[Tuple[int, int, float]] = []  # (source, responder, similarity), by responder
+        self._matrix = sparse.csr_matrix((0, n_features), dtype=np.float32)
+        self._squared = self._matrix
+        self._pending: List[sparse.csr_matrix] = []
+        self._df = np.zeros(n_features, dtype=np.int64)
+        self._buf = np.zeros(n_features, dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.turn_agents)
+
+    def add(self, turn: Dict[str, Any]) -> None:
+        with self._lock:
+            self._add(turn)
+
+    def sync(self, transcript: Sequence[Dict[str, Any]]) -> None:
+        """Add the turns of transcript not added yet (the builder holds a prefix of it)."""
+        with self._lock:
+            for turn in transcript[len(self.turn_agents):]:
+                self._add(turn)
+
+    def _add(self, turn: Dict[str, Any]) -> None:
+        row = self._vectorizer.transform([turn.get("text", "")]).tocsr()
+        np.log1p(row.data, out=row.data)
+        j = len(self.turn_agents)
+        speaker = self._agent_index.setdefault(turn["agent"], len(self._agent_index))
+        self.turn_agents.append(turn["agent"])
+        self._speakers.append(speaker)
+        np.add.at(self._df, row.indices, 1)
+        if j and row.nnz:
+            self._link(j, row, speaker)
+        self._pending.append(row)
+
+    def _link(self, j: int, row: sparse.csr_matrix, speaker: int) -> None:
+        n_docs = j + 1
+
+        def idf_sq(cols):
+            idf = np.log((1.0 + n_docs) / (1.0 + self._df[cols])) + 1.0
+            return (idf * idf).astype(np.float32)
+
+        # cos(q, d) = sum_t q_t d_t idf_t^2 / (|q * idf| |d * idf|), as in SparseMemoryIndex
+        q_idf_sq = idf_sq(row.indices)
+        q_norm = float(np.sqrt(np.dot(row.data * row.data, q_idf_sq)))
+        lo = 0 if self.window is None else max(0, j - int(self.window))
+        found, sims = [], []
+        self._buf[row.indices] = row.data * q_idf_sq
+        try:
+            for first, M, M_sq in self._blocks():
+                hits = np.flatnonzero(M @ self._buf > 0)
+                hits = hits[hits + first >= lo]
+                if hits.size == 0:
+                    continue
+                dots = M[hits] @ self._buf
+                rows = M_sq[hits]
+                row_of = np.repeat(np.arange(hits.size), np.diff(rows.indptr))
+                norms = np.sqrt(np.bincount(row_of, weights=rows.data * idf_sq(rows.indices), minlength=hits.size))
+                found.append(hits + first)
+                sims.append(dots / (norms * q_norm + 1e-12))
+        finally:
+            self._buf[row.indices] = 0.0
+        if not found:
+            return
+        cand, sim = np.concatenate(found), np.concatenate(sims)
+        keep = sim >= self.min_similarity
+        if self.exclude_self:
+            keep &= np.asarray(self._speakers, dtype=np.int64)[cand] != speaker
+        cand, sim = cand[keep], sim[keep]
+        for k in np.lexsort((cand, -sim))[:self.top_k]:
+            self._edges.append((int(cand[k]), j, float(sim[k])))
+
+    def _blocks(self) -> List[Tuple[int, sparse.csr_matrix, sparse.csr_matrix]]:
+        """(first row, rows, squared rows) of the merged matrix and of the rows added since."""
+        pending = sum(r.shape[0] for r in self._pending)
+        if pending and pending >= max(64, self._matrix.shape[0] // 8):
+            self._matrix = sparse.vstack([self._matrix] + self._pending, format="csr")
+            self._squared = self._matrix.multiply(self._matrix).tocsr()
+            self._pending = []
+        blocks = [(0, self._matrix, self._squared)] if self._matrix.shape[0] else []
+        if self._pending:
+            tail = sparse.vstack(self._pending, format="csr") if len(self._pending) > 1 else self._pending[0]
+            self._pending = [tail]
+            blocks.append((self._matrix.shape[0], tail, tail.multiply(tail).tocsr()))
+        return blocks
+
+    def graph(self, n: Optional[int] = None) -> InfluenceGraph:
+        """InfluenceGraph of the first n turns (default: all added so far)."""
+        with self._lock:
+            n = len(self.turn_agents) if n is None else min(int(n), len(self.turn_agents))
+            edges = [e for e in self._edges if e[1] < n]
+            turn_agents = self.turn_agents[:n]
+            speakers = np.asarray(self._speakers[:n], dtype=np.int64)
+        agents = list(dict.fromkeys(turn_agents))
+        if edges:
+            src, dst, sim = zip(*edges)
+            R = sparse.coo_matrix((np.asarray(sim, dtype=np.float32), (dst, src)), shape=(n, n))
+        else:
+            R = sparse.coo_matrix((n, n), dtype=np.float32)
+        return _scored_graph(agents, turn_agents, speakers, R, self.damping)
@@ -0,0 +1,181 @@
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple
+
+TERMINAL_STATES = ("done", "failed")
+
+
+class DebateJob:
+    """
+    One background debate run. Events produced by the pipeline are appended
+    to an in-memory log that any number of async readers can follow from an
+    arbitrary cursor (so a reconnecting SSE client can resume).
+
+    status, phase, progress and result are written by the worker thread and
+    read by request handlers: both sides go through the job lock (start /
+    publish / finish, and state / status_dict for reads).
+    """
+
+    def __init__(self, params: Dict[str, Any], turns_total: int = 0):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = "queued"
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.turns_total = turns_total
+        self.turns_done = 0
+        self.phase = "queued"
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.events: List[Tuple[str, Any]] = []
+        self._lock = threading.Lock()
+        self._subscribers: List[Callable[[], None]] = []
+
+    # -------------------------
+    # Producer side (worker thread)
+    # -------------------------
+    def start(self) -> None:
+        with self._lock:
+            self.status, self.phase, self.started = "running", "debate", time.time()
+
+    def publish(self, event: str, data: Any) -> None:
+        with self._lock:
+            self.events.append((event, data))
+            if event == "turn":
+                self.turns_done += 1
+            self.phase = {"turn": "debate", "votes": "judging", "decision": "finalising"}.get(event, self.phase)
+            subscribers = list(self._subscribers)
+        for notify in subscribers:
+            notify()
+
+    def finish(self, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> None:
+        # Final state and the closing event change together, so a status read
+        # never shows "done" before followers can see the "done" event
+        if status == "done":
+            event = ("done", {"status": status, "result": result})
+        else:
+            event = ("error", {"status": status, "error": error})
+        with self._lock:
+            self.status, self.phase = status, status
+            self.result, self.error = result, error
+            self.finished = time.time()
+            self.events.append(event)
+            subscribers = list(self._subscribers)
+        for notify in subscribers:
+            notify()
+
+    # -------------------------
+    # Consumer side (event loop)
+    # -------------------------
+    async def follow(self, cursor: int = 0, heartbeat: float = 15.0) -> AsyncIterator[Optional[Tuple[int, str, Any]]]:
+        """
+        Yield (index, event, data) from cursor on, waiting for new events until
+        the job finishes. Yields None every heartbeat seconds of silence.
+        """
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        def notify():
+            loop.call_soon_threadsafe(wake.set)
+
+        with self._lock:
+            self._subscribers.append(notify)
+        try:
+            while True:
+                wake.clear()
+                with self._lock:
+                    batch = self.events[cursor:]
+                    finished = bool(self.events) and self.events[-1][0] in ("done", "error")
+                for offset, (event, data) in enumerate(batch):
+                    yield cursor + offset, event, data
+                cursor += len(batch)
+                if finished:
+                    return
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                self._subscribers.remove(notify)
+
+    @property
+    def state(self) -> str:
+        """Current status, read under the lock."""
+        with self._lock:
+            return self.status
+
+    def status_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "job_id": self.id,
+                "status": self.status,
+                "phase": self.phase,
+                "progress": {"turns_done": self.turns_done, "turns_total": self.turns_total},
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+                "error": self.error,
+                "result": self.result,
+            }
+
+
+class JobScheduler:
+    """
+    Runs debate pipelines on a bounded worker pool (max_concurrent debates at
+    once; further jobs wait as "queued"). Finished jobs are kept for lookup
+    until more than max_retained exist, oldest evicted first.
+    """
+
+    def __init__(self, max_concurrent: int = 4, max_retained: int = 500):
+        self.max_concurrent = max_concurrent
+        self.max_retained = max_retained
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="echomind-job")
+        self._jobs: "OrderedDict[str, DebateJob]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, params: Dict[str, Any], pipeline: Callable[[], Iterable[Tuple[str, Any]]],
+               turns_total: int = 0) -> DebateJob:
+        """pipeline() is called on a worker thread and must yield (event, data) pairs."""
+        job = DebateJob(params, turns_total)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._evict()
+        self._executor.submit(self._run, job, pipeline)
+        return job
+
+    def get(self, job_id: str) -> Optional[DebateJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {"queued": 0, "running": 0, "done": 0, "failed": 0}
+        for job in jobs:
+            state = job.state
+            counts[state] = counts.get(state, 0) + 1
+        return counts
+
+    def _run(self, job: DebateJob, pipeline: Callable[[], Iterable[Tuple[str, Any]]]) -> None:
+        job.start()
+        result = None
+        try:
+            for event, data in pipeline():
+                if event == "result":
+                    result = data
+                else:
+                    job.publish(event, data)
+            job.finish("done", result=result)
+        except Exception as e:
+            job.finish("failed", error=f"{type(e).__name__}: {e}")
+
+    def _evict(self) -> None:
+        excess = len(self._jobs) - self.max_retained
+        for job_id in [jid for jid, j in self._jobs.items() if j.state in TERMINAL_STATES][:max(0, excess)]:
+            del self._jobs[job_id]
@@ -1,9 +1,19 @@
 import re
+from collections import Counter
+from contextlib import closing
+
+from backend.concurrency import bounded_map, iter_bounded, pool_timeout
+from backend.llm_client import chat_completion
+from backend.context import TranscriptContext
+
 
 class JudgeAgent:
-    def __init__(self, client, model="mistral-tiny"):
+    def __init__(self, client, model="mistral-tiny", max_concurrency=8, call_timeout=60.0):
         self.client = client
         self.model = model
+        # Judge panels and cross-judging fan out on the shared LLM pool
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
 
     # -------------------------
     # Baseline: LLM-as-a-Judge
@@ -15,7 +25,7 @@ class JudgeAgent:
         system_msg = f"You are the impartial Judge of a debate on '{topic}'. Evaluate transcript + votes and declare FINAL DECISION."
         user_msg = f"Transcript:\n{transcript_text}\n\nVotes:\n{votes_text}\n\nIssue your ruling."
 
-        resp = self.client.chat.completions.create(
+        resp = chat_completion(self.client,
             model=self.model,
             messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": user_msg}],
             max_tokens=300
@@ -29,47 +39,70 @@ class JudgeAgent:
         transcript_text = "\n".join([f"{t['agent']}: {t['text']}" for t in transcript[-30:]])
         votes_text = "\n".join([f"{v['agent']} voted {v['vote']}" for v in votes])
 
-        decisions = []
-        for i in range(num_judges):
+        def judge(i):
             system_msg = f"You are Judge #{i+1} in a debate on '{topic}'. Evaluate and issue FINAL DECISION."
             user_msg = f"Transcript:\n{transcript_text}\n\nVotes:\n{votes_text}\n\nIssue your ruling."
-            resp = self.client.chat.completions.create(
+            resp = chat_completion(self.client,
                 model=self.model,
                 messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": user_msg}],
-                max_tokens=200
+                max_tokens=200,
+                timeout=self.call_timeout
             )
             decision_text = resp.choices[0].message.content.strip()
             match = re.search(r"FINAL DECISION:\s*(\w+)", decision_text)
-            final = match.group(1) if match else decision_text
-            decisions.append(final)
+            return match.group(1) if match else decision_text
 
-        # Aggregate decision (majority among judges)
-        from collections import Counter
-        tally = Counter(decisions)
-        return tally.most_common(1)[0][0]
+        # Aggregate decision (majority among judges). Stop as soon as one
+        # decision has a strict majority; judges not yet started are cancelled.
+        tally = Counter()
+        decisions = {}
+        errors = []
+        majority = num_judges // 2 + 1
+        timeout = pool_timeout(self.call_timeout)
+        with closing(iter_bounded(judge, range(num_judges), self.max_concurrency, timeout)) as results:
+            for i, fut in results:
+                if fut.exception() is not None:
+                    errors.append(fut.exception())
+                    continue
+                decisions[i] = fut.result()
+                tally[decisions[i]] += 1
+                if tally[decisions[i]] >= majority:
+                    return decisions[i]
+        if not decisions:
+            raise errors[0]
+        # No majority: break ties by judge order, not by which judge finished first
+        return Counter(decisions[i] for i in sorted(decisions)).most_common(1)[0][0]
 
     # -------------------------
     # Cross-Judging: Agents critique Judge
     # -------------------------
     def cross_judging(self, client, agents, topic, judge_decision, transcript):
-        critiques = []
-        for agent in agents:
+        transcript_text = TranscriptContext.from_transcript(transcript[-10:]).render()
+
+        def critique(agent):
             prompt = f"""
             Debate Topic: '{topic}'
             Judge's Decision: {judge_decision}
-            Transcript: {transcript[-10:]}
+            Transcript:
+            {transcript_text}
             
             As {agent.name}, critique the Judge's ruling.
             Do you agree or disagree? Provide 2-3 sentences.
             """
-            resp = client.chat.completions.create(
+            resp = chat_completion(client,
                 model=agent.model,
                 messages=[{"role": "system", "content": prompt}],
-                max_tokens=120
+                max_tokens=120,
+                timeout=self.call_timeout
             )
-            critique = resp.choices[0].message.content.strip()
-            critiques.append({"agent": agent.name, "critique": critique})
-        return critiques
+            return {"agent": agent.name, "critique": resp.choices[0].message.content.strip()}
+
+        def timed_out(agent, exc):
+            if not isinstance(exc, TimeoutError):
+                raise exc
+            return {"agent": agent.name, "critique": "(no critique: timed out)"}
+
+        return bounded_map(critique, agents, self.max_concurrency, timeout=pool_timeout(self.call_timeout), fallback=timed_out)
 
     # -------------------------
     # Adversarial Adjudication
@@ -90,7 +123,7 @@ class JudgeAgent:
 
         user_msg = f"Transcript:\n{transcript_text}\n\nVotes:\n{votes_text}\n\nNow issue your ruling."
 
-        resp = self.client.chat.completions.create(
+        resp = chat_completion(self.client,
             model=self.model,
             messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": user_msg}],
             max_tokens=300
@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+# Request fields that determine the completion; everything else (timeouts,
+# cache flags) is ignored when computing the key.
+KEY_FIELDS = ("model", "messages", "max_tokens", "temperature", "response_format")
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of chat completions for deterministic replays.
+
+    Two tiers: an in-memory LRU of max_entries responses and, when path is
+    given, a SQLite table capped at max_disk_entries (least recently used
+    rows are evicted in batches). Entries older than ttl seconds are treated
+    as misses and dropped.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 1024,
+                 max_disk_entries: int = 100_000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max(1, int(max_entries))
+        self.max_disk_entries = max(1, int(max_disk_entries))
+        self.ttl = ttl
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypassed": 0, "stores": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        self._disk_count = 0
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("""CREATE TABLE IF NOT EXISTS responses (
+                                    key TEXT PRIMARY KEY, value TEXT NOT NULL,
+                                    created REAL NOT NULL, accessed REAL NOT NULL)""")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+            self._db.commit()
+            self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    # -------------------------
+    # Keys
+    # -------------------------
+    @staticmethod
+    def key(request: Dict[str, Any]) -> str:
+        payload = {k: request.get(k) for k in KEY_FIELDS}
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # -------------------------
+    # Lookup / store
+    # -------------------------
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            hit = self._memory.get(key)
+            if hit is not None:
+                created, value = hit
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    if not self._expired(row[1], now):
+                        self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        value = json.loads(row[0])
+                        self._remember(key, row[1], value)
+                        self._stats["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    self._disk_count -= 1
+
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._stats["stores"] += 1
+            if self._db is None:
+                return
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(value, ensure_ascii=False), now, now))
+            self._disk_count += 1  # approximate (replacements count too); recounted on eviction
+            if self._disk_count > self.max_disk_entries * 1.1:
+                # Evict down to the cap in one batch rather than per insert
+                self._db.execute("""DELETE FROM responses WHERE key IN (
+                                        SELECT key FROM responses ORDER BY accessed LIMIT ?)""",
+                                 (self._disk_count - self.max_disk_entries,))
+                self._disk_count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            self._db.commit()
+
+    def note_bypass(self) -> None:
+        with self._lock:
+            self._stats["bypassed"] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+                self._disk_count = 0
+
+    def _remember(self, key: str, created: float, value: Dict[str, Any]) -> None:
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    # -------------------------
+    # Stats
+    # -------------------------
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = self._disk_count
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+
+# -------------------------
+# Response (de)serialisation
+# -------------------------
+def dump_response(resp: Any) -> Dict[str, Any]:
+    usage = getattr(resp, "usage", None)
+    return {
+        "model": getattr(resp, "model", None),
+        "choices": [{"content": c.message.content, "finish_reason": getattr(c, "finish_reason", None)}
+                    for c in resp.choices],
+        "total_tokens": getattr(usage, "total_tokens", None),
+    }
+
+
+def load_response(value: Dict[str, Any]) -> Any:
+    """Rebuild an object shaped like an OpenAI ChatCompletion from a cached value."""
+    choices: List[Any] = [
+        SimpleNamespace(index=i, finish_reason=c.get("finish_reason"),
+                        message=SimpleNamespace(role="assistant", content=c.get("content")))
+        for i, c in enumerate(value.get("choices", []))
+    ]
+    return SimpleNamespace(model=value.get("model"), choices=choices, cached=True,
+                           usage=SimpleNamespace(total_tokens=value.get("total_tokens")))
@@ -0,0 +1,339 @@
+import os
+import time
+import itertools
+import random
+import threading
+import weakref
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, Optional
+
+from backend.llm_cache import ResponseCache, dump_response, load_response
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "RateLimitError", "InternalServerError")
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used for budgeting."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at per_minute / 60 per
+    second. acquire() blocks until the amount is available; amounts larger
+    than the bucket put it into debt so oversized requests still go through.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = float(per_minute) / 60.0
+        self.capacity = float(burst if burst is not None else per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """Take amount tokens, returning the seconds spent waiting."""
+        need = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= need:
+                    self._tokens -= amount
+                    return waited
+                delay = (need - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def give_back(self, amount: float) -> None:
+        """Return over-reserved tokens (or charge more when amount is negative)."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class LLMClient:
+    """
+    Shared wrapper around an OpenAI-compatible client.
+
+    Every chat completion goes through requests/minute and tokens/minute
+    token buckets and is retried with jittered exponential backoff on 429,
+    5xx and connection errors (honouring Retry-After when the provider sends
+    one). With a ResponseCache, identical requests are answered from the
+    cache without touching the budget; pass cache=False to bypass it for a
+    single call. The wrapper exposes chat.completions.create itself, so it
+    can be passed anywhere a raw client is expected.
+
+    A timeout= in the request bounds the whole call, retries included: each
+    attempt is sent with only the time left, and the last error is raised
+    instead of sleeping through a backoff that would overrun it.
+
+    limiter (a semaphore, e.g. a multiprocessing.BoundedSemaphore shared by
+    worker processes) caps provider calls in flight across every client
+    holding it; a slot is held for the call or stream only, not during
+    backoff sleeps.
+    """
+
+    def __init__(self, client: Any, requests_per_minute: Optional[float] = None,
+                 tokens_per_minute: Optional[float] = None, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 30.0,
+                 cache: Optional[ResponseCache] = None, limiter: Any = None):
+        self.client = client
+        self.cache = cache
+        self.limiter = limiter
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = int(max_retries)
+        self.base_delay = float(base_delay)
+        self.max_delay = float(max_delay)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, float] = {
+            "requests": 0, "retries": 0, "failures": 0, "rate_limited": 0,
+            "queue_depth": 0, "max_queue_depth": 0,
+            "throttle_wait_seconds": 0.0, "backoff_wait_seconds": 0.0, "limiter_wait_seconds": 0.0,
+        }
+
+    # -------------------------
+    # Completions
+    # -------------------------
+    def create(self, cache: bool = True, **kwargs: Any) -> Any:
+        key = None
+        if self.cache is not None:
+            if cache:
+                key = ResponseCache.key(kwargs)
+                hit = self.cache.get(key)
+                if hit is not None:
+                    return load_response(hit)
+            else:
+                self.cache.note_bypass()
+
+        resp = self._create(**kwargs)
+        if key is not None:
+            self.cache.put(key, dump_response(resp))
+        return resp
+
+    def _create(self, **kwargs: Any) -> Any:
+        deadline = _deadline(kwargs)
+        budget = self._reserve(kwargs)
+        attempt = 0
+        while True:
+            self._acquire_slot()
+            try:
+                resp = self.client.chat.completions.create(**_remaining(kwargs, deadline))
+            except Exception as e:
+                self._release_slot()
+                self._refund(budget)
+                self._backoff(e, attempt, deadline)
+                attempt += 1
+                budget = self._reserve(kwargs)
+                continue
+            self._release_slot()
+            self._settle(budget, getattr(getattr(resp, "usage", None), "total_tokens", None))
+            return resp
+
+    def stream(self, cache: bool = True, **kwargs: Any) -> Iterator[str]:
+        """
+        Yield content deltas of a stream=True completion. Throttling and
+        retries apply until the first chunk arrives; after that an error is
+        raised to the caller, since partial text has already been delivered.
+        Streams are never cached.
+        """
+        deadline = _deadline(kwargs)
+        budget = self._reserve(kwargs)
+        attempt = 0
+        while True:
+            self._acquire_slot()
+            try:
+                chunks = iter(self.client.chat.completions.create(stream=True, **_remaining(kwargs, deadline)))
+                first = next(chunks, None)
+                break
+            except Exception as e:
+                self._release_slot()
+                self._refund(budget)
+                self._backoff(e, attempt, deadline)
+                attempt += 1
+                budget = self._reserve(kwargs)
+
+        produced = []
+        try:
+            if first is not None:
+                for chunk in itertools.chain([first], chunks):
+                    delta = _delta_text(chunk)
+                    if delta:
+                        produced.append(delta)
+                        yield delta
+        finally:
+            self._release_slot()
+        prompt = "".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+        self._settle(budget, estimate_tokens(prompt) + estimate_tokens("".join(produced)))
+
+    def _acquire_slot(self) -> None:
+        if self.limiter is not None:
+            start = time.monotonic()
+            self.limiter.acquire()
+            self._bump("limiter_wait_seconds", time.monotonic() - start)
+
+    def _release_slot(self) -> None:
+        if self.limiter is not None:
+            self.limiter.release()
+
+    def _backoff(self, exc: Exception, attempt: int, deadline: Optional[float] = None) -> None:
+        """
+        Sleep before retry number attempt + 1, or re-raise exc if it is not
+        retryable or the retry could not start before deadline (monotonic).
+        """
+        status = _status_code(exc)
+        if status == 429:
+            self._bump("rate_limited")
+        if attempt >= self.max_retries or not _is_retryable(exc, status):
+            self._bump("failures")
+            raise exc
+        delay = _retry_after(exc)
+        if delay is None:
+            delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+            delay = random.uniform(0, delay)  # full jitter
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            self._bump("failures")
+            raise exc
+        self._bump("retries")
+        self._bump("backoff_wait_seconds", delay)
+        time.sleep(delay)
+
+    def _reserve(self, kwargs: Dict[str, Any]) -> int:
+        """Wait for request and token budget; returns the tokens reserved."""
+        prompt = "".join(str(m.get("content", "")) for m in kwargs.get("messages", []))
+        budget = estimate_tokens(prompt) + int(kwargs.get("max_tokens") or 0)
+        if self.requests is None and self.tokens is None:
+            self._bump("requests")
+            return budget
+
+        with self._lock:
+            self._stats["queue_depth"] += 1
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queue_depth"])
+        waited = 0.0
+        try:
+            if self.requests is not None:
+                waited += self.requests.acquire(1)
+            if self.tokens is not None:
+                waited += self.tokens.acquire(budget)
+        finally:
+            with self._lock:
+                self._stats["queue_depth"] -= 1
+                self._stats["requests"] += 1
+                self._stats["throttle_wait_seconds"] += waited
+        return budget
+
+    def _refund(self, budget: int) -> None:
+        """Return a failed attempt's reserved tokens; a retry reserves its own."""
+        if self.tokens is not None:
+            self.tokens.give_back(budget)
+
+    def _settle(self, budget: int, used: Optional[int]) -> None:
+        """Refund the difference between reserved and actually used tokens."""
+        if self.tokens is not None and used:
+            self.tokens.give_back(budget - used)
+
+    # -------------------------
+    # Metrics
+    # -------------------------
+    def _bump(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self._stats[key] += amount
+
+    def metrics(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["avg_throttle_wait_seconds"] = stats["throttle_wait_seconds"] / max(1, stats["requests"])
+        if self.cache is not None:
+            stats.update({f"cache_{k}": v for k, v in self.cache.stats().items()})
+        return stats
+
+
+def _deadline(kwargs: Dict[str, Any]) -> Optional[float]:
+    timeout = kwargs.get("timeout")
+    return time.monotonic() + float(timeout) if isinstance(timeout, (int, float)) and timeout > 0 else None
+
+
+def _remaining(kwargs: Dict[str, Any], deadline: Optional[float]) -> Dict[str, Any]:
+    """kwargs with timeout cut to the time left before deadline; TimeoutError once it has passed."""
+    if deadline is None:
+        return kwargs
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise TimeoutError("request deadline passed before the call was sent")
+    return {**kwargs, "timeout": left}
+
+
+def _delta_text(chunk: Any) -> str:
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return ""
+    return getattr(getattr(choices[0], "delta", None), "content", None) or ""
+
+
+def _status_code(exc: Exception) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _is_retryable(exc: Exception, status: Optional[int]) -> bool:
+    if status is not None:
+        return status in RETRYABLE_STATUS or status >= 500
+    return type(exc).__name__ in RETRYABLE_ERRORS or isinstance(exc, (ConnectionError, TimeoutError))
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        value = headers.get("retry-after")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# -------------------------
+# Process-wide wrappers
+# -------------------------
+_wrapped = weakref.WeakKeyDictionary()
+_wrapped_lock = threading.Lock()
+
+
+def get_llm_client(client: Any) -> LLMClient:
+    """
+    Return the shared LLMClient for client, wrapping a raw client once with
+    limits from ECHOMIND_RPM / ECHOMIND_TPM / ECHOMIND_MAX_RETRIES and, if
+    ECHOMIND_LLM_CACHE names a SQLite file, a response cache.
+    """
+    if isinstance(client, LLMClient):
+        return client
+    with _wrapped_lock:
+        wrapper = _wrapped.get(client)
+        if wrapper is None:
+            cache_path = os.environ.get("ECHOMIND_LLM_CACHE")
+            wrapper = LLMClient(client,
+                                cache=ResponseCache(cache_path) if cache_path else None,
+                                requests_per_minute=float(os.environ.get("ECHOMIND_RPM", 0)) or None,
+                                tokens_per_minute=float(os.environ.get("ECHOMIND_TPM", 0)) or None,
+                                max_retries=int(os.environ.get("ECHOMIND_MAX_RETRIES", 5)))
+            _wrapped[client] = wrapper
+        return wrapper
+
+
+def chat_completion(client: Any, **kwargs: Any) -> Any:
+    """chat.completions.create through the shared rate-limited, retrying wrapper."""
+    return get_llm_client(client).create(**kwargs)
+
+
+def chat_completion_stream(client: Any, **kwargs: Any) -> Iterator[str]:
+    """Streaming counterpart of chat_completion, yielding content deltas."""
+    return get_llm_client(client).stream(**kwargs)
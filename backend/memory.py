@@ -1,52 +1,94 @@
 import os
 import json
-import datetime
-from typing import List, Dict, Any, Optional, Callable
-
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-
-# Optional advanced DBs
-try:
-    import faiss  # from faiss-cpu
-    VECTOR_DB_AVAILABLE = True
-except Exception:
-    faiss = None
-    VECTOR_DB_AVAILABLE = False
-
-try:
-    import chromadb
-    CHROMA_AVAILABLE = True
-except Exception:
-    chromadb = None
-    CHROMA_AVAILABLE = False
+import time
+import threading
+import importlib
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Callable, Union, TYPE_CHECKING
 
+from backend.memory_store import MemoryStore
+from backend.memory_sqlite import SQLiteMemoryStore
+from backend.retention import PruneReport, RetentionContext, RetentionMetrics, RetentionPolicy
+
+if TYPE_CHECKING:
+    from backend.memory_index import SparseMemoryIndex
+    from backend.vector_index import FaissMemoryIndex
+    from backend.memory_links import MemoryLinkGraph
+
+# Heavy dependencies (numpy/scipy/sklearn for the TF-IDF index, faiss and
+# chromadb for vector DBs) are imported on first use, not at import time.
 MEM_DIR = "memories"
-os.makedirs(MEM_DIR, exist_ok=True)
+MEM_DB = "memories.sqlite"
+STORAGE_BACKENDS = ("sqlite", "jsonl")
+
+
+@lru_cache(maxsize=None)
+def _optional(module: str) -> Optional[Any]:
+    """Import an optional backend on first use; None if it is not installed."""
+    try:
+        return importlib.import_module(module)
+    except Exception:
+        return None
 
 
 class MemoryManager:
     def __init__(self, use_vector_db: bool = False, db_type: str = "faiss",
-                 embedder: Optional[Callable[[str], Any]] = None):
+                 embedder: Optional[Callable[[str], Any]] = None,
+                 max_entries: Optional[int] = None, compact_every: int = 256,
+                 fsync: str = "batch", ann: str = "hnsw", ann_threshold: Optional[int] = None,
+                 embed_batch_size: int = 64, embed_max_wait: float = 0.005, link_k: int = 3,
+                 max_bytes: Optional[int] = None, retention: Optional[RetentionPolicy] = None,
+                 background_prune: bool = True, storage: Optional[str] = None):
         self.use_vector_db = bool(use_vector_db)
         self.db_type = db_type.lower()
         self.embedder = embedder
+        # FAISS only: index type to switch to, and at how many memories
+        self.ann = ann
+        self.ann_threshold = ann_threshold
+        self.embed_batch_size = embed_batch_size
+        self.embed_max_wait = embed_max_wait
+        # Related memories kept per memory by link_memories
+        self.link_k = link_k
+        # Auto-prune to max_entries / max_bytes once a log exceeds them by
+        # compact_every entries (or 25% of max_bytes), on a background thread
+        self.max_entries = max_entries
+        self.compact_every = max(1, int(compact_every))
+        self.retention = retention or RetentionPolicy(max_entries=max_entries, max_bytes=max_bytes,
+                                                      min_slack_entries=self.compact_every, slack=0.25)
+        self.background_prune = background_prune
+        self.retention_metrics = RetentionMetrics()
+        self.fsync = fsync
+        # "sqlite" (default): one WAL database shared safely by all processes;
+        # "jsonl": per-agent append-only logs, for a single process only
+        self.storage = (storage or os.environ.get("ECHOMIND_MEMORY_STORE", "sqlite")).lower()
+        if self.storage not in STORAGE_BACKENDS:
+            raise ValueError(f"storage must be one of {STORAGE_BACKENDS}")
 
         # Always initialize attributes to satisfy Pylance
-        self.index: Optional[Any] = None
         self.collection: Optional[Any] = None
-        self.vectors: List[np.ndarray] = []
-        self.metadata: List[Dict[str, Any]] = []
-        self.dim: Optional[int] = None
+        self._stores: Dict[str, MemoryStore] = {}
+        self._indexes: Dict[str, "SparseMemoryIndex"] = {}
+        self._vector_indexes: Dict[str, "FaissMemoryIndex"] = {}
+        self._link_graphs: Dict[str, "MemoryLinkGraph"] = {}
+        # One lock per agent name: agents share this manager across threads
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+        # Retrieval hit counts per agent (memory id -> times returned), for retention
+        self._hits: Dict[str, Dict[int, int]] = {}
+        self._prune_pending: set = set()
+        self._pruner = None
 
         if self.use_vector_db:
-            if self.db_type == "faiss" and VECTOR_DB_AVAILABLE:
-                # Lazy init when first embedding arrives
-                pass
-            elif self.db_type == "chroma" and CHROMA_AVAILABLE:
+            if self.db_type == "faiss" and _optional("faiss") is not None:
+                # Per-agent indexes are opened on first use; embedding calls from
+                # all agents are coalesced into batches by one shared queue
+                from backend.embeddings import BatchingEmbedder, get_embedder
+                if not isinstance(self.embedder, BatchingEmbedder):
+                    self.embedder = BatchingEmbedder(get_embedder(self.embedder), max_batch=embed_batch_size,
+                                                     max_wait=embed_max_wait)
+            elif self.db_type == "chroma" and _optional("chromadb") is not None:
                 try:
-                    self.collection = chromadb.Client().create_collection("agent_memories")  # type: ignore
+                    self.collection = _optional("chromadb").Client().create_collection("agent_memories")  # type: ignore
                 except Exception:
                     self.collection = None
                     self.use_vector_db = False
@@ -55,135 +97,402 @@ class MemoryManager:
                 self.use_vector_db = False
 
     # -------------------------
-    # JSON Local Memory
+    # Append-only Local Memory
     # -------------------------
     def _file(self, agent_name: str) -> str:
         safe = "".join(c for c in agent_name if c.isalnum() or c in (" ", "_", "-")).rstrip()
-        return os.path.join(MEM_DIR, f"{safe}.json")
+        return os.path.join(MEM_DIR, f"{safe}.jsonl")
 
-    def load(self, agent_name: str) -> List[Dict[str, Any]]:
+    def _legacy_file(self, agent_name: str) -> str:
+        return os.path.splitext(self._file(agent_name))[0] + ".json"
+
+    def _index_file(self, agent_name: str) -> str:
+        return os.path.splitext(self._file(agent_name))[0] + ".index.npz"
+
+    def _links_file(self, agent_name: str) -> str:
+        return os.path.splitext(self._file(agent_name))[0] + ".links.jsonl"
+
+    def _hits_file(self, agent_name: str) -> str:
+        return os.path.splitext(self._file(agent_name))[0] + ".hits.json"
+
+    def _vector_file(self, agent_name: str) -> str:
+        return os.path.splitext(self._file(agent_name))[0] + ".faiss"
+
+    def _store(self, agent_name: str) -> Union[MemoryStore, SQLiteMemoryStore]:
+        with self._lock(agent_name):
+            store = self._stores.get(agent_name)
+            if store is None:
+                store = self._open_store(agent_name)
+                self._stores[agent_name] = store
+            return store
+
+    def _open_store(self, agent_name: str) -> Union[MemoryStore, SQLiteMemoryStore]:
         path = self._file(agent_name)
-        if not os.path.exists(path):
-            return []
+        legacy = self._legacy_file(agent_name)
+        if self.storage == "jsonl":
+            migrate = not os.path.exists(path) and os.path.exists(legacy)
+            store = MemoryStore(path, fsync=self.fsync)
+            if migrate:
+                # One-off import of the old read-modify-write JSON file
+                self._import_legacy(store, legacy, lambda f: json.load(f))
+            return store
+
+        store = SQLiteMemoryStore(os.path.join(MEM_DIR, MEM_DB), agent_name, fsync=self.fsync)
+        if not len(store):
+            # One-off import of an existing JSONL log or old JSON file; ids are
+            # reassigned, so per-agent derived files are rebuilt from scratch
+            if os.path.exists(path):
+                self._import_legacy(store, path, lambda f: [json.loads(line) for line in f if line.endswith("\n")])
+            elif os.path.exists(legacy):
+                self._import_legacy(store, legacy, lambda f: json.load(f))
+        return store
+
+    def _import_legacy(self, store, legacy: str, read) -> None:
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                return json.load(f)
+            with open(legacy, "r", encoding="utf-8") as f:
+                entries = read(f)
+            store.import_entries(entries)
+            os.replace(legacy, legacy + ".migrated")
         except Exception:
-            return []
+            return
+        if isinstance(store, SQLiteMemoryStore):
+            stem = os.path.splitext(legacy)[0]
+            # .links.json is the link graph's name before it became .links.jsonl
+            for suffix in (".index.npz", ".links.jsonl", ".links.json", ".faiss", ".hits.json"):
+                if os.path.exists(stem + suffix):
+                    os.remove(stem + suffix)
 
-    def save(self, agent_name: str, text: str) -> None:
-        mems = self.load(agent_name)
-        entry = {"text": text, "timestamp": datetime.datetime.utcnow().isoformat()}
-        mems.append(entry)
-        with open(self._file(agent_name), "w", encoding="utf-8") as f:
-            json.dump(mems, f, indent=2, ensure_ascii=False)
+    @staticmethod
+    def _texts_loader(store, ids: List[int]) -> Callable[[int], List[str]]:
+        """load_texts(start) for index syncs, aligned with a snapshot of the store's ids."""
+        def load_texts(start: int) -> List[str]:
+            texts = {m["id"]: m.get("text", "") for m in store.iter(start, len(ids))}
+            return [texts.get(i, "") for i in ids[start:]]
+        return load_texts
+
+    def _lock(self, agent_name: str) -> threading.RLock:
+        with self._locks_guard:
+            lock = self._locks.get(agent_name)
+            if lock is None:
+                lock = self._locks[agent_name] = threading.RLock()
+            return lock
 
-        if self.use_vector_db and self.embedder:
+    @staticmethod
+    def _appended_only(store, derived_ids: List[int], appended: Optional[List[Dict[str, Any]]]) -> bool:
+        """
+        True if the store is exactly derived_ids followed by the appended entries,
+        so a derived index can take just those instead of syncing with the store.
+        """
+        if not appended:
+            return False
+        ids = store.ids
+        first = len(ids) - len(appended)
+        # Ids only grow, so matching both ends of the tail and the entry before it suffices
+        return (first == len(derived_ids) and ids[first] == appended[0]["id"] and ids[-1] == appended[-1]["id"]
+                and (first == 0 or ids[first - 1] == derived_ids[-1]))
+
+    def _index(self, agent_name: str, appended: Optional[List[Dict[str, Any]]] = None) -> "SparseMemoryIndex":
+        """
+        Per-agent TF-IDF index, loaded from disk on first use and synced with
+        the memory log (or given just the entries save_many appended).
+        """
+        from backend.memory_index import SparseMemoryIndex
+
+        store = self._store(agent_name)
+        index = self._indexes.get(agent_name)
+        if index is None:
+            index = SparseMemoryIndex(self._sidecar(self._index_file(agent_name)))
+            self._indexes[agent_name] = index
+        if self._appended_only(store, index.ids, appended):
+            index.add_many([e["id"] for e in appended], [e["text"] for e in appended])
+        else:
+            ids = list(store.ids)
+            index.sync(ids, self._texts_loader(store, ids))
+        return index
+
+    def _vector_index(self, agent_name: str,
+                      appended: Optional[List[Dict[str, Any]]] = None) -> "FaissMemoryIndex":
+        """Per-agent FAISS index (memory-mapped from disk), synced with the memory log."""
+        from backend.vector_index import DEFAULT_ANN_THRESHOLD, FaissMemoryIndex
+
+        store = self._store(agent_name)
+        index = self._vector_indexes.get(agent_name)
+        if index is None:
+            threshold = DEFAULT_ANN_THRESHOLD if self.ann_threshold is None else self.ann_threshold
+            index = FaissMemoryIndex(self._vector_file(agent_name), self.embedder,
+                                     ann=self.ann, ann_threshold=threshold)
+            self._vector_indexes[agent_name] = index
+        if self._appended_only(store, index.ids, appended):
+            index.add_many([e["id"] for e in appended], [e["text"] for e in appended])
+        else:
+            ids = list(store.ids)
+            index.sync(ids, self._texts_loader(store, ids))
+        return index
+
+    def _links(self, agent_name: str, appended: Optional[List[Dict[str, Any]]] = None) -> "MemoryLinkGraph":
+        """Per-agent top-k link graph; new memories are linked through the TF-IDF index."""
+        from backend.memory_links import MemoryLinkGraph
+
+        store = self._store(agent_name)
+        graph = self._link_graphs.get(agent_name)
+        if graph is None:
+            graph = MemoryLinkGraph(self._sidecar(self._links_file(agent_name)), k=self.link_k)
+            self._link_graphs[agent_name] = graph
+        in_step = self._appended_only(store, graph.ids, appended)
+        index = self._index(agent_name, appended)
+        if in_step:
+            for e in appended:
+                graph.add(e["id"], index.search(e["text"], self.link_k + 1))
+        else:
+            ids = list(store.ids)
+            graph.sync(ids, self._texts_loader(store, ids), index.search)
+        return graph
+
+    def _sidecar(self, path: str) -> Optional[str]:
+        """
+        Where to persist a per-agent derived file. With the shared SQLite store
+        other processes write the same agent concurrently, so the TF-IDF index
+        and link graph are in-memory caches (path None), built on first use by
+        link_memories or a prune and then caught up from the store.
+        """
+        return path if self.storage == "jsonl" else None
+
+    def _uses_faiss(self) -> bool:
+        return self.use_vector_db and self.db_type == "faiss" and self.embedder is not None
+
+    def flush(self) -> None:
+        """fsync pending appends and persist any index rows not yet written to disk."""
+        for store in self._stores.values():
+            store.sync()
+        for index in self._indexes.values():
+            index.flush()
+        for vindex in self._vector_indexes.values():
+            vindex.flush()
+        for graph in self._link_graphs.values():
+            graph.flush()
+        for agent_name in list(self._hits):
+            self._save_hits(agent_name)
+
+    def _hit_counts(self, agent_name: str) -> Dict[int, int]:
+        store = self._store(agent_name)
+        if isinstance(store, SQLiteMemoryStore):
+            return store.hit_counts()
+        hits = self._hits.get(agent_name)
+        if hits is None:
+            hits = {}
             try:
-                emb = np.asarray(self.embedder(text), dtype="float32")
-            except Exception:
-                return
-            if emb.ndim != 1:
-                emb = emb.reshape(-1)
+                with open(self._hits_file(agent_name), "r", encoding="utf-8") as f:
+                    hits = {int(k): int(v) for k, v in json.load(f).items()}
+            except (OSError, ValueError):
+                pass
+            self._hits[agent_name] = hits
+        return hits
+
+    def _save_hits(self, agent_name: str) -> None:
+        with self._lock(agent_name):
+            hits = self._hit_counts(agent_name)
+            path = self._hits_file(agent_name)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(hits, f)
+            os.replace(tmp, path)
 
-            if self.db_type == "faiss" and VECTOR_DB_AVAILABLE:
-                if self.index is None:
-                    self.dim = int(emb.shape[0])
-                    self.index = faiss.IndexFlatL2(self.dim)  # type: ignore
-                self.index.add(np.expand_dims(emb, axis=0))  # type: ignore
-                self.vectors.append(emb)
-                self.metadata.append(entry)
+    def _record_hits(self, agent_name: str, memory_ids: List[int]) -> None:
+        store = self._store(agent_name)
+        if isinstance(store, SQLiteMemoryStore):
+            store.record_hits(memory_ids)
+            return
+        hits = self._hit_counts(agent_name)
+        for memory_id in memory_ids:
+            hits[memory_id] = hits.get(memory_id, 0) + 1
 
-            elif self.db_type == "chroma" and self.collection is not None:
-                new_id = str(len(mems))
-                self.collection.add(documents=[text], metadatas=[entry], ids=[new_id])  # type: ignore
+    def load(self, agent_name: str) -> List[Dict[str, Any]]:
+        with self._lock(agent_name):
+            return self._store(agent_name).load()
+
+    def save(self, agent_name: str, text: str) -> None:
+        self.save_many(agent_name, [text])
+
+    def save_many(self, agent_name: str, texts: List[str]) -> None:
+        """Append several memories at once; indexes and embeddings are updated in one batch."""
+        if not texts:
+            return
+        with self._lock(agent_name):
+            store = self._store(agent_name)
+            entries = [store.append(text) for text in texts]
+            if self.storage == "jsonl":
+                self._links(agent_name, entries)
+            # With SQLite, search is FTS5 and the link graph is only built when
+            # link_memories or a prune asks for it, so saves never feed an
+            # in-process TF-IDF index
+            if self._uses_faiss():
+                try:
+                    self._vector_index(agent_name, entries)
+                except Exception as e:
+                    print(f"[MemoryManager] FAISS update failed for {agent_name}: {e}")
+
+            if self.retention.enabled and self.retention.needs_prune(len(store), store.size_bytes):
+                self._schedule_prune(agent_name)
+
+        # One collection holds every agent: ids are namespaced and queries filtered by agent
+        if self.use_vector_db and self.db_type == "chroma" and self.collection is not None:
+            self.collection.add(documents=[e["text"] for e in entries],  # type: ignore
+                                metadatas=[{**e, "agent": agent_name} for e in entries],
+                                ids=[f"{agent_name}:{e['id']}" for e in entries])
 
     # -------------------------
     # Retrieval
     # -------------------------
     def retrieve(self, agent_name: str, query: str, top_k: int = 3) -> List[str]:
-        if self.use_vector_db and self.embedder:
+        if self._uses_faiss():
+            with self._lock(agent_name):
+                store = self._store(agent_name)
+                try:
+                    hits = self._vector_index(agent_name).search(query, top_k)
+                except Exception:
+                    hits = None
+                if hits is not None:
+                    found = store.read_ids([i for i, _ in hits])
+                    self._record_hits(agent_name, [m["id"] for m in found])
+                    return [m.get("text", "") for m in found]
+
+        if self.use_vector_db and self.db_type == "chroma" and self.collection is not None:
+            results = self.collection.query(query_texts=[query], n_results=top_k,  # type: ignore
+                                            where={"agent": agent_name})
+            docs = results.get("documents")
+            if isinstance(docs, list) and docs and isinstance(docs[0], list):
+                return docs[0]
+
+        # Fallback: FTS5 query in the shared database, or the incremental TF-IDF index
+        with self._lock(agent_name):
+            store = self._store(agent_name)
+            if not len(store):
+                return []
             try:
-                q_emb = np.asarray(self.embedder(query), dtype="float32")
-                if q_emb.ndim != 1:
-                    q_emb = q_emb.reshape(-1)
+                found = store.read_ids([i for i, _ in self._text_search(agent_name)(query, top_k)])
             except Exception:
-                q_emb = None
-
-            if q_emb is not None and self.db_type == "faiss" and self.index is not None and len(self.vectors) > 0:
-                D, I = self.index.search(np.expand_dims(q_emb, axis=0), top_k)  # type: ignore
-                return [self.metadata[i]["text"] for i in I[0] if 0 <= i < len(self.metadata)]
-
-            if q_emb is not None and self.db_type == "chroma" and self.collection is not None:
-                results = self.collection.query(query_texts=[query], n_results=top_k)  # type: ignore
-                docs = results.get("documents")
-                if isinstance(docs, list) and docs and isinstance(docs[0], list):
-                    return docs[0]
-
-        # # Fallback: TF-IDF
-        # mems = self.load(agent_name)
-        # texts = [m.get("text", "") for m in mems]
-        # if not texts:
-        #     return []
-        # try:
-        #     tfidf_matrix = TfidfVectorizer().fit_transform([query] + texts)
-        #     query_vec = np.asarray(tfidf_matrix[0:1].todense())
-        #     mem_vecs = np.asarray(tfidf_matrix[1:].todense())
-        #     sims = cosine_similarity(query_vec, mem_vecs).flatten()
-        #     idx_sorted = sims.argsort()[::-1][:top_k]
-        #     return [texts[i] for i in idx_sorted]
-        # except Exception:
-        #     return texts[-top_k:]
-        # Fallback: TF-IDF
-        mems = self.load(agent_name)
-        texts = [m.get("text", "") for m in mems]
-        if not texts:
-            return []
-        try:
-            tfidf_matrix = TfidfVectorizer().fit_transform([query] + texts)
-            dense_matrix = np.asarray(tfidf_matrix.todense()) # convert once to ndarray
-            query_vec = dense_matrix[0:1]
-            mem_vecs = dense_matrix[1:]
-            sims = cosine_similarity(query_vec, mem_vecs).flatten()
-            idx_sorted = sims.argsort()[::-1][:top_k]
-            return [texts[i] for i in idx_sorted]
-        except Exception:
-            return texts[-top_k:]
-
+                found = []
+            # Only actual matches count as hits, not the padding below
+            self._record_hits(agent_name, [m["id"] for m in found])
+            # Pad with the most recent memories, as the dense ranking did for zero scores
+            if len(found) < top_k:
+                seen = {m["id"] for m in found}
+                recent = [i for i in reversed(store.ids[-top_k:]) if i not in seen]
+                found += store.read_ids(recent[:top_k - len(found)])
+            return [m.get("text", "") for m in found]
 
     # -------------------------
     # Prune
     # -------------------------
-    def prune_memories(self, agent_name: str, max_entries: int = 50) -> List[Dict[str, Any]]:
-        mems = self.load(agent_name)
-        if len(mems) <= max_entries:
-            return mems
-        scored = [(i, m, len(m.get("text", "")) + (i / len(mems))) for i, m in enumerate(mems)]
-        scored.sort(key=lambda x: x[2], reverse=True)
-        pruned = [m for _, m, _ in scored[:max_entries]]
-        with open(self._file(agent_name), "w", encoding="utf-8") as f:
-            json.dump(pruned, f, indent=2, ensure_ascii=False)
-        return pruned
+    def prune_memories(self, agent_name: str, max_entries: Optional[int] = 50) -> List[Dict[str, Any]]:
+        """
+        Compact the agent's log down to the memories the retention policy
+        values most (max_entries overrides the policy's entry cap).
+        """
+        with self._lock(agent_name):
+            store = self._store(agent_name)
+            cap = self.retention.max_entries if max_entries is None else max_entries
+            if (cap is None or len(store) <= cap) and (
+                    self.retention.max_bytes is None or store.size_bytes <= self.retention.max_bytes):
+                return store.load()
+
+            start = time.perf_counter()
+            entries_before, bytes_before = len(store), store.size_bytes
+            latency_before = self._probe_retrieve(agent_name)
+            graph = self._links(agent_name)
+            ctx = RetentionContext(now=time.time(), hits=self._hit_counts(agent_name),
+                                   neighbours=graph.neighbours, half_life=self.retention.half_life)
+            keep = self.retention.select(store.iter(), ctx, max_entries=cap)
+            pruned = store.compact(keep)
+            self._links(agent_name)
+            if self._uses_faiss():
+                self._vector_index(agent_name)
+            if not isinstance(store, SQLiteMemoryStore):  # SQLite drops hit rows with their memories
+                kept = set(keep)
+                self._hits[agent_name] = {i: n for i, n in ctx.hits.items() if i in kept}
+                self._save_hits(agent_name)
+
+            self.retention_metrics.record(PruneReport(
+                agent=agent_name, entries_before=entries_before, entries_after=len(store),
+                bytes_before=bytes_before, bytes_after=store.size_bytes,
+                seconds=time.perf_counter() - start, retrieve_ms_before=latency_before,
+                retrieve_ms_after=self._probe_retrieve(agent_name)))
+            return pruned
+
+    def _schedule_prune(self, agent_name: str) -> None:
+        if not self.background_prune:
+            self.prune_memories(agent_name, None)
+            return
+        with self._locks_guard:
+            if agent_name in self._prune_pending:
+                return
+            self._prune_pending.add(agent_name)
+            if self._pruner is None:
+                from concurrent.futures import ThreadPoolExecutor
+                self._pruner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="echomind-prune")
+        self._pruner.submit(self._background_prune, agent_name)
+
+    def _background_prune(self, agent_name: str) -> None:
+        try:
+            self.prune_memories(agent_name, None)
+        except Exception as e:
+            print(f"[MemoryManager] Pruning failed for {agent_name}: {e}")
+        finally:
+            with self._locks_guard:
+                self._prune_pending.discard(agent_name)
+
+    def _text_search(self, agent_name: str) -> Callable[[str, int], List[Any]]:
+        store = self._store(agent_name)
+        return store.search if isinstance(store, SQLiteMemoryStore) else self._index(agent_name).search
+
+    def _probe_retrieve(self, agent_name: str) -> Optional[float]:
+        """ms for one text lookup of the agent's newest memory (a latency sample for metrics)."""
+        store = self._store(agent_name)
+        if not store.ids:
+            return None
+        query = store.read_positions([len(store.ids) - 1])[0].get("text", "")
+        start = time.perf_counter()
+        self._text_search(agent_name)(query, 3)
+        return (time.perf_counter() - start) * 1000
+
+    def retention_stats(self) -> Dict[str, Any]:
+        return self.retention_metrics.as_dict()
 
     # -------------------------
     # Link memories (A-Mem)
     # -------------------------
     def link_memories(self, agent_name: str) -> List[Dict[str, Any]]:
-        mems = self.load(agent_name)
-        if len(mems) < 2:
-            return mems
-        texts = [m.get("text", "") for m in mems]
-        try:
-            tfidf_matrix = TfidfVectorizer().fit_transform(texts)
-            dense_matrix = np.asarray(tfidf_matrix.todense())
-            sims = cosine_similarity(dense_matrix)
-            links = []
-            for i in range(len(mems)):
-                related = [(j, sims[i][j]) for j in range(len(mems)) if i != j]
-                related.sort(key=lambda x: x[1], reverse=True)
-                top_related = [mems[j]["text"] for j, _ in related[:3]]
-                links.append({"text": mems[i]["text"], "related": top_related})
-            return links
-        except Exception:
-            return [{"text": m.get("text", ""), "related": []} for m in mems]
-        return mems 
+        """Each memory with the texts of its top-k related memories, read from the link graph."""
+        with self._lock(agent_name):
+            mems = self._store(agent_name).load()
+            if len(mems) < 2:
+                return mems
+            try:
+                graph = self._links(agent_name)
+            except Exception:
+                return [{"text": m.get("text", ""), "related": []} for m in mems]
+            texts = {m["id"]: m.get("text", "") for m in mems}
+            return [{"text": m.get("text", ""),
+                     "related": [texts[i] for i, _ in graph.neighbours(m["id"]) if i in texts]}
+                    for m in mems]
+
+
+# -------------------------
+# Process-wide memory service
+# -------------------------
+_managers: Dict[tuple, MemoryManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_memory_manager(**config: Any) -> MemoryManager:
+    """
+    Shared MemoryManager for a given configuration, created on first use.
+    Agents share it, so each agent name gets exactly one store and index
+    per process instead of one per Agent instance.
+    """
+    key = tuple(sorted(config.items(), key=lambda kv: kv[0]))
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = _managers[key] = MemoryManager(**config)
+        return manager
@@ -0,0 +1,199 @@
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import HashingVectorizer
+
+from backend.memory_store import extends
+
+# 2**18 hashed term slots keeps collisions negligible for debate-sized
+# vocabularies while the document-frequency vector stays at 1 MB per agent.
+N_FEATURES = 2 ** 18
+
+
+class SparseMemoryIndex:
+    """
+    Incremental TF-IDF retrieval index for one agent's memories.
+
+    Terms are hashed (no fitted vocabulary), so adding a memory never forces a
+    refit: we only append its sparse term-count row and bump document
+    frequencies. IDF weighting and cosine normalisation are applied at query
+    time with two sparse mat-vec products, i.e. O(nnz) per query.
+
+    New rows are searched as a separate pending block and only merged into
+    the main matrix once they reach consolidate_every rows or 1/8 of it, so
+    an add followed by a search does not re-stack the whole matrix.
+    """
+
+    def __init__(self, path: Optional[str] = None, n_features: int = N_FEATURES,
+                 flush_every: int = 32, consolidate_every: int = 256):
+        self.path = path
+        self.n_features = int(n_features)
+        self.flush_every = max(1, int(flush_every))
+        self.consolidate_every = max(1, int(consolidate_every))
+        self._vectorizer = HashingVectorizer(n_features=self.n_features,
+                                             alternate_sign=False, norm=None,
+                                             dtype=np.float32)
+        self.ids: List[int] = []
+        self._matrix = sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        self._squared: Optional[sparse.csr_matrix] = None
+        self._pending: List[sparse.csr_matrix] = []
+        self._pending_rows = 0
+        self._tail: Optional[Tuple[sparse.csr_matrix, sparse.csr_matrix]] = None
+        self._df = np.zeros(self.n_features, dtype=np.int32)
+        self._unsaved = 0
+        self._query_buf: Optional[np.ndarray] = None
+
+        if self.path and os.path.exists(self.path):
+            try:
+                self._load()
+            except Exception:
+                self.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def add(self, memory_id: int, text: str) -> None:
+        self.add_many([memory_id], [text])
+
+    def add_many(self, memory_ids: Sequence[int], texts: Sequence[str]) -> None:
+        if not texts:
+            return
+        rows = self._vectorizer.transform(list(texts)).tocsr()
+        self._pending.append(rows)
+        self._pending_rows += rows.shape[0]
+        self._tail = None
+        np.add.at(self._df, rows.indices, 1)
+        self.ids.extend(int(i) for i in memory_ids)
+        self._unsaved += len(texts)
+        if self.path and self._unsaved >= self.flush_every:
+            self.flush()
+
+    def clear(self) -> None:
+        self.ids = []
+        self._matrix = sparse.csr_matrix((0, self.n_features), dtype=np.float32)
+        self._squared = None
+        self._pending = []
+        self._pending_rows = 0
+        self._tail = None
+        self._df = np.zeros(self.n_features, dtype=np.int32)
+        self._unsaved = 0
+
+    def rebuild(self, memory_ids: Sequence[int], texts: Sequence[str]) -> None:
+        self.clear()
+        self.add_many(memory_ids, texts)
+        self.flush()
+
+    def sync(self, memory_ids: Sequence[int], load_texts: Callable[[int], List[str]]) -> None:
+        """
+        Bring the index in line with the memory store, re-hashing only what is
+        missing. load_texts(start) returns the texts from position start on.
+        """
+        n = len(self.ids)
+        if extends(memory_ids, self.ids):
+            if n < len(memory_ids):
+                self.add_many(memory_ids[n:], load_texts(n))
+        else:
+            self.rebuild(memory_ids, load_texts(0))
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """Return up to top_k (memory_id, cosine) pairs with a positive score."""
+        if not self.ids or top_k <= 0:
+            return []
+        q = self._vectorizer.transform([query]).tocsr()
+        if q.nnz == 0:
+            return []
+
+        # IDF is only evaluated for the columns a query touches, not all n_features
+        n_docs = len(self.ids)
+
+        def idf_sq(cols):
+            idf = np.log((1.0 + n_docs) / (1.0 + self._df[cols].astype(np.float32))) + 1.0
+            return idf * idf
+
+        # cos(q, d) = sum_t q_t d_t idf_t^2 / (|q * idf| |d * idf|)
+        q_idf_sq = idf_sq(q.indices)
+        q_norm = float(np.sqrt(np.dot(q.data * q.data, q_idf_sq)))
+        if self._query_buf is None:
+            self._query_buf = np.zeros(self.n_features, dtype=np.float32)
+        self._query_buf[q.indices] = q.data * q_idf_sq
+        found, found_scores = [], []
+        try:
+            for first, matrix, squared in self._blocks():
+                dots = matrix @ self._query_buf
+                hits = np.flatnonzero(dots > 0)
+                if hits.size == 0:
+                    continue
+                rows = squared[hits]
+                row_of = np.repeat(np.arange(hits.size), np.diff(rows.indptr))
+                doc_norms = np.sqrt(np.bincount(row_of, weights=rows.data * idf_sq(rows.indices),
+                                                minlength=hits.size))
+                found.append(hits + first)
+                found_scores.append(dots[hits] / (doc_norms * q_norm + 1e-12))
+        finally:
+            self._query_buf[q.indices] = 0.0
+        if not found:
+            return []
+        hits, scores = np.concatenate(found), np.concatenate(found_scores)
+
+        k = min(top_k, hits.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.ids[hits[i]], float(scores[i])) for i in top]
+
+    def _blocks(self) -> List[Tuple[int, sparse.csr_matrix, sparse.csr_matrix]]:
+        """(first row, rows, element-wise squared rows) of the main matrix and the pending block."""
+        if self._pending_rows >= max(self.consolidate_every, self._matrix.shape[0] // 8):
+            self._consolidate()
+        blocks = []
+        if self._matrix.shape[0]:
+            if self._squared is None:
+                self._squared = self._matrix.multiply(self._matrix).tocsr()
+            blocks.append((0, self._matrix, self._squared))
+        if self._pending:
+            if self._tail is None:
+                tail = sparse.vstack(self._pending, format="csr")
+                self._pending = [tail]
+                self._tail = (tail, tail.multiply(tail).tocsr())
+            blocks.append((self._matrix.shape[0], *self._tail))
+        return blocks
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def flush(self) -> None:
+        if not self.path or self._unsaved == 0:
+            return
+        self._consolidate()
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, data=self._matrix.data, indices=self._matrix.indices,
+                     indptr=self._matrix.indptr, ids=np.asarray(self.ids, dtype=np.int64),
+                     n_features=np.asarray(self.n_features))
+        os.replace(tmp, self.path)
+        self._unsaved = 0
+
+    def _load(self) -> None:
+        with np.load(self.path) as z:
+            if int(z["n_features"]) != self.n_features:
+                raise ValueError("index built with a different feature size")
+            n_docs = len(z["ids"])
+            self._matrix = sparse.csr_matrix((z["data"], z["indices"], z["indptr"]),
+                                             shape=(n_docs, self.n_features))
+            self.ids = [int(i) for i in z["ids"]]
+        self._df = np.bincount(self._matrix.indices, minlength=self.n_features).astype(np.int32)
+
+    def _consolidate(self) -> None:
+        if self._pending:
+            self._matrix = sparse.vstack([self._matrix] + self._pending, format="csr")
+            self._pending = []
+            self._pending_rows = 0
+            self._tail = None
+            self._squared = None
@@ -0,0 +1,155 @@
+import json
+import os
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from backend.memory_store import extends
+
+Hit = Tuple[int, float]
+
+
+class MemoryLinkGraph:
+    """
+    Sparse top-k "related memory" links for one agent (A-Mem style).
+
+    Each memory keeps at most k neighbours, best first. Linking a new memory
+    costs one index search for its own neighbours plus a reciprocal update of
+    each neighbour's list, so the graph is maintained incrementally in
+    O(N * k) space instead of rebuilding an N x N similarity matrix. Scores
+    are those of the index at link time; they are not revised as IDF drifts.
+
+    On disk the graph is an append-only JSONL log of {"id", "links"} records
+    (last record per id wins), rewritten only after compaction or once it
+    holds several times more records than memories.
+    """
+
+    def __init__(self, path: Optional[str] = None, k: int = 3, flush_every: int = 32):
+        self.path = path
+        self.k = max(1, int(k))
+        self.flush_every = max(1, int(flush_every))
+        self.ids: List[int] = []
+        self.links: Dict[int, List[Hit]] = {}
+        self._dirty: Dict[int, None] = {}
+        self._records = 0
+        self._rewrite = False
+
+        if self.path and os.path.exists(self.path):
+            try:
+                self._load()
+            except Exception:
+                self.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def neighbours(self, memory_id: int) -> List[Hit]:
+        return self.links.get(memory_id, [])
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def add(self, memory_id: int, hits: Sequence[Hit]) -> None:
+        """Link a new memory to its search hits and offer it to each hit's own list."""
+        own = [(int(i), float(s)) for i, s in hits if i != memory_id][:self.k]
+        self.ids.append(memory_id)
+        self.links[memory_id] = own
+        self._dirty[memory_id] = None
+        for other, score in own:
+            # Hits not linked yet (later in the same batch) pick this one up themselves
+            if other in self.links:
+                self._offer(other, memory_id, score)
+        if self.path and len(self._dirty) >= self.flush_every:
+            self.flush()
+
+    def _offer(self, memory_id: int, candidate: int, score: float) -> None:
+        current = self.links[memory_id]
+        if len(current) >= self.k and score <= current[-1][1]:
+            return
+        current.append((candidate, score))
+        current.sort(key=lambda h: h[1], reverse=True)
+        del current[self.k:]
+        self._dirty[memory_id] = None
+
+    def clear(self) -> None:
+        self.ids = []
+        self.links = {}
+        self._dirty = {}
+        self._rewrite = True
+
+    def sync(self, memory_ids: Sequence[int], load_texts: Callable[[int], List[str]],
+             search: Callable[[str, int], List[Hit]]) -> None:
+        """
+        Bring the graph in line with the memory store. New memories are linked
+        via search(text, top_k); after compaction, dropped memories are removed
+        and only the memories that lost a neighbour are re-linked.
+        """
+        n = len(self.ids)
+        if extends(memory_ids, self.ids):
+            if n < len(memory_ids):
+                for memory_id, text in zip(memory_ids[n:], load_texts(n)):
+                    self.add(int(memory_id), search(text, self.k + 1))
+            return
+
+        keep = set(int(i) for i in memory_ids)
+        if not keep.issubset(self.links):
+            self.clear()
+            self.sync(memory_ids, load_texts, search)
+            return
+
+        self.ids = [int(i) for i in memory_ids]
+        self.links = {i: self.links[i] for i in self.ids}
+        texts = None
+        for pos, memory_id in enumerate(self.ids):
+            current = self.links[memory_id]
+            kept = [(i, s) for i, s in current if i in keep]
+            if len(kept) == len(current):
+                continue
+            if texts is None:
+                texts = load_texts(0)
+            hits = search(texts[pos], self.k + 1)
+            self.links[memory_id] = [(int(i), float(s)) for i, s in hits if i != memory_id and i in keep][:self.k]
+        self._rewrite = True
+        self.flush()
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def flush(self) -> None:
+        if not self.path:
+            return
+        if self._rewrite or self._records > 4 * max(len(self.ids), 64):
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"k": self.k}) + "\n")
+                f.writelines(self._record(m) for m in self.ids)
+            os.replace(tmp, self.path)
+            self._records = len(self.ids)
+        elif self._dirty:
+            with open(self.path, "a", encoding="utf-8") as f:
+                if f.tell() == 0:
+                    f.write(json.dumps({"k": self.k}) + "\n")
+                f.writelines(self._record(m) for m in self._dirty)
+            self._records += len(self._dirty)
+        self._dirty = {}
+        self._rewrite = False
+
+    def _record(self, memory_id: int) -> str:
+        links = [[i, round(s, 6)] for i, s in self.links[memory_id]]
+        return json.dumps({"id": memory_id, "links": links}) + "\n"
+
+    def _load(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if int(header["k"]) != self.k:
+                raise ValueError("link graph built with a different k")
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn final record: sync re-links what is missing, then the log is rewritten
+                    self._rewrite = True
+                    break
+                memory_id = int(rec["id"])
+                if memory_id not in self.links:
+                    self.ids.append(memory_id)
+                self.links[memory_id] = [(int(i), float(s)) for i, s in rec["links"]]
+                self._records += 1
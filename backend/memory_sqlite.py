@@ -0,0 +1,297 @@
+import os
+import re
+import json
+import sqlite3
+import datetime
+import threading
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+SYNCHRONOUS = {"always": "FULL", "batch": "NORMAL", "never": "OFF"}
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memories (
+    id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    agent     TEXT NOT NULL,
+    text      TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    extra     TEXT
+);
+CREATE INDEX IF NOT EXISTS memories_agent_id ON memories(agent, id);
+
+CREATE TABLE IF NOT EXISTS agent_stats (
+    agent   TEXT PRIMARY KEY,
+    entries INTEGER NOT NULL DEFAULT 0,
+    bytes   INTEGER NOT NULL DEFAULT 0,
+    version INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(text, content='memories', content_rowid='id');
+
+CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN
+    INSERT INTO memories_fts(rowid, text) VALUES (new.id, new.text);
+    INSERT INTO agent_stats(agent, entries, bytes, version) VALUES (new.agent, 1, length(CAST(new.text AS BLOB)), 1)
+        ON CONFLICT(agent) DO UPDATE SET entries = entries + 1, bytes = bytes + excluded.bytes,
+                                         version = version + 1;
+END;
+
+CREATE TABLE IF NOT EXISTS memory_hits (
+    id   INTEGER PRIMARY KEY,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS memories_hits_ad AFTER DELETE ON memories BEGIN
+    DELETE FROM memory_hits WHERE id = old.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN
+    INSERT INTO memories_fts(memories_fts, rowid, text) VALUES ('delete', old.id, old.text);
+    UPDATE agent_stats SET entries = entries - 1, bytes = bytes - length(CAST(old.text AS BLOB)),
+                           version = version + 1
+        WHERE agent = old.agent;
+END;
+"""
+
+
+class SQLiteMemoryStore:
+    """
+    One agent's memories in a SQLite database shared by every process.
+
+    Drop-in for MemoryStore (same ids / positions / load / compact API), but
+    safe across processes: the database runs in WAL mode, so readers never
+    block the single writer, and every append is its own transaction, so
+    concurrent Streamlit sessions, API workers and ui.py cannot lose each
+    other's updates. Ids come from one AUTOINCREMENT counter (unique across
+    agents, never reused). An FTS5 index kept up to date by triggers serves
+    search() without loading the agent's memories, and entry and byte counts
+    are maintained by triggers too. Retrieval hit counts live in the same
+    database, incremented in place, so every process adds to one tally.
+
+    The id list is cached per process and caught up with other writers on
+    access: a per-agent version counter detects changes, new appends are
+    fetched incrementally and deletions trigger a reload.
+    """
+
+    def __init__(self, path: str, agent: str, fsync: str = "batch", timeout: float = 30.0):
+        if fsync not in SYNCHRONOUS:
+            raise ValueError(f"fsync must be one of {tuple(SYNCHRONOUS)}")
+        self.path = path
+        self.agent = agent
+        self.fsync = fsync
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.RLock()
+        self._ids: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._version = 0
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={SYNCHRONOUS[self.fsync]}")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def __len__(self) -> int:
+        return self._stats()[0]
+
+    @property
+    def size_bytes(self) -> int:
+        entries, text_bytes = self._stats()
+        return text_bytes + 64 * entries  # ~ per-row overhead, comparable to a JSONL line
+
+    def _stats(self) -> Tuple[int, int]:
+        return self._stats_row()[:2]
+
+    def _stats_row(self) -> Tuple[int, int, int]:
+        row = self._conn().execute("SELECT entries, bytes, version FROM agent_stats WHERE agent = ?",
+                                   (self.agent,)).fetchone()
+        return (int(row[0]), int(row[1]), int(row[2])) if row else (0, 0, 0)
+
+    @property
+    def ids(self) -> List[int]:
+        """Ids in append order, caught up with writes from other processes."""
+        with self._lock:
+            entries, _, version = self._stats_row()
+            if version != self._version:
+                self._version = version
+                last = self._ids[-1] if self._ids else -1
+                new = [r[0] for r in self._conn().execute(
+                    "SELECT id FROM memories WHERE agent = ? AND id > ? ORDER BY id", (self.agent, last))]
+                if len(self._ids) + len(new) == entries:
+                    for memory_id in new:
+                        self._positions[memory_id] = len(self._ids)
+                        self._ids.append(memory_id)
+                else:
+                    self._reload_ids()
+            return self._ids
+
+    def _reload_ids(self) -> None:
+        self._ids = [r[0] for r in self._conn().execute(
+            "SELECT id FROM memories WHERE agent = ? ORDER BY id", (self.agent,))]
+        self._positions = {memory_id: pos for pos, memory_id in enumerate(self._ids)}
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections = []
+            self._local = threading.local()
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def append(self, text: str, **fields: Any) -> Dict[str, Any]:
+        timestamp = datetime.datetime.utcnow().isoformat()
+        cur = self._conn().execute(
+            "INSERT INTO memories(agent, text, timestamp, extra) VALUES (?, ?, ?, ?)",
+            (self.agent, text, timestamp, json.dumps(fields, ensure_ascii=False) if fields else None))
+        return {"id": cur.lastrowid, "text": text, "timestamp": timestamp, **fields}
+
+    def sync(self) -> None:
+        """Appends are committed per statement; nothing is buffered."""
+
+    def import_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Bulk-append existing entries (e.g. from a legacy file) in one transaction, assigning new ids."""
+        rows = []
+        for e in entries:
+            extra = {k: v for k, v in e.items() if k not in ("id", "text", "timestamp")}
+            rows.append((self.agent, e.get("text", ""), e.get("timestamp") or datetime.datetime.utcnow().isoformat(),
+                         json.dumps(extra, ensure_ascii=False) if extra else None))
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO memories(agent, text, timestamp, extra) VALUES (?, ?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def compact(self, keep_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """
+        Delete every memory of this agent not in keep_ids; returns the survivors.
+        Only ids this process has already seen are candidates, so memories
+        appended meanwhile by other processes are never dropped unseen.
+        """
+        with self._lock:
+            upto = self._ids[-1] if self._ids else -1
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep_ids (id INTEGER PRIMARY KEY)")
+            conn.execute("DELETE FROM keep_ids")
+            conn.executemany("INSERT OR IGNORE INTO keep_ids(id) VALUES (?)", ((int(i),) for i in keep_ids))
+            conn.execute("DELETE FROM memories WHERE agent = ? AND id <= ? AND id NOT IN (SELECT id FROM keep_ids)",
+                         (self.agent, upto))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            self._reload_ids()
+        return self.load()
+
+    def record_hits(self, memory_ids: Iterable[int]) -> None:
+        """Add one retrieval hit to each of memory_ids."""
+        rows = [(memory_id,) for memory_id in memory_ids]
+        if not rows:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT INTO memory_hits(id, hits) VALUES (?, 1) "
+                             "ON CONFLICT(id) DO UPDATE SET hits = hits + 1", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def hit_counts(self) -> Dict[int, int]:
+        """memory_id -> times retrieved, for this agent's memories that were retrieved at all."""
+        rows = self._conn().execute(
+            "SELECT h.id, h.hits FROM memory_hits h JOIN memories m ON m.id = h.id WHERE m.agent = ?",
+            (self.agent,)).fetchall()
+        return {int(memory_id): int(hits) for memory_id, hits in rows}
+
+    def position(self, memory_id: int) -> Optional[int]:
+        pos = self._positions.get(memory_id)
+        if pos is None:
+            self.ids  # refresh from other writers, then retry
+            pos = self._positions.get(memory_id)
+        return pos
+
+    def get(self, memory_id: int) -> Optional[Dict[str, Any]]:
+        row = self._conn().execute("SELECT id, text, timestamp, extra FROM memories WHERE id = ? AND agent = ?",
+                                   (memory_id, self.agent)).fetchone()
+        return self._entry(row) if row else None
+
+    def read_positions(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        ids = self.ids
+        wanted = [ids[pos] for pos in positions]
+        return self.read_ids(wanted)
+
+    def read_ids(self, memory_ids: List[int]) -> List[Dict[str, Any]]:
+        """Entries for memory_ids, in the order given (ids deleted meanwhile are skipped)."""
+        if not memory_ids:
+            return []
+        marks = ",".join("?" * len(memory_ids))
+        rows = self._conn().execute(f"SELECT id, text, timestamp, extra FROM memories WHERE id IN ({marks})",
+                                    memory_ids).fetchall()
+        by_id = {row[0]: self._entry(row) for row in rows}
+        return [by_id[i] for i in memory_ids if i in by_id]
+
+    def load(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries at positions start..stop (default: to the end), in append order."""
+        return list(self.iter(start, stop))
+
+    def iter(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Stream entries by position. With stop given, positions refer to the ids
+        already seen (no refresh), so a caller's snapshot of ids stays aligned.
+        """
+        ids = self._ids if stop is not None else self.ids
+        stop = len(ids) if stop is None else min(stop, len(ids))
+        if start >= stop:
+            return
+        cur = self._conn().execute(
+            "SELECT id, text, timestamp, extra FROM memories WHERE agent = ? AND id BETWEEN ? AND ? ORDER BY id",
+            (self.agent, ids[start], ids[stop - 1]))
+        for row in cur:
+            yield self._entry(row)
+
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """Full-text search (FTS5, BM25 ranking): up to top_k (memory_id, score) pairs, best first."""
+        terms = {t for t in _TERM.findall(query.lower()) if len(t) > 1}
+        if not terms or top_k <= 0:
+            return []
+        match = " OR ".join('"' + t.replace('"', '""') + '"' for t in sorted(terms))
+        rows = self._conn().execute(
+            "SELECT m.id, bm25(memories_fts) AS rank FROM memories_fts JOIN memories m ON m.id = memories_fts.rowid "
+            "WHERE memories_fts MATCH ? AND m.agent = ? ORDER BY rank LIMIT ?",
+            (match, self.agent, int(top_k))).fetchall()
+        return [(int(memory_id), -float(rank)) for memory_id, rank in rows]
+
+    @staticmethod
+    def _entry(row) -> Dict[str, Any]:
+        memory_id, text, timestamp, extra = row
+        entry = {"id": memory_id, "text": text, "timestamp": timestamp}
+        if extra:
+            entry.update(json.loads(extra))
+        return entry
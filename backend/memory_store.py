@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import itertools
+import threading
+import datetime
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Sequence
+
+FSYNC_MODES = ("always", "batch", "never")
+
+
+def extends(memory_ids: Sequence[int], ids: Sequence[int]) -> bool:
+    """
+    Whether a store's memory_ids start with ids (a derived index's). Ids are
+    assigned in increasing order and never reused, so if the n-th ids match,
+    no earlier one was dropped: O(1) instead of comparing whole prefixes.
+    """
+    n = len(ids)
+    return n <= len(memory_ids) and (n == 0 or memory_ids[n - 1] == ids[-1])
+
+
+class MemoryStore:
+    """
+    Append-only JSONL log of one agent's memories.
+
+    Each save writes a single line at the end of the file (O(1)), and an
+    in-memory offset index gives random access to any entry without parsing
+    the rest. A torn last line left by a crash is truncated on open instead
+    of invalidating the whole file. Pruning is done by compaction: kept
+    entries are rewritten to a temp file which atomically replaces the log.
+
+    fsync: "always" syncs every append, "batch" syncs after fsync_every
+    appends or fsync_interval seconds, "never" leaves it to the OS. Appends
+    are flushed to the OS either way, so only a machine crash can lose an
+    unsynced batch.
+    """
+
+    def __init__(self, path: str, fsync: str = "batch", fsync_every: int = 64,
+                 fsync_interval: float = 1.0):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"fsync must be one of {FSYNC_MODES}")
+        self.path = path
+        self.fsync = fsync
+        self.fsync_every = max(1, int(fsync_every))
+        self.fsync_interval = float(fsync_interval)
+
+        self.ids: List[int] = []
+        self._offsets: List[int] = []
+        self._positions: Dict[int, int] = {}
+        self._size = 0
+        self._next_id = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.RLock()
+        self._fh = None
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+
+    # -------------------------
+    # Open / recover
+    # -------------------------
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.ids, self._offsets, self._positions = [], [], {}
+        self._next_id = 0
+        good_end = 0
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                offset = 0
+                for line in f:
+                    end = offset + len(line)
+                    if not line.endswith(b"\n"):
+                        break  # torn write from a crash
+                    try:
+                        entry = json.loads(line)
+                        self._index_entry(int(entry["id"]), offset)
+                    except Exception:
+                        pass  # skip a corrupt record, keep the rest
+                    offset = good_end = end
+            if good_end != os.path.getsize(self.path):
+                with open(self.path, "r+b") as f:
+                    f.truncate(good_end)
+        self._size = good_end
+        self._fh = open(self.path, "ab")
+
+    def _index_entry(self, memory_id: int, offset: int) -> None:
+        self._positions[memory_id] = len(self.ids)
+        self.ids.append(memory_id)
+        self._offsets.append(offset)
+        self._next_id = max(self._next_id, memory_id + 1)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fh is not None:
+                self.sync()
+                self._fh.close()
+                self._fh = None
+
+    # -------------------------
+    # Writes
+    # -------------------------
+    def append(self, text: str, **fields: Any) -> Dict[str, Any]:
+        with self._lock:
+            entry = {"id": self._next_id, "text": text,
+                     "timestamp": datetime.datetime.utcnow().isoformat(), **fields}
+            self._write(entry)
+            return entry
+
+    def _write(self, entry: Dict[str, Any]) -> None:
+        line = (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
+        self._fh.write(line)
+        self._fh.flush()
+        self._index_entry(int(entry["id"]), self._size)
+        self._size += len(line)
+        self._unsynced += 1
+        if self.fsync == "always" or (
+                self.fsync == "batch" and (self._unsynced >= self.fsync_every or
+                                           time.monotonic() - self._last_sync >= self.fsync_interval)):
+            self.sync()
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._fh is not None and self._unsynced and self.fsync != "never":
+                os.fsync(self._fh.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def import_entries(self, entries: Iterable[Dict[str, Any]]) -> None:
+        """Bulk-append existing entries (e.g. from a legacy JSON file), assigning ids."""
+        with self._lock:
+            for e in entries:
+                entry = dict(e)
+                entry["id"] = self._next_id
+                entry.setdefault("timestamp", datetime.datetime.utcnow().isoformat())
+                self._write(entry)
+            self.sync()
+
+    def compact(self, keep_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Rewrite the log with only keep_ids (original order and ids kept); returns the survivors."""
+        with self._lock:
+            keep = set(keep_ids)
+            kept = []
+            tmp = f"{self.path}.compact"
+            with open(tmp, "wb") as f:
+                for e in self.iter():
+                    if e.get("id") in keep:
+                        kept.append(e)
+                        f.write((json.dumps(e, ensure_ascii=False) + "\n").encode("utf-8"))
+                f.flush()
+                os.fsync(f.fileno())
+            self._fh.close()
+            os.replace(tmp, self.path)
+            next_id = self._next_id
+            self._open()
+            self._next_id = max(self._next_id, next_id)  # never reuse ids of pruned entries
+            return kept
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def position(self, memory_id: int) -> Optional[int]:
+        return self._positions.get(memory_id)
+
+    def get(self, memory_id: int) -> Optional[Dict[str, Any]]:
+        pos = self._positions.get(memory_id)
+        if pos is None:
+            return None
+        return self.read_positions([pos])[0]
+
+    def read_positions(self, positions: Iterable[int]) -> List[Dict[str, Any]]:
+        out = []
+        with open(self.path, "rb") as f:
+            for pos in positions:
+                f.seek(self._offsets[pos])
+                out.append(json.loads(f.readline()))
+        return out
+
+    def read_ids(self, memory_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Entries for memory_ids, in the order given (ids no longer in the log are skipped)."""
+        positions = [self._positions.get(i) for i in memory_ids]
+        return self.read_positions([pos for pos in positions if pos is not None])
+
+    def load(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Entries at positions start..stop (default: to the end), in append order."""
+        return list(self.iter(start, stop))
+
+    def iter(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Stream entries from position start onwards without holding them all in memory."""
+        stop = len(self._offsets) if stop is None else min(stop, len(self._offsets))
+        if start >= stop:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[start])
+            for line in itertools.islice(f, stop - start):
+                if line.endswith(b"\n"):
+                    try:
+                        entry = json.loads(line)
+                    except Exception:
+                        continue
+                    if "id" in entry:
+                        yield entry
@@ -0,0 +1,54 @@
+import datetime
+
+from backend.debate_engine import DebateEngine
+from backend.consensus import RANKED_METHODS, ConsensusEngine
+from backend.judge import JudgeAgent
+
+
+def run_pipeline(client, topic, agents, rounds=3, memory_enabled=True,
+                 simultaneous=False, max_concurrency=4, method="majority", early_stop=False):
+    """
+    Full debate -> vote -> (judge) pipeline as a generator of (event, data)
+    pairs, emitted as each stage completes: "turn" per agent turn, "votes",
+    "decision", and finally "result" with the same payload the /debate
+    endpoint returns. Ranked methods (borda, condorcet, schulze) collect one
+    JSON ranking per agent and add the local "tallies" to the result. With
+    early_stop, the debate ends once it converges and the result carries a
+    "convergence" report (turns run, skipped speakers, calls saved).
+    """
+    debate = DebateEngine(agents, client, rounds=rounds, memory_enabled=memory_enabled,
+                          simultaneous=simultaneous, max_concurrency=max_concurrency,
+                          convergence=early_stop)
+    transcript = []
+    for turn in debate.run_streaming(topic):
+        transcript.append(turn)
+        yield "turn", turn
+
+    # Voting
+    consensus = ConsensusEngine(agents, max_concurrency=max(max_concurrency, len(agents)))
+    ranked = method in RANKED_METHODS
+    collect = consensus.collect_ballots if ranked else consensus.collect_votes
+    votes = collect(client, topic, transcript, context=debate.context)
+    yield "votes", votes
+    result = consensus.resolve(votes, method=method, client=client, topic=topic, transcript=transcript)
+
+    judge_invoked = result == "No Clear Winner"
+    if judge_invoked:
+        judge = JudgeAgent(client)
+        result = judge.adversarial_decision(topic, transcript, votes)
+    yield "decision", {"final_decision": result, "judge_invoked": judge_invoked}
+
+    payload = {
+        "topic": topic,
+        "timestamp": datetime.datetime.utcnow().isoformat(),
+        "transcript": transcript,
+        "votes": votes,
+        "method": method,
+        "judge_invoked": judge_invoked,
+        "final_decision": result
+    }
+    if ranked:
+        payload["tallies"] = consensus.tallies(votes)
+    if debate.convergence is not None:
+        payload["convergence"] = debate.convergence.report.as_dict()
+    yield "result", payload
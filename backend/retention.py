@@ -0,0 +1,159 @@
+import datetime
+import heapq
+import math
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# A scorer maps one memory entry (plus shared context) to a value where
+# higher means "more worth keeping". Policies combine them with weights.
+Scorer = Callable[[Dict[str, Any], "RetentionContext"], float]
+
+
+@dataclass
+class RetentionContext:
+    """What scorers may look at besides the entry itself."""
+    now: float
+    hits: Dict[int, int]
+    neighbours: Callable[[int], Sequence[Tuple[int, float]]]
+    half_life: float
+
+
+def _age_seconds(entry: Dict[str, Any], now: float) -> float:
+    try:
+        ts = datetime.datetime.fromisoformat(entry["timestamp"]).replace(tzinfo=datetime.timezone.utc)
+        return max(0.0, now - ts.timestamp())
+    except Exception:
+        return 0.0
+
+
+def recency_score(entry: Dict[str, Any], ctx: RetentionContext) -> float:
+    """1.0 for a new memory, halving every half_life seconds."""
+    return 0.5 ** (_age_seconds(entry, ctx.now) / ctx.half_life)
+
+
+def hits_score(entry: Dict[str, Any], ctx: RetentionContext) -> float:
+    """log(1 + times the memory was returned by retrieve)."""
+    return math.log1p(ctx.hits.get(entry["id"], 0))
+
+
+def redundancy_score(entry: Dict[str, Any], ctx: RetentionContext) -> float:
+    """
+    Similarity to the closest newer linked memory: a memory that a later one
+    largely repeats adds little. Use with a negative weight.
+    """
+    return max((s for i, s in ctx.neighbours(entry["id"]) if i > entry["id"]), default=0.0)
+
+
+SCORERS: Dict[str, Scorer] = {
+    "recency": recency_score,
+    "hits": hits_score,
+    "redundancy": redundancy_score,
+}
+
+DEFAULT_WEIGHTS = {"recency": 1.0, "hits": 0.5, "redundancy": -1.0}
+
+
+class RetentionPolicy:
+    """
+    Per-agent caps (max_entries, max_bytes) plus a weighted sum of scorers.
+
+    Pruning triggers once an agent exceeds a cap by the slack fraction, so a
+    full compaction is amortised over many saves, and cuts back to the cap.
+    Extra scorers can be registered by name in SCORERS or passed directly.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 weights: Optional[Dict[str, float]] = None, scorers: Optional[Dict[str, Scorer]] = None,
+                 half_life: float = 7 * 24 * 3600.0, slack: float = 0.25, min_slack_entries: int = 16):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.weights = dict(DEFAULT_WEIGHTS if weights is None else weights)
+        self.scorers = {**SCORERS, **(scorers or {})}
+        unknown = set(self.weights) - set(self.scorers)
+        if unknown:
+            raise ValueError(f"No scorer registered for: {', '.join(sorted(unknown))}")
+        self.half_life = float(half_life)
+        self.slack = max(0.0, float(slack))
+        self.min_slack_entries = max(1, int(min_slack_entries))
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries is not None or self.max_bytes is not None
+
+    def needs_prune(self, entries: int, size_bytes: int) -> bool:
+        if self.max_entries is not None:
+            slack = max(self.min_slack_entries, int(self.max_entries * self.slack))
+            if entries >= self.max_entries + slack:
+                return True
+        if self.max_bytes is not None and size_bytes > self.max_bytes * (1 + self.slack):
+            return True
+        return False
+
+    def score(self, entry: Dict[str, Any], ctx: RetentionContext) -> float:
+        return sum(w * self.scorers[name](entry, ctx) for name, w in self.weights.items() if w)
+
+    def select(self, entries: Iterable[Dict[str, Any]], ctx: RetentionContext,
+               max_entries: Optional[int] = None) -> List[int]:
+        """
+        Ids to keep, streamed in one pass: a min-heap holds the best
+        max_entries seen so far (O(N log K), never a full sort), then the
+        lowest scorers are popped until the byte cap is met.
+        """
+        cap = self.max_entries if max_entries is None else max_entries
+        heap: List[Tuple[float, int, int]] = []
+        total = 0
+        for entry in entries:
+            size = len(entry.get("text", "").encode("utf-8")) + 64  # ~ JSON line overhead
+            item = (self.score(entry, ctx), entry["id"], size)
+            if cap is None or len(heap) < cap:
+                heapq.heappush(heap, item)
+                total += size
+            elif item > heap[0]:
+                total += size - heapq.heapreplace(heap, item)[2]
+        if self.max_bytes is not None:
+            while heap and total > self.max_bytes:
+                total -= heapq.heappop(heap)[2]
+        return [memory_id for _, memory_id, _ in heap]
+
+
+@dataclass
+class PruneReport:
+    agent: str
+    entries_before: int
+    entries_after: int
+    bytes_before: int
+    bytes_after: int
+    seconds: float
+    retrieve_ms_before: Optional[float] = None
+    retrieve_ms_after: Optional[float] = None
+
+    @property
+    def bytes_reclaimed(self) -> int:
+        return self.bytes_before - self.bytes_after
+
+
+@dataclass
+class RetentionMetrics:
+    runs: int = 0
+    entries_removed: int = 0
+    bytes_reclaimed: int = 0
+    seconds: float = 0.0
+    recent: Deque[PruneReport] = field(default_factory=lambda: deque(maxlen=50))
+
+    def record(self, report: PruneReport) -> None:
+        self.runs += 1
+        self.entries_removed += report.entries_before - report.entries_after
+        self.bytes_reclaimed += report.bytes_reclaimed
+        self.seconds += report.seconds
+        self.recent.append(report)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "entries_removed": self.entries_removed,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "seconds": round(self.seconds, 4),
+            "last": {**vars(self.recent[-1]), "bytes_reclaimed": self.recent[-1].bytes_reclaimed}
+            if self.recent else None,
+        }
@@ -0,0 +1,82 @@
+"""
+Reading saved session exports (App session files, /debate payloads and
+Utils.log_session logs), whose votes and decisions are free-form LLM text.
+"""
+import datetime
+import os
+import re
+from collections import Counter
+from typing import Any, Dict, Optional, Set
+
+_NAME_KEY = re.compile(r"[^a-z0-9]+")
+_DECISION = re.compile(r"FINAL DECISION:\s*(.+)", re.IGNORECASE)
+_ROLE_SUFFIX = re.compile(r"\s*\(([^()]*)\)\s*$")
+
+
+def _key(name: Any) -> str:
+    return _NAME_KEY.sub("", str(name).lower())
+
+
+def participants(data: Dict[str, Any]) -> Dict[str, Dict[str, Optional[str]]]:
+    """name -> {"role", "persona"}; logs list bare names and payloads only imply agents via turns and votes."""
+    people: Dict[str, Dict[str, Optional[str]]] = {}
+    for a in data.get("agents") or []:
+        if isinstance(a, dict):
+            people[a["name"]] = {"role": a.get("role"), "persona": a.get("persona")}
+        else:
+            people[str(a)] = {"role": None, "persona": None}
+    for t in data.get("transcript") if isinstance(data.get("transcript"), list) else []:
+        entry = people.setdefault(t["agent"], {"role": None, "persona": None})
+        entry["role"] = entry["role"] or t.get("role")
+    for v in data.get("votes") or []:
+        people.setdefault(v["agent"], {"role": None, "persona": None})
+    return people
+
+
+def resolve_agent(raw: Any, roles: Dict[str, Optional[str]]) -> Optional[str]:
+    """
+    The agent a free-form vote / decision names: an agent name (ignoring case,
+    punctuation and markdown escapes) or, failing that, a role held by
+    exactly one agent. None if it names nobody.
+    """
+    if not raw:
+        return None
+    key = _key(raw)
+    by_name = {_key(a): a for a in roles}
+    if key in by_name:
+        return by_name[key]
+    holders = [a for a, r in roles.items() if r and _key(r) == key]
+    return holders[0] if len(holders) == 1 else None
+
+
+def decision_name(decision: str) -> str:
+    """Winner part of a final_decision: "Agent_2 (Role)", "Agent_2" or a judge's "FINAL DECISION: ..."."""
+    text = str(decision or "").strip()
+    m = _DECISION.search(text)
+    if m:
+        text = m.group(1)
+    text = text.splitlines()[0] if text else ""
+    return _ROLE_SUFFIX.sub("", text).strip()
+
+
+def judge_invoked(data: Dict[str, Any]) -> bool:
+    """Recorded flag, or for older exports whether the decision is the judge's "FINAL DECISION:" reply."""
+    flag = data.get("judge_invoked")
+    return bool(_DECISION.search(str(data.get("final_decision", "")))) if flag is None else bool(flag)
+
+
+def session_timestamp(data: Dict[str, Any], path: Optional[str] = None) -> datetime.datetime:
+    """Naive UTC timestamp of a session: its own, else the file's mtime, else now."""
+    try:
+        return datetime.datetime.fromisoformat(str(data["timestamp"])).replace(tzinfo=None)
+    except (KeyError, ValueError):
+        if path and os.path.exists(path):
+            return datetime.datetime.utcfromtimestamp(os.path.getmtime(path))
+        return datetime.datetime.utcnow()
+
+
+def top_choices(choices) -> Set[str]:
+    """The most-voted choices (None votes ignored): one leader, the tied leaders, or empty with no votes."""
+    counts = Counter(c for c in choices if c)
+    best = max(counts.values(), default=0)
+    return {c for c, count in counts.items() if count == best}
@@ -0,0 +1,215 @@
+import glob
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+from backend.sessions import (decision_name, judge_invoked, participants, resolve_agent, top_choices,
+                              session_timestamp)
+from backend.utils import UTILS_DIR
+
+STATS_PATH = os.path.join(UTILS_DIR, "stats.sqlite")
+DIMENSIONS = ("role", "persona")
+INITIAL_ELO = 1500.0
+ELO_K = 32.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS recorded (
+    session_id TEXT PRIMARY KEY,
+    timestamp  TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS ratings (
+    dimension  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    played     INTEGER NOT NULL DEFAULT 0,
+    wins       INTEGER NOT NULL DEFAULT 0,
+    judge_wins INTEGER NOT NULL DEFAULT 0,
+    elo        REAL NOT NULL DEFAULT 1500.0,
+    PRIMARY KEY (dimension, key)
+);
+
+CREATE TABLE IF NOT EXISTS methods (
+    method          TEXT PRIMARY KEY,
+    sessions        INTEGER NOT NULL DEFAULT 0,
+    decided         INTEGER NOT NULL DEFAULT 0,
+    judge_invoked   INTEGER NOT NULL DEFAULT 0,
+    judge_overrides INTEGER NOT NULL DEFAULT 0,
+    agreement_sum   REAL NOT NULL DEFAULT 0.0
+);
+"""
+
+
+class StatsService:
+    """
+    Running cross-session aggregates in SQLite, so dashboards read a few
+    precomputed rows instead of rescanning every export.
+
+    record() folds one finished session in, exactly once per session_id,
+    in a single transaction:
+
+    - ratings, per role and per persona: sessions played, wins, wins
+      decided by the judge, and an Elo rating. The winner's role beats every
+      other role present (one pairwise update each, K split between them),
+      using the ratings from before the session.
+    - methods, per consensus method: sessions, sessions with a resolvable
+      winner, judge invocations, judge overrides (the judge picked someone
+      other than the voters' single plurality leader) and the summed share of
+      valid votes that went to the eventual winner.
+
+    WAL mode and BEGIN IMMEDIATE serialise writers across processes without
+    blocking readers. sync() backfills from exports/ in timestamp order.
+    """
+
+    def __init__(self, path: str = STATS_PATH, timeout: float = 30.0):
+        self.path = path
+        self.timeout = float(timeout)
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def record(self, data: Dict[str, Any], session_id: str) -> bool:
+        """Fold one session (export / pipeline result dict) in; False if session_id was already recorded."""
+        people = participants(data)
+        roles = {name: p["role"] for name, p in people.items()}
+        winner = resolve_agent(decision_name(data.get("final_decision", "")), roles)
+        judged = judge_invoked(data)
+        choices = [resolve_agent(v.get("vote"), roles) if v.get("valid", True) is not False else None
+                   for v in data.get("votes") or []]
+        valid = [c for c in choices if c]
+        # The judge runs on a tie, so overriding the vote means picking someone
+        # outside the tied leaders, not merely differing from a (missing) majority
+        leaders = top_choices(valid)
+        overridden = judged and winner is not None and bool(leaders) and winner not in leaders
+        agreement = sum(c == winner for c in valid) / len(valid) if valid and winner else 0.0
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cur = conn.execute("INSERT OR IGNORE INTO recorded(session_id, timestamp) VALUES (?, ?)",
+                               (session_id, session_timestamp(data).isoformat()))
+            if cur.rowcount == 0:
+                conn.execute("ROLLBACK")
+                return False
+            for dimension in DIMENSIONS:
+                keys = sorted({p[dimension] for p in people.values() if p[dimension]})
+                win_key = people[winner][dimension] if winner else None
+                self._update_ratings(conn, dimension, keys, win_key, judged)
+            conn.execute(
+                "INSERT INTO methods(method, sessions, decided, judge_invoked, judge_overrides, agreement_sum) "
+                "VALUES (?, 1, ?, ?, ?, ?) ON CONFLICT(method) DO UPDATE SET "
+                "sessions = sessions + 1, decided = decided + excluded.decided, "
+                "judge_invoked = judge_invoked + excluded.judge_invoked, "
+                "judge_overrides = judge_overrides + excluded.judge_overrides, "
+                "agreement_sum = agreement_sum + excluded.agreement_sum",
+                (data.get("method") or "unknown", int(winner is not None), int(judged), int(overridden), agreement))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    @staticmethod
+    def _update_ratings(conn, dimension: str, keys: List[str], win_key: Optional[str], judged: bool) -> None:
+        if not keys:
+            return
+        marks = ",".join("?" * len(keys))
+        elo = {k: INITIAL_ELO for k in keys}
+        for row in conn.execute(f"SELECT key, elo FROM ratings WHERE dimension = ? AND key IN ({marks})",
+                                (dimension, *keys)):
+            elo[row["key"]] = row["elo"]
+        new = dict(elo)
+        losers = [k for k in keys if k != win_key]
+        if win_key is not None and losers:
+            k = ELO_K / len(losers)
+            for loser in losers:
+                expected = 1.0 / (1.0 + 10 ** ((elo[loser] - elo[win_key]) / 400.0))
+                new[win_key] += k * (1.0 - expected)
+                new[loser] -= k * (1.0 - expected)
+        conn.executemany(
+            "INSERT INTO ratings(dimension, key, played, wins, judge_wins, elo) VALUES (?, ?, 1, ?, ?, ?) "
+            "ON CONFLICT(dimension, key) DO UPDATE SET played = played + 1, wins = wins + excluded.wins, "
+            "judge_wins = judge_wins + excluded.judge_wins, elo = excluded.elo",
+            [(dimension, key, int(key == win_key), int(key == win_key and judged), new[key]) for key in keys])
+
+    def sync(self, exports_dir: str = UTILS_DIR) -> int:
+        """Record every session export not yet recorded, oldest first; returns how many were added."""
+        sessions = []
+        for path in glob.glob(os.path.join(exports_dir, "echomind_session_*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            if isinstance(data, dict):
+                sessions.append((session_timestamp(data, path), os.path.splitext(os.path.basename(path))[0], data))
+        sessions.sort(key=lambda s: (s[0], s[1]))
+        return sum(self.record(data, session_id) for _, session_id, data in sessions)
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def leaderboard(self, dimension: str = "role") -> List[Dict[str, Any]]:
+        """Ratings for dimension ("role" or "persona"), best Elo first, with win_rate."""
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+        rows = self._conn().execute(
+            "SELECT key, played, wins, judge_wins, elo FROM ratings WHERE dimension = ? ORDER BY elo DESC",
+            (dimension,)).fetchall()
+        return [{**dict(r), "elo": round(r["elo"], 1), "win_rate": r["wins"] / r["played"] if r["played"] else 0.0}
+                for r in rows]
+
+    def methods(self) -> List[Dict[str, Any]]:
+        """Per consensus method: sessions, judge_rate, override_rate (of judge calls) and mean vote agreement."""
+        rows = self._conn().execute("SELECT * FROM methods ORDER BY sessions DESC").fetchall()
+        return [{
+            "method": r["method"], "sessions": r["sessions"],
+            "judge_rate": r["judge_invoked"] / r["sessions"],
+            "override_rate": r["judge_overrides"] / r["judge_invoked"] if r["judge_invoked"] else 0.0,
+            "agreement": r["agreement_sum"] / r["decided"] if r["decided"] else 0.0,
+        } for r in rows]
+
+    def summary(self) -> Dict[str, Any]:
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(sessions), 0) AS sessions, COALESCE(SUM(judge_invoked), 0) AS judged, "
+            "COALESCE(SUM(judge_overrides), 0) AS overrides FROM methods").fetchone()
+        return {
+            "sessions": row["sessions"],
+            "judge_rate": row["judged"] / row["sessions"] if row["sessions"] else 0.0,
+            "override_rate": row["overrides"] / row["judged"] if row["judged"] else 0.0,
+        }
+
+    def reset(self) -> None:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        for table in ("recorded", "ratings", "methods"):
+            conn.execute(f"DELETE FROM {table}")
+        conn.execute("COMMIT")
+
+
+_services: Dict[str, StatsService] = {}
+_services_lock = threading.Lock()
+
+
+def get_stats(path: str = STATS_PATH) -> StatsService:
+    """Process-wide StatsService per database path."""
+    with _services_lock:
+        if path not in _services:
+            _services[path] = StatsService(path)
+        return _services[path]
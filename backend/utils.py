@@ -1,8 +1,11 @@
 import os, json, csv, datetime
-import networkx as nx
 
 UTILS_DIR = "exports"
-os.makedirs(UTILS_DIR, exist_ok=True)
+
+
+def _export_path(filename):
+    os.makedirs(UTILS_DIR, exist_ok=True)
+    return os.path.join(UTILS_DIR, filename)
 
 
 class Utils:
@@ -11,7 +14,7 @@ class Utils:
     # -------------------------
     @staticmethod
     def save_json(data, filename):
-        path = os.path.join(UTILS_DIR, filename)
+        path = _export_path(filename)
         with open(path, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
         return path
@@ -21,7 +24,7 @@ class Utils:
     # -------------------------
     @staticmethod
     def save_csv(data, filename, headers=None):
-        path = os.path.join(UTILS_DIR, filename)
+        path = _export_path(filename)
         with open(path, "w", newline="", encoding="utf-8") as f:
             writer = csv.writer(f)
             if headers:
@@ -34,14 +37,20 @@ class Utils:
     # Export Debate Graph to GraphML (for Gephi/Neo4j)
     # -------------------------
     @staticmethod
-    def export_graphml(transcript, filename="debate.graphml"):
-        G = nx.DiGraph()
-        for i in range(1, len(transcript)):
-            prev_agent = transcript[i - 1]["agent"]
-            curr_agent = transcript[i]["agent"]
-            G.add_edge(prev_agent, curr_agent, text=transcript[i]["text"])
+    def export_graphml(transcript, filename="debate.graphml", level="agent", **influence_kwargs):
+        """
+        Semantic influence graph (see backend.influence): with level="agent",
+        agents linked source -> responder with summed similarity weights and
+        pagerank / hub / authority node scores; with level="turn", one node
+        per turn (agent, round, text, pagerank) linked to the turns it
+        responds to.
+        """
+        import networkx as nx
+        from backend.influence import influence_graph
 
-        path = os.path.join(UTILS_DIR, filename)
+        graph = influence_graph(transcript, **influence_kwargs)
+        G = graph.to_networkx(transcript if level == "turn" else None)
+        path = _export_path(filename)
         nx.write_graphml(G, path)
         return path
 
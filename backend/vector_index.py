@@ -0,0 +1,205 @@
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+from backend.embeddings import Embedder, embed_many, embed_query
+from backend.memory_store import extends
+
+# Exact search is fast enough below this many vectors; above it the index is
+# rebuilt as an approximate one (HNSW graph or IVF clusters).
+DEFAULT_ANN_THRESHOLD = 20_000
+
+
+class FaissMemoryIndex:
+    """
+    Per-agent FAISS index over memory embeddings, keyed by memory id.
+
+    Vectors live only inside FAISS (an IndexIDMap2 over inner-product search
+    on unit vectors, i.e. cosine); nothing is mirrored in Python lists. The
+    index is written to disk with write_index and reopened memory-mapped, so
+    loading a large agent costs page faults rather than a full read. Once it
+    holds ann_threshold vectors, the flat index is rebuilt as HNSW (default)
+    or IVF from its own stored vectors, without re-embedding.
+    """
+
+    def __init__(self, path: Optional[str], embedder: Embedder, ann: str = "hnsw",
+                 ann_threshold: int = DEFAULT_ANN_THRESHOLD, hnsw_m: int = 32,
+                 ef_search: int = 64, nprobe: int = 16, flush_every: int = 32):
+        if ann not in ("hnsw", "ivf", "flat"):
+            raise ValueError(f"Unknown ANN index type: {ann!r}")
+        self.path = path
+        self.embedder = embedder
+        self.ann = ann
+        self.ann_threshold = max(1, int(ann_threshold))
+        self.hnsw_m = int(hnsw_m)
+        self.ef_search = int(ef_search)
+        self.nprobe = int(nprobe)
+        self.flush_every = max(1, int(flush_every))
+        self.index: Optional[faiss.IndexIDMap2] = None
+        self.ids: List[int] = []
+        self._mapped = False
+        self._unsaved = 0
+
+        if self.path and os.path.exists(self.path):
+            try:
+                self._load()
+            except Exception:
+                self.clear()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def kind(self) -> str:
+        if self.index is None:
+            return "empty"
+        inner = faiss.downcast_index(self.index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            return "hnsw"
+        if isinstance(inner, faiss.IndexIVF):
+            return "ivf"
+        return "flat"
+
+    # -------------------------
+    # Updates
+    # -------------------------
+    def add_many(self, memory_ids: Sequence[int], texts: Sequence[str]) -> None:
+        if not texts:
+            return
+        self.add_vectors(memory_ids, embed_many(self.embedder, texts))
+
+    def add_vectors(self, memory_ids: Sequence[int], vectors: np.ndarray) -> None:
+        ids = np.asarray(memory_ids, dtype=np.int64)
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.index is None:
+            self.index = self._build(vectors.shape[1], len(ids), vectors)
+        elif self.kind == "flat" and self.ann != "flat" and len(self.ids) + len(ids) >= self.ann_threshold:
+            old_ids, old_vectors = self._stored()
+            self._replace(np.concatenate([old_ids, ids]), np.vstack([old_vectors, vectors]))
+            return
+        try:
+            self.index.add_with_ids(vectors, ids)
+        except RuntimeError:
+            if not self._mapped:
+                raise
+            # Memory-mapped IVF lists are read-only: reopen in RAM and retry
+            self.index, self._mapped = faiss.read_index(self.path), False
+            self._tune()
+            self.index.add_with_ids(vectors, ids)
+        self.ids.extend(int(i) for i in ids)
+        self._unsaved += len(ids)
+        if self.path and self._unsaved >= self.flush_every:
+            self.flush()
+
+    def clear(self) -> None:
+        self.index = None
+        self.ids = []
+        self._mapped = False
+        self._unsaved = 0
+
+    def rebuild(self, memory_ids: Sequence[int], texts: Sequence[str]) -> None:
+        self.clear()
+        self.add_many(memory_ids, texts)
+        self._unsaved = max(self._unsaved, 1)
+        self.flush()
+
+    def sync(self, memory_ids: Sequence[int], load_texts: Callable[[int], List[str]]) -> None:
+        """
+        Bring the index in line with the memory store. New entries are
+        embedded and appended; if entries were dropped (compaction), the
+        surviving vectors are kept and only the index structure is rebuilt.
+        """
+        n = len(self.ids)
+        if extends(memory_ids, self.ids):
+            if n < len(memory_ids):
+                self.add_many(memory_ids[n:], load_texts(n))
+            return
+
+        keep = set(int(i) for i in memory_ids)
+        if self.index is not None and keep.issubset(self.ids):
+            stored_ids, vectors = self._stored()
+            mask = np.fromiter((int(i) in keep for i in stored_ids), dtype=bool, count=len(stored_ids))
+            self.clear()
+            if mask.any():
+                self._replace(stored_ids[mask], vectors[mask])
+            self._unsaved = max(self._unsaved, 1)
+            self.flush()
+        else:
+            self.rebuild(memory_ids, load_texts(0))
+
+    # -------------------------
+    # Query
+    # -------------------------
+    def search(self, query: str, top_k: int = 3) -> List[Tuple[int, float]]:
+        """Return up to top_k (memory_id, cosine) pairs, best first."""
+        if self.index is None or not self.ids or top_k <= 0:
+            return []
+        q = embed_query(self.embedder, query)
+        if q.shape[1] != self.index.d:
+            raise ValueError("query embedding dimension does not match the index")
+        scores, ids = self.index.search(q, min(top_k, len(self.ids)))
+        return [(int(i), float(s)) for i, s in zip(ids[0], scores[0]) if i >= 0]
+
+    # -------------------------
+    # Persistence
+    # -------------------------
+    def flush(self) -> None:
+        if not self.path or self._unsaved == 0:
+            return
+        if self.index is None:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        else:
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            faiss.write_index(self.index, tmp)
+            os.replace(tmp, self.path)
+        self._unsaved = 0
+
+    def _load(self) -> None:
+        self.index = faiss.read_index(self.path, faiss.IO_FLAG_MMAP)
+        self._mapped = True
+        self.ids = [int(i) for i in faiss.vector_to_array(self.index.id_map)]
+        self._tune()
+
+    # -------------------------
+    # Index construction
+    # -------------------------
+    def _build(self, dim: int, n: int, sample: np.ndarray) -> faiss.IndexIDMap2:
+        if self.ann == "hnsw" and n >= self.ann_threshold:
+            inner = faiss.IndexHNSWFlat(dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        elif self.ann == "ivf" and n >= self.ann_threshold:
+            nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+            inner = faiss.IndexIVFFlat(faiss.IndexFlatIP(dim), dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            inner.train(sample)
+        else:
+            inner = faiss.IndexFlatIP(dim)
+        index = faiss.IndexIDMap2(inner)
+        self.index = index
+        self._tune()
+        return index
+
+    def _replace(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        self.index = self._build(vectors.shape[1], len(ids), vectors)
+        self._mapped = False
+        self.index.add_with_ids(vectors, ids)
+        self.ids = [int(i) for i in ids]
+        self._unsaved += len(ids)
+        if self.path:
+            self.flush()
+
+    def _stored(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(ids, vectors) in insertion order, read back out of the FAISS index."""
+        inner = faiss.downcast_index(self.index.index)
+        if isinstance(inner, faiss.IndexIVF):
+            inner.make_direct_map()
+        vectors = inner.reconstruct_n(0, inner.ntotal) if inner.ntotal else np.zeros((0, self.index.d), np.float32)
+        return faiss.vector_to_array(self.index.id_map).astype(np.int64), vectors
+
+    def _tune(self) -> None:
+        inner = faiss.downcast_index(self.index.index)
+        if isinstance(inner, faiss.IndexHNSW):
+            inner.hnsw.efSearch = self.ef_search
+        elif isinstance(inner, faiss.IndexIVF):
+            inner.nprobe = self.nprobe
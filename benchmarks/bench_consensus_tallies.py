@@ -0,0 +1,119 @@
+"""
+Tally cost vs. electorate size: the old loop-based ConsensusEngine methods
+vs. the NumPy BallotMatrix (majority, Borda, pairwise matrix + Condorcet,
+Schulze). Results of both are checked to agree.
+
+    python -m benchmarks.bench_consensus_tallies [--voters 100 1000 10000 --candidates 5 20 100]
+"""
+import argparse
+import random
+import time
+from collections import Counter
+
+from backend.ballots import BallotMatrix
+from backend.consensus import ConsensusEngine
+
+
+# -------------------------
+# Previous implementations, kept here for comparison
+# -------------------------
+def legacy_majority(votes):
+    tally = Counter([v["vote"] for v in votes if v.get("vote")])
+    if not tally:
+        return "No Decision"
+    winner, count = tally.most_common(1)[0]
+    if list(tally.values()).count(count) > 1:
+        return "No Clear Winner"
+    return winner
+
+
+def legacy_borda(rankings):
+    scores = Counter()
+    for rank in rankings:
+        for i, agent in enumerate(rank):
+            scores[agent] += len(rank) - i - 1
+    return scores.most_common(1)[0][0] if scores else "No Decision"
+
+
+def legacy_pairwise(rankings, candidates):
+    """What a caller had to build in Python to use the old condorcet()."""
+    prefs = {a: {b: 0 for b in candidates} for a in candidates}
+    for rank in rankings:
+        for i, a in enumerate(rank):
+            for b in rank[i + 1:]:
+                prefs[a][b] += 1
+    return prefs
+
+
+def legacy_condorcet(pairwise_preferences):
+    candidates = list(pairwise_preferences.keys())
+    for c in candidates:
+        wins = sum(pairwise_preferences[c][opp] > pairwise_preferences[opp][c]
+                   for opp in candidates if opp != c)
+        if wins == len(candidates) - 1:
+            return c
+    return "No Condorcet Winner"
+
+
+def make_rankings(voters, candidates, seed=0):
+    """Noisy rankings around a shared latent order, so Condorcet winners usually exist."""
+    rng = random.Random(seed)
+    names = [f"Agent_{i + 1}" for i in range(candidates)]
+    quality = {n: rng.random() for n in names}
+    return names, [sorted(names, key=lambda n: quality[n] + rng.gauss(0, 0.3), reverse=True)
+                   for _ in range(voters)]
+
+
+def timed(fn, repeat):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--voters", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--candidates", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    engine = ConsensusEngine([])
+    print("old = loop implementations on Python lists; new = BallotMatrix tallies on a prebuilt matrix")
+    print(f"{'voters':>7} {'cands':>5} | {'build':>8} | {'majority':>17} | {'borda':>17} | "
+          f"{'condorcet':>17} | {'schulze':>8}")
+    print(f"{'':>7} {'':>5} | {'new ms':>8} | {'old ms':>8} {'new ms':>8} | {'old ms':>8} {'new ms':>8} | "
+          f"{'old ms':>8} {'new ms':>8} | {'new ms':>8}")
+    for v in args.voters:
+        for c in args.candidates:
+            names, rankings = make_rankings(v, c)
+            votes = [{"agent": f"voter{i}", "vote": r[0]} for i, r in enumerate(rankings)]
+
+            old_maj, r_old = timed(lambda: legacy_majority(votes), args.repeat)
+            new_maj, r_new = timed(lambda: engine.majority_vote(votes), args.repeat)
+            assert r_old == r_new, (r_old, r_new)
+
+            build, ballots = timed(lambda: BallotMatrix.from_rankings(rankings), args.repeat)
+
+            old_borda, r_old = timed(lambda: legacy_borda(rankings), args.repeat)
+            new_borda, r_new = timed(lambda: engine.borda_count(ballots), args.repeat)
+            assert r_old == r_new, (r_old, r_new)
+
+            old_cond, r_old = timed(lambda: legacy_condorcet(legacy_pairwise(rankings, names)), args.repeat)
+
+            def condorcet():
+                ballots._pairwise = None  # time the pairwise matrix too
+                return engine.condorcet(ballots, fallback=None)
+
+            new_cond, r_new = timed(condorcet, args.repeat)
+            assert r_old == r_new, (r_old, r_new)
+
+            schulze, _ = timed(ballots.schulze_winner, args.repeat)
+            print(f"{v:>7} {c:>5} | {build:8.2f} | {old_maj:8.2f} {new_maj:8.2f} | {old_borda:8.2f} {new_borda:8.2f} | "
+                  f"{old_cond:8.2f} {new_cond:8.2f} | {schulze:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
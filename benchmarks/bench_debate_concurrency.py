@@ -0,0 +1,57 @@
+"""
+Wall-clock of sequential vs. simultaneous debate rounds against FakeLLMClient.
+
+    python -m benchmarks.bench_debate_concurrency [--agents 8 --rounds 3 --latency 0.2 --repeats 3]
+
+Both modes get one untimed warmup debate first (imports, thread pool), then
+run --repeats times in alternating order; the best time of each is reported.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from backend.agent import Agent
+from backend.debate_engine import DebateEngine
+from backend.fake_llm import FakeLLMClient
+
+
+def run(args, simultaneous, rounds=None):
+    rounds = rounds or args.rounds
+    client = FakeLLMClient(latency=args.latency)
+    agents = [Agent(name=f"Agent_{i+1}", role="Civilian", persist_memory=False) for i in range(args.agents)]
+    engine = DebateEngine(agents, client, rounds=rounds, memory_enabled=False,
+                          simultaneous=simultaneous, max_concurrency=args.concurrency)
+    start = time.perf_counter()
+    transcript = engine.run("Should cities ban cars from their centres?")
+    elapsed = time.perf_counter() - start
+    assert [t["agent"] for t in transcript] == [a.name for a in agents] * rounds
+    return elapsed, client.calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agents", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3, help="timed runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    os.chdir(tempfile.mkdtemp(prefix="echomind-bench-"))  # keep any stray memories/ out of the repo
+    for simultaneous in (False, True):
+        run(args, simultaneous, rounds=1)
+    times = {False: [], True: []}
+    for i in range(max(1, args.repeats)):
+        for simultaneous in ((False, True) if i % 2 == 0 else (True, False)):
+            elapsed, calls = run(args, simultaneous)
+            times[simultaneous].append(elapsed)
+    assert not os.path.exists("memories"), "memory_enabled=False debates must not persist memories"
+    seq, par = min(times[False]), min(times[True])
+    print(f"{args.agents} agents x {args.rounds} rounds = {calls} calls @ {args.latency * 1000:.0f} ms")
+    print(f"sequential   : {seq:6.2f} s")
+    print(f"simultaneous : {par:6.2f} s  (max_concurrency={args.concurrency}, {seq / par:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Cold import time of the backend modules, each in a fresh interpreter.
+
+    python -m benchmarks.bench_import_time [--repeat 5] [--max-ms 300]
+
+Reports the best-of-N wall time per module plus the slowest self-time
+entries from `python -X importtime`. With --max-ms, exits non-zero if any
+module listed in --gate takes longer, so it can be used as a CI check.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["backend.agent", "backend.memory", "backend.debate_engine", "backend.analysis", "backend.app"]
+
+
+def wall_ms(module):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", f"import {module}"], cwd=ROOT, check=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def top_imports(module, n):
+    """Slowest imports by self time (microseconds) from -X importtime."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(self_us), int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if a gated module is slower")
+    parser.add_argument("--gate", nargs="*", default=["backend.agent"])
+    args = parser.parse_args()
+
+    baseline = min(wall_ms("sys") for _ in range(args.repeat))
+    print(f"interpreter startup: {baseline:7.1f} ms")
+    failed = []
+    for module in MODULES:
+        try:
+            best = max(0.0, min(wall_ms(module) for _ in range(args.repeat)) - baseline)
+        except subprocess.CalledProcessError:
+            print(f"{module:24s}  (import failed, dependency missing?)")
+            continue
+        print(f"{module:24s} {best:7.1f} ms")
+        for self_us, _, name in top_imports(module, args.top):
+            print(f"    {self_us / 1000:7.1f} ms  {name}")
+        if args.max_ms is not None and module in args.gate and best > args.max_ms:
+            failed.append(module)
+
+    if failed:
+        print(f"over {args.max_ms:.0f} ms: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
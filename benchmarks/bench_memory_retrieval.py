@@ -0,0 +1,68 @@
+"""
+Retrieval latency vs. memory count: per-call TF-IDF refit vs. SparseMemoryIndex.
+
+    python -m benchmarks.bench_memory_retrieval [--sizes 100 1000 10000 100000]
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from backend.memory_index import SparseMemoryIndex
+
+WORDS = [f"w{i}" for i in range(20000)]
+
+
+def make_texts(n, seed=0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(WORDS, k=rng.randint(40, 80))) for _ in range(n)]
+
+
+def legacy_retrieve(query, texts, top_k=3):
+    """The old MemoryManager.retrieve fallback: refit + densify on every call."""
+    tfidf_matrix = TfidfVectorizer().fit_transform([query] + texts)
+    dense_matrix = np.asarray(tfidf_matrix.todense())
+    sims = cosine_similarity(dense_matrix[0:1], dense_matrix[1:]).flatten()
+    return sims.argsort()[::-1][:top_k]
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--legacy-max", type=int, default=5000,
+                        help="skip the dense legacy path above this size (it needs vocab x N floats)")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    query = " ".join(make_texts(1, seed=123)[0].split()[:12])
+    print(f"{'memories':>10} {'build (s)':>10} {'index (ms)':>11} {'legacy (ms)':>12}")
+    for n in args.sizes:
+        texts = make_texts(n)
+        index = SparseMemoryIndex()
+        start = time.perf_counter()
+        index.add_many(range(n), texts)
+        index.search(query)  # first query stacks pending rows
+        build = time.perf_counter() - start
+
+        fast = timed(lambda: index.search(query), args.repeat) * 1000
+        if n <= args.legacy_max:
+            slow = f"{timed(lambda: legacy_retrieve(query, texts), 1) * 1000:12.1f}"
+        else:
+            slow = f"{'skipped':>12}"
+        print(f"{n:>10} {build:>10.2f} {fast:>11.2f} {slow}")
+
+
+if __name__ == "__main__":
+    main()
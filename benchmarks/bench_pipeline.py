@@ -0,0 +1,165 @@
+"""
+End-to-end debate -> vote -> judge pipeline benchmark against the fake LLM,
+to measure the framework's own overhead and catch regressions.
+
+    python -m benchmarks.bench_pipeline [--agents 3 5 8 --rounds 1 3 --debates 10]
+    python -m benchmarks.bench_pipeline --latency lognormal:0.3,0.5 --tokens-per-second 80 --parallel 4
+    python -m benchmarks.bench_pipeline --http --error-rate 0.05    # through the real openai client
+
+For every agents x rounds configuration, --debates pipelines run (--parallel
+at a time) and the table reports throughput (debates/s, LLM calls/s), p50 /
+p99 end-to-end latency, mean time per phase (debate turns, vote collection,
+resolution incl. any judge call), peak RSS and, with --tracemalloc, peak
+Python heap. With the default --latency 0 every millisecond is framework
+time. --json writes the raw numbers for comparing runs.
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backend.agent import Agent
+from backend.fake_llm import FakeLLMClient
+from backend.llm_client import LLMClient
+from backend.pipeline import run_pipeline
+
+PHASES = ("debate", "vote", "decide")
+TOPIC = "Should cities ban cars from their centres?"
+
+
+def make_client(args):
+    """(LLMClient, FakeLLMClient, server or None) for one configuration."""
+    fake = FakeLLMClient(latency=args.latency, seed=args.seed, error_rate=args.error_rate,
+                         error_status=args.error_status, tokens_per_second=args.tokens_per_second,
+                         retry_after=args.retry_after)
+    if not args.http:
+        return LLMClient(fake, base_delay=args.retry_delay), fake, None
+
+    from openai import OpenAI
+    from backend.fake_llm_server import start_server
+
+    server, base_url = start_server(fake)
+    # Retries stay in LLMClient (as in the app), not in the openai client
+    raw = OpenAI(base_url=base_url, api_key="fake", max_retries=0)
+    return LLMClient(raw, base_delay=args.retry_delay), fake, server
+
+
+def run_one(client, n_agents, rounds, args):
+    """Run one pipeline; returns its end-to-end seconds, per-phase seconds and whether the judge ran."""
+    agents = [Agent(name=f"Agent_{i+1}", role="Civilian") for i in range(n_agents)]
+    marks = {}
+    judge = False
+    start = time.perf_counter()
+    for event, data in run_pipeline(client, TOPIC, agents, rounds=rounds, memory_enabled=args.memory,
+                                    simultaneous=args.simultaneous, max_concurrency=args.concurrency,
+                                    method=args.method):
+        marks[event] = time.perf_counter()
+        if event == "decision":
+            judge = data["judge_invoked"]
+    debate_end = marks.get("turn", start)
+    phases = {
+        "debate": debate_end - start,
+        "vote": marks["votes"] - debate_end,
+        "decide": marks["decision"] - marks["votes"],
+    }
+    return marks["result"] - start, phases, judge
+
+
+def bench(n_agents, rounds, args):
+    client, fake, server = make_client(args)
+    for _ in range(args.warmup):
+        run_one(client, n_agents, rounds, args)
+    fake.calls = fake.errors = 0
+    fake.errors_by_status, fake.simulated_seconds = {}, 0.0
+    if args.tracemalloc:
+        tracemalloc.start()
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.parallel) as pool:
+            runs = list(pool.map(lambda _: run_one(client, n_agents, rounds, args), range(args.debates)))
+        wall = time.perf_counter() - start
+        heap_peak = tracemalloc.get_traced_memory()[1] if args.tracemalloc else None
+    finally:
+        if args.tracemalloc:
+            tracemalloc.stop()
+        if server is not None:
+            server.shutdown()
+
+    latencies = np.array([r[0] for r in runs]) * 1000
+    stats = fake.stats()
+    return {
+        "agents": n_agents, "rounds": rounds, "debates": args.debates, "parallel": args.parallel,
+        "wall_s": wall,
+        "debates_per_s": args.debates / wall,
+        "calls": stats["calls"], "errors": stats["errors"], "retries": client.metrics()["retries"],
+        "calls_per_s": stats["calls"] / wall,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "phase_ms": {p: statistics.mean(r[1][p] for r in runs) * 1000 for p in PHASES},
+        "judge_runs": sum(r[2] for r in runs),
+        "simulated_provider_s": stats["simulated_seconds"],
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 if sys.platform != "darwin" else 1024 ** 2),
+        "peak_heap_mb": heap_peak / 1024 ** 2 if heap_peak is not None else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[3, 5, 8])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[1, 3])
+    parser.add_argument("--debates", type=int, default=10, help="pipelines per configuration")
+    parser.add_argument("--parallel", type=int, default=1, help="pipelines running at once")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured pipelines per configuration")
+    parser.add_argument("--method", default="majority")
+    parser.add_argument("--simultaneous", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--memory", action="store_true", help="enable agent memory (in a temp dir)")
+    parser.add_argument("--latency", default="0", help='seconds per call, or e.g. "lognormal:0.3,0.5"')
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=None)
+    parser.add_argument("--retry-delay", type=float, default=0.01, help="LLMClient base backoff in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--http", action="store_true", help="go through the local HTTP server and openai client")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak Python heap (slower)")
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    os.chdir(tempfile.mkdtemp(prefix="echomind-bench-"))  # keep memories/ out of the repo
+    print(f"latency={args.latency} tps={args.tokens_per_second} errors={args.error_rate} "
+          f"method={args.method} simultaneous={args.simultaneous} parallel={args.parallel} "
+          f"{'http' if args.http else 'in-process'}")
+    header = (f"{'agents':>6} {'rounds':>6} | {'calls':>6} {'err':>4} | {'debate/s':>8} {'calls/s':>8} | "
+              f"{'p50 ms':>8} {'p99 ms':>8} | {'debate':>8} {'vote':>7} {'decide':>7} | {'rss MB':>7}")
+    print(header)
+    print("-" * len(header))
+    results = []
+    for n_agents in args.agents:
+        for rounds in args.rounds:
+            r = bench(n_agents, rounds, args)
+            results.append(r)
+            ph = r["phase_ms"]
+            print(f"{n_agents:>6} {rounds:>6} | {r['calls']:>6} {r['errors']:>4} | {r['debates_per_s']:8.2f} "
+                  f"{r['calls_per_s']:8.1f} | {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} | {ph['debate']:8.1f} "
+                  f"{ph['vote']:7.1f} {ph['decide']:7.1f} | {r['peak_rss_mb']:7.1f}"
+                  + (f"  heap {r['peak_heap_mb']:.1f} MB" if r["peak_heap_mb"] is not None else ""))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Multi-process stress test for the memory store: several processes append to
+the same agents' memories (as concurrent Streamlit sessions, API workers and
+ui.py do) while others keep retrieving, then every write is checked for.
+
+    python -m benchmarks.stress_memory_multiprocess [--writers 8 --saves 200 --storage sqlite]
+
+Exits non-zero if any memory was lost, duplicated or given a clashing id.
+Run with --storage jsonl to see the per-process log lose updates.
+"""
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+
+AGENTS = ["Agent_1", "Agent_2", "Agent_3"]
+
+
+def writer(workdir, storage, worker, saves):
+    os.chdir(workdir)
+    from backend.memory import MemoryManager
+
+    manager = MemoryManager(storage=storage, fsync="never")
+    for i in range(saves):
+        manager.save(AGENTS[i % len(AGENTS)], f"w{worker} m{i} argument about public transport")
+    manager.flush()
+
+
+def reader(workdir, storage, stop):
+    os.chdir(workdir)
+    from backend.memory import MemoryManager
+
+    manager = MemoryManager(storage=storage)
+    reads = 0
+    while not stop.is_set():
+        for agent in AGENTS:
+            manager.retrieve(agent, "public transport", top_k=3)
+            reads += 1
+    return reads
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--saves", type=int, default=200, help="saves per writer process")
+    parser.add_argument("--storage", choices=["sqlite", "jsonl"], default="sqlite")
+    args = parser.parse_args()
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root)
+    workdir = tempfile.mkdtemp(prefix="echomind-stress-")
+    ctx = mp.get_context("spawn")
+    stop = ctx.Event()
+
+    start = time.perf_counter()
+    readers = [ctx.Process(target=reader, args=(workdir, args.storage, stop)) for _ in range(args.readers)]
+    writers = [ctx.Process(target=writer, args=(workdir, args.storage, w, args.saves)) for w in range(args.writers)]
+    for p in readers + writers:
+        p.start()
+    for p in writers:
+        p.join()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for p in readers:
+        p.join()
+
+    os.chdir(workdir)
+    from backend.memory import MemoryManager
+
+    manager = MemoryManager(storage=args.storage)
+    expected = {f"w{w} m{i} argument about public transport"
+                for w in range(args.writers) for i in range(args.saves)}
+    found, ids, failures = [], [], 0
+    for agent in AGENTS:
+        entries = manager.load(agent)
+        found.extend(e["text"] for e in entries)
+        ids.extend(e["id"] for e in entries)
+    lost = expected - set(found)
+    duplicated = len(found) - len(set(found))
+    clashing = len(ids) - len(set(ids))
+    total = args.writers * args.saves
+
+    print(f"storage={args.storage} writers={args.writers} readers={args.readers} saves={total} in {elapsed:.2f} s "
+          f"({total / elapsed:.0f} saves/s)")
+    print(f"stored={len(found)} lost={len(lost)} duplicated={duplicated} clashing ids={clashing}")
+    print("workdir:", workdir)
+    if any(p.exitcode for p in readers + writers):
+        print("a worker process failed")
+        failures += 1
+    if lost or duplicated or clashing or failures:
+        sys.exit(1)
+    print("OK: no lost updates")
+
+
+if __name__ == "__main__":
+    main()
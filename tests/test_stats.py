@@ -0,0 +1,31 @@
+from backend.stats import StatsService
+
+AGENTS = [{"name": "Agent_1", "role": "Economist"}, {"name": "Agent_2", "role": "Ethicist"},
+          {"name": "Agent_3", "role": "Engineer"}, {"name": "Agent_4", "role": "Historian"}]
+
+
+def session(winner, votes):
+    return {
+        "method": "majority",
+        "agents": AGENTS,
+        "votes": [{"agent": a["name"], "vote": v} for a, v in zip(AGENTS, votes)],
+        "final_decision": f"FINAL DECISION: {winner}",
+        "judge_invoked": True,
+        "timestamp": "2026-01-01T00:00:00",
+    }
+
+
+def test_judge_breaking_a_tie_toward_a_non_leader_is_an_override(tmp_path):
+    stats = StatsService(str(tmp_path / "stats.sqlite"))
+    # Agent_1 and Agent_2 tie on two votes each; the judge picks Agent_3
+    assert stats.record(session("Agent_3", ["Agent_1", "Agent_2", "Agent_1", "Agent_2"]), "s1")
+    summary = stats.summary()
+    assert summary["judge_rate"] == 1.0
+    assert summary["override_rate"] == 1.0
+
+
+def test_judge_picking_one_of_the_tied_leaders_is_not_an_override(tmp_path):
+    stats = StatsService(str(tmp_path / "stats.sqlite"))
+    assert stats.record(session("Agent_2", ["Agent_1", "Agent_2", "Agent_1", "Agent_2"]), "s1")
+    assert stats.record(session("Agent_4", ["Agent_1", "Agent_2", "Agent_1", "Agent_2"]), "s2")
+    assert stats.summary()["override_rate"] == 0.5